@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# Decode cost of numeric telemetry per payload encoding, as messages per
+# second through MqttService._on_message (one handler per topic receiving
+# the decoded value):
+#
+#   text/float    b"87.5"              -> "float" text codec
+#   f32, f64      packed little-endian -> struct codec, no text
+#   text/json     b'{"x":..,"y":..,"theta":..}' -> json.loads(text)
+#   struct:<3f    packed pose          -> tuple, no text
+#   msgpack/cbor  pose dict            -> only if the package is installed
+#
+#   python benchmarks/bench_codecs.py [--messages 500000]
+import argparse
+import json
+import os
+import struct
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mqtt_service import MqttService  # noqa: E402
+
+
+class _Msg:
+    __slots__ = ("topic", "payload")
+
+    def __init__(self, topic: str, payload: bytes):
+        self.topic = topic
+        self.payload = payload
+
+
+SPEEDS = [42.0, 87.5, 100.0, 0.25, 13.125]
+POSES = [(1.25, -3.5, 0.7853), (10.0, 4.75, -1.5), (0.0, 0.0, 3.1415)]
+
+
+def _json_decoder(topic: str, payload: bytes):
+    try:
+        return json.loads(payload.decode("utf-8", errors="replace"))
+    except ValueError:
+        return None
+
+
+def _cases():
+    pose_dicts = [{"x": x, "y": y, "theta": t} for x, y, t in POSES]
+    cases = [
+        ("text/float", dict(codec="float"), [str(v).encode() for v in SPEEDS]),
+        ("f32", dict(codec="f32"), [struct.pack("<f", v) for v in SPEEDS]),
+        ("f64", dict(codec="f64"), [struct.pack("<d", v) for v in SPEEDS]),
+        ("text/json", dict(decoder=_json_decoder), [json.dumps(p).encode() for p in pose_dicts]),
+        ("struct:<3f", dict(codec="struct:<3f"), [struct.pack("<3f", *p) for p in POSES]),
+    ]
+    try:
+        import msgpack
+        cases.append(("msgpack", dict(codec="msgpack"), [msgpack.packb(p) for p in pose_dicts]))
+    except ImportError:
+        cases.append(("msgpack", None, None))
+    try:
+        import cbor2
+        cases.append(("cbor", dict(codec="cbor"), [cbor2.dumps(p) for p in pose_dicts]))
+    except ImportError:
+        cases.append(("cbor", None, None))
+    return cases
+
+
+def bench(options, payloads, n: int) -> float:
+    svc = MqttService()
+    svc.subscribe("/telemetry/#", lambda t, v: None, **options)
+    messages = [_Msg(f"/telemetry/{i % 4}", payloads[i % len(payloads)]) for i in range(n)]
+    on_message = svc._on_message
+    t0 = time.perf_counter()
+    for msg in messages:
+        on_message(None, None, msg)
+    return n / (time.perf_counter() - t0)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--messages", type=int, default=500_000)
+    args = ap.parse_args()
+
+    baseline = {}
+    for name, options, payloads in _cases():
+        if options is None:
+            print(f"{name:>12}: not installed")
+            continue
+        rate = bench(options, payloads, args.messages)
+        ref = "text/json" if len(payloads) == len(POSES) else "text/float"
+        baseline.setdefault(ref, rate)
+        print(f"{name:>12}: {rate:>10,.0f} msg/s  ({rate / baseline[ref]:.2f}x {ref})  "
+              f"{len(payloads[0]):>3} B payload")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# Messages per second through MqttService._on_message with the bindings from
+# bindings.json, comparing:
+#
+#   per-binding  payload decoded to text, then re-parsed by every binding
+#                (the pipeline before parse-once decoding)
+#   parse-once   payload decoded once into a Reading shared by all bindings
+#
+#   python benchmarks/bench_decode.py [--messages 200000]
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bindings import BindingRegistry  # noqa: E402
+from mqtt_service import MqttService  # noqa: E402
+
+
+class _Msg:
+    __slots__ = ("topic", "payload")
+
+    def __init__(self, topic: str, payload: bytes):
+        self.topic = topic
+        self.payload = payload
+
+
+SAMPLES = {
+    "/low_level_controller/speed/data/value": [b"42", b"87.5", b"100"],
+    "/fleet/battery_status/status": [b"87%", b"12", b"100"],
+    "/low_level_controller/battery/percentage": [b"87", b"55"],
+    "/low_level_controller/motion/command": [b"9", b"120"],
+    "/core/sensor_bumper/data": [b"false", b"true"],
+    "/fleet/connection_status/state": [b"true"],
+    "/fleet/robot_status/state": [b"READY", b"warn: low battery"],
+}
+
+
+def _messages(n: int):
+    pool = [_Msg(t, p) for t, payloads in SAMPLES.items() for p in payloads]
+    return [pool[i % len(pool)] for i in range(n)]
+
+
+def _compile(registry: BindingRegistry):
+    renderers = {k: (lambda w, v: None) for k in ("label", "progress", "textbox", "gauge", "switch", "scan")}
+    return registry.compile(lambda name: None, renderers, lambda t, v: None)
+
+
+def _sink(bindings, visual):
+    pass
+
+
+def bench(mode: str, messages) -> float:
+    routes = _compile(BindingRegistry.load())
+    svc = MqttService()
+    for topic, route in routes.items():
+        if mode == "per-binding":
+            def handler(t, raw, route=route):
+                for b in route.bindings:
+                    _sink(b, b.evaluate(route.decoder.parse(t, raw)))
+            svc.subscribe(topic, handler)
+        else:
+            def handler(t, reading, route=route):
+                for b in route.bindings:
+                    _sink(b, b.evaluate(reading))
+            svc.subscribe(topic, handler, decoder=route.decoder)
+
+    on_message = svc._on_message
+    t0 = time.perf_counter()
+    for msg in messages:
+        on_message(None, None, msg)
+    return len(messages) / (time.perf_counter() - t0)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--messages", type=int, default=200_000)
+    args = ap.parse_args()
+
+    messages = _messages(args.messages)
+    before = bench("per-binding", messages)
+    after = bench("parse-once", messages)
+    print(f"{'per-binding':>12}: {before:>10,.0f} msg/s")
+    print(f"{'parse-once':>12}: {after:>10,.0f} msg/s  ({after / before:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
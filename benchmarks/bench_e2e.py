@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+# End-to-end throughput of the dashboard pipeline against the in-process
+# LocalBroker. For a series of offered rates it publishes a weighted topic
+# mix through the broker into MqttService and measures, per step:
+#
+#   e2e       broker send -> dispatched by the model (network, queueing,
+#             decode, binding evaluation)
+#   decode    payload decoder, per topic
+#   dispatch  DashboardModel.on_reading, per topic
+#   handoff   change event posted -> applied on the UI tick
+#   render    renderer call, per binding (no-ops unless --tk)
+#   tick      UI tick duration
+#
+# A step is sustained when every message arrives within --drain seconds
+# of the end of the step, e2e p99 stays under --max-latency-ms and tick
+# p99 stays under the tick interval. Results are written as JSON; pass
+# --compare to print the difference with an earlier run.
+#
+#   python benchmarks/bench_e2e.py [--rates 1000,5000,20000] [--mix telemetry] [--tk]
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_decode import SAMPLES  # noqa: E402
+from benchmarks.local_broker import LocalBroker  # noqa: E402
+from bindings import BindingRegistry  # noqa: E402
+from mqtt_async import BLOCK  # noqa: E402
+from mqtt_service import MqttService  # noqa: E402
+from ui_scheduler import TickStats, UiUpdateScheduler  # noqa: E402
+from view_model import CHANGE, DashboardModel  # noqa: E402
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+SPEED = "/low_level_controller/speed/data/value"
+BATTERY = "/low_level_controller/battery/percentage"
+MOTION = "/low_level_controller/motion/command"
+
+MIXES = {
+    "uniform": {topic: 1.0 for topic in SAMPLES},
+    "telemetry": {
+        SPEED: 5.0, MOTION: 5.0, BATTERY: 2.0,
+        "/fleet/battery_status/status": 1.0,
+        "/core/sensor_bumper/data": 1.0,
+        "/fleet/robot_status/state": 1.0,
+        "/fleet/connection_status/state": 0.2,
+    },
+}
+
+# changing values for the numeric streams so the bindings keep producing changes
+_SWEEPS = {
+    SPEED: [str(v).encode() for v in range(0, 101)],
+    MOTION: [str(v).encode() for v in range(0, 40)],
+    BATTERY: [str(v).encode() for v in range(100, -1, -1)],
+}
+
+
+def _pct(samples: List[float], scale: float = 1.0) -> Dict[str, float]:
+    if not samples:
+        return {"n": 0}
+    s = sorted(samples)
+    n = len(s)
+    return {
+        "n": n,
+        "p50": round(s[n // 2] * scale, 3),
+        "p99": round(s[min(n - 1, int(n * 0.99))] * scale, 3),
+        "max": round(s[-1] * scale, 3),
+    }
+
+
+def _schedule(mix: Dict[str, float], n: int, seed: int = 1) -> List[tuple]:
+    rng = random.Random(seed)
+    topics = rng.choices(list(mix), weights=list(mix.values()), k=n)
+    counters: Dict[str, int] = defaultdict(int)
+    out = []
+    for topic in topics:
+        pool = _SWEEPS.get(topic) or SAMPLES[topic]
+        out.append((topic, pool[counters[topic] % len(pool)]))
+        counters[topic] += 1
+    return out
+
+
+class Probe:
+    # Timing samples collected from the MQTT thread and the UI tick.
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.sent_times: deque = deque()
+        self.received = 0
+        self.e2e: List[float] = []
+        self.decode: Dict[str, List[float]] = defaultdict(list)
+        self.dispatch: Dict[str, List[float]] = defaultdict(list)
+        self.handoff: List[float] = []
+        self.render: Dict[str, List[float]] = defaultdict(list)
+        self.ticks: List[float] = []
+
+    def on_tick(self, stats: TickStats):
+        self.ticks.append(stats.duration_ms)
+
+
+class Pipeline:
+    # MqttService -> DashboardModel -> UiUpdateScheduler, instrumented.
+
+    def __init__(self, port: int, engine: str, fps: float, views: Optional[dict], tk_root=None):
+        self.probe = Probe()
+        self.model = DashboardModel(BindingRegistry.load())
+        self.views = views
+        self.svc = MqttService(port=port, engine=engine, queue_size=1_000_000, overflow=BLOCK)
+        self._tk_root = tk_root
+        self.ui = UiUpdateScheduler(tk_root, fps=fps, on_tick=self.probe.on_tick)
+        self.model.listen(CHANGE, self._on_change)
+        for key, route in self.model.routes.items():
+            self.svc.subscribe(key, lambda t, r, k=key: self._on_reading(k, r), qos=0,
+                               decoder=self._timed_decoder(key, route.decoder))
+        self._ticking = threading.Event()
+
+    def start(self):
+        self.svc.start()
+        if self._tk_root is not None:
+            self._tk_root.after(0, self.ui.start)
+        else:
+            self._ticking.set()
+            threading.Thread(target=self._tick_loop, name="ui-tick", daemon=True).start()
+
+    def stop(self):
+        self._ticking.clear()
+        if self._tk_root is not None:
+            self._tk_root.after(0, self.ui.stop)
+        self.svc.stop()
+
+    def _tick_loop(self):
+        interval = self.ui.interval_ms / 1000.0
+        while self._ticking.is_set():
+            stats = self.ui.flush()
+            if stats.posted:
+                self.probe.on_tick(stats)
+            time.sleep(interval)
+
+    def _timed_decoder(self, key, decoder):
+        samples = self.probe.decode
+
+        def decode(topic, payload):
+            t0 = time.perf_counter()
+            reading = decoder(topic, payload)
+            samples[key].append(time.perf_counter() - t0)
+            return reading
+        return decode
+
+    def _on_reading(self, key, reading):
+        probe = self.probe
+        t0 = time.perf_counter()
+        self.model.on_reading(key, reading)
+        t1 = time.perf_counter()
+        probe.dispatch[key].append(t1 - t0)
+        if probe.sent_times:
+            probe.e2e.append(t1 - probe.sent_times.popleft())
+        probe.received += 1
+
+    def _on_change(self, name, visual, received):
+        self.ui.post((visual.topic, name), lambda v, n=name: self._render(n, v), (visual, time.perf_counter()))
+
+    def _render(self, name, value):
+        visual, posted = value
+        t0 = time.perf_counter()
+        self.probe.handoff.append(t0 - posted)
+        if self.views is not None:
+            self.views[name].apply(visual, log=False)
+        self.probe.render[name].append(time.perf_counter() - t0)
+
+
+def run_step(broker: LocalBroker, pipe: Pipeline, rate: float, duration: float, drain: float,
+             schedule: List[tuple], max_latency_ms: float) -> dict:
+    probe = pipe.probe
+    probe.reset()
+    n = int(rate * duration)
+    sent = 0
+    start = time.perf_counter()
+    while sent < n:
+        due = min(n, int(rate * (time.perf_counter() - start)) + 1)
+        if due > sent:
+            batch = [schedule[i % len(schedule)] for i in range(sent, due)]
+            now = time.perf_counter()
+            probe.sent_times.extend([now] * len(batch))
+            broker.publish_batch(batch)
+            sent = due
+        else:
+            time.sleep(0.001)
+    send_elapsed = time.perf_counter() - start
+    deadline = time.perf_counter() + drain
+    while probe.received < sent and time.perf_counter() < deadline:
+        time.sleep(0.005)
+    elapsed = time.perf_counter() - start
+    time.sleep(2 * pipe.ui.interval_ms / 1000.0)   # let the last tick render
+
+    e2e = _pct(probe.e2e, 1000.0)
+    ticks = _pct(probe.ticks)
+    sustained = (probe.received >= sent
+                 and e2e.get("p99", 0.0) <= max_latency_ms
+                 and ticks.get("p99", 0.0) < pipe.ui.interval_ms)
+    return {
+        "rate": rate,
+        "sent": sent,
+        "received": probe.received,
+        "achieved_rate": round(probe.received / elapsed, 1),
+        "send_elapsed_s": round(send_elapsed, 3),
+        "sustained": sustained,
+        "e2e_ms": e2e,
+        "handoff_ms": _pct(probe.handoff, 1000.0),
+        "tick_ms": ticks,
+        "decode_us": {k: _pct(v, 1e6) for k, v in probe.decode.items()},
+        "dispatch_us": {k: _pct(v, 1e6) for k, v in probe.dispatch.items()},
+        "render_us": {k: _pct(v, 1e6) for k, v in probe.render.items()},
+    }
+
+
+def compare(old: dict, new: dict):
+    before = {s["rate"]: s for s in old.get("steps", [])}
+    print(f"max sustained: {old.get('max_sustained_rate')} -> {new.get('max_sustained_rate')} msg/s")
+    for step in new["steps"]:
+        prev = before.get(step["rate"])
+        if prev is None:
+            continue
+        print(f"  {step['rate']:>8.0f} msg/s  e2e p99 {prev['e2e_ms'].get('p99')} -> {step['e2e_ms'].get('p99')} ms"
+              f"  handoff p99 {prev['handoff_ms'].get('p99')} -> {step['handoff_ms'].get('p99')} ms")
+
+
+def _parse_mix(spec: str) -> Dict[str, float]:
+    if spec in MIXES:
+        return MIXES[spec]
+    mix = {}
+    for part in spec.split(","):
+        topic, _, weight = part.partition("=")
+        if topic not in SAMPLES and topic not in _SWEEPS:
+            raise SystemExit(f"unknown topic in mix: {topic}")
+        mix[topic] = float(weight or 1.0)
+    return mix
+
+
+def benchmark(args, tk_root=None, views=None) -> dict:
+    mix = _parse_mix(args.mix)
+    schedule = _schedule(mix, 100_000)
+    broker = LocalBroker()
+    broker.start()
+    pipe = Pipeline(broker.port, args.engine, args.fps, views, tk_root)
+    try:
+        pipe.start()
+        deadline = time.monotonic() + 10
+        while broker.subscriber_count() == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        steps = []
+        for rate in (float(r) for r in args.rates.split(",")):
+            step = run_step(broker, pipe, rate, args.duration, args.drain, schedule, args.max_latency_ms)
+            steps.append(step)
+            print(f"{rate:>9,.0f} msg/s  recv {step['received']:>8,}/{step['sent']:<8,} "
+                  f"e2e p50 {step['e2e_ms'].get('p50', 0):7.2f} p99 {step['e2e_ms'].get('p99', 0):8.2f} ms  "
+                  f"handoff p99 {step['handoff_ms'].get('p99', 0):6.2f} ms  "
+                  f"tick p99 {step['tick_ms'].get('p99', 0):6.2f} ms  {'ok' if step['sustained'] else 'FALLS BEHIND'}")
+            if not step["sustained"] and not args.keep_going:
+                break
+    finally:
+        pipe.stop()
+        broker.stop()
+
+    sustained = [s["rate"] for s in steps if s["sustained"]]
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "engine": args.engine,
+        "mix": mix,
+        "fps": args.fps,
+        "render": "tk" if views is not None else "noop",
+        "duration_s": args.duration,
+        "max_latency_ms": args.max_latency_ms,
+        "max_sustained_rate": max(sustained) if sustained else 0,
+        "steps": steps,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rates", default="1000,2000,5000,10000,20000,50000", help="offered rates (msg/s)")
+    ap.add_argument("--duration", type=float, default=3.0, help="seconds per step")
+    ap.add_argument("--drain", type=float, default=1.0, help="seconds allowed to catch up after a step")
+    ap.add_argument("--mix", default="telemetry", help=f"{'/'.join(MIXES)} or topic=weight,...")
+    ap.add_argument("--engine", choices=("paho", "asyncio"), default="paho")
+    ap.add_argument("--fps", type=float, default=30.0)
+    ap.add_argument("--max-latency-ms", type=float, default=100.0)
+    ap.add_argument("--keep-going", action="store_true", help="run every rate even after falling behind")
+    ap.add_argument("--tk", action="store_true", help="render into the real dashboard widgets (needs a display)")
+    ap.add_argument("--out", help="result file (default: benchmarks/results/e2e-<time>.json)")
+    ap.add_argument("--compare", metavar="JSON", help="earlier result to compare against")
+    args = ap.parse_args()
+
+    if args.tk:
+        from dashboard import MobileRobotDashboard
+        app = MobileRobotDashboard(outbox_path=None, snapshot_path=None)
+        app.mqtt.stop()
+        app._ui.stop()
+        result = {}
+        errors = []
+
+        def worker():
+            try:
+                result.update(benchmark(args, tk_root=app, views=app._views))
+            except Exception as e:
+                errors.append(f"{e.__class__.__name__}: {e}")
+            finally:
+                app.after(0, app.destroy)
+
+        def start_when_built():
+            # the bound widgets (app._views) exist once the panels are built
+            if "panels" in app.startup:
+                threading.Thread(target=worker, daemon=True).start()
+            else:
+                app.after(10, start_when_built)
+
+        app.after(10, start_when_built)
+        app.mainloop()
+        if not result:
+            sys.exit(f"--tk benchmark failed: {errors[0] if errors else 'window closed before it finished'}")
+    else:
+        result = benchmark(args)
+
+    print(f"max sustained rate: {result['max_sustained_rate']:,.0f} msg/s")
+    out = args.out or os.path.join(RESULTS_DIR, f"e2e-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    print(f"results written to {out}")
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            compare(json.load(f), result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# Ingestion filters against a fleet that republishes mostly unchanged values
+# at a fixed rate (battery 87, bumper false, READY, ...), with a noisy battery
+# percentage and a moving speed. --robots robots publish every bound topic
+# at --hz through MqttService.inject into a fleet-mode DashboardModel, in real
+# time so that rate limits and heartbeats behave as live, once without and
+# once with the "filter" entries of bindings.json. Reports:
+#
+#   delivered  messages that reached the decoders and the model
+#   changes    CHANGE events of the selected robot (each one a Tk after()
+#              callback in the window)
+#   telemetry  raw telemetry lines queued to the log writer (every message:
+#              only the display path is filtered)
+#   cpu        MQTT-thread CPU time per received message
+#
+# and the pass/drop counters of every filter.
+#
+#   python benchmarks/bench_filters.py [--robots 50] [--hz 10] [--seconds 10]
+import argparse
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bindings import BindingRegistry  # noqa: E402
+from mqtt_service import MqttService  # noqa: E402
+from view_model import CHANGE, ROBOT, DashboardModel  # noqa: E402
+
+FLEET = "/robots/{robot_id}"
+
+
+def _payloads(robot: int, tick: int, hz: float, rng: random.Random):
+    t = tick / hz
+    drain = 87 - int(t / 60)
+    return {
+        "/low_level_controller/speed/data/value": str(int(50 + 40 * math.sin(t + robot))).encode(),
+        "/fleet/battery_status/status": f"{drain}%".encode(),
+        "/low_level_controller/battery/percentage": f"{drain + rng.uniform(-0.6, 0.6):.1f}".encode(),
+        "/low_level_controller/motion/command": b"30" if (tick // 50 + robot) % 4 else b"0",
+        "/core/sensor_bumper/data": b"true" if rng.random() < 0.002 else b"false",
+        "/fleet/connection_status/state": b"true",
+        "/fleet/robot_status/state": b"READY",
+    }
+
+
+class _CountingWriter:
+    def __init__(self):
+        self.lines = 0
+
+    def telemetry(self, topic: str, payload: bytes, timestamp=None):
+        self.lines += 1
+
+
+def run(registry: BindingRegistry, robots: int, hz: float, seconds: float):
+    model = DashboardModel(registry, fleet_prefix=FLEET)
+    mqtt = MqttService()
+    model.attach(mqtt)
+    model.select("r0")
+    counts = {CHANGE: 0, ROBOT: 0}
+    model.listen(CHANGE, lambda *args: counts.__setitem__(CHANGE, counts[CHANGE] + 1))
+    model.listen(ROBOT, lambda *args: counts.__setitem__(ROBOT, counts[ROBOT] + 1))
+    writer = mqtt.writer = _CountingWriter()
+
+    rng = random.Random(1)
+    topics = {r: {key: model.fleet_topics.topic(f"r{r}", key) for key in model.routes} for r in range(robots)}
+    sent = 0
+    cpu = 0.0
+    start = time.perf_counter()
+    tick = 0
+    while time.perf_counter() - start < seconds:
+        delay = start + tick / hz - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        c0 = time.thread_time()
+        for r in range(robots):
+            for key, payload in _payloads(r, tick, hz, rng).items():
+                mqtt.inject(topics[r][key], payload)
+                sent += 1
+        cpu += time.thread_time() - c0
+        tick += 1
+    return sent, counts[ROBOT], counts[CHANGE], writer.lines, cpu, mqtt.filter_stats()
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--robots", type=int, default=50)
+    ap.add_argument("--hz", type=float, default=10.0, help="republish rate of every topic")
+    ap.add_argument("--seconds", type=float, default=10.0)
+    args = ap.parse_args()
+
+    registry = BindingRegistry.load()
+    unfiltered = BindingRegistry(registry.publish,
+                                 [{k: v for k, v in e.items() if k != "filter"} for e in registry.entries],
+                                 registry.outbox)
+    baseline = None
+    for name, reg in (("unfiltered", unfiltered), ("filtered", registry)):
+        sent, delivered, changes, lines, cpu, stats = run(reg, args.robots, args.hz, args.seconds)
+        per_msg = cpu / max(sent, 1) * 1e6
+        line = (f"{name:<11} {sent:>9,} received  {delivered:>9,} delivered  {changes:>8,} changes  "
+                f"{lines:>9,} telemetry  cpu {per_msg:5.1f} us/msg")
+        if baseline is not None:
+            line += f"  ({baseline / max(cpu, 1e-9):.1f}x less CPU)"
+        baseline = cpu
+        print(line)
+        for topic, s in stats.items():
+            print(f"  {topic:<48} passed {s.passed:>7,}  dropped {s.dropped:>7,}  (dup {s.duplicates:,}, "
+                  f"deadband {s.deadband:,}, rate {s.rate_limited:,}; heartbeats {s.heartbeats:,})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+# Memory and redraw cost of the sparkline history: one hour of samples at
+# 200 Hz in a RingSeries, then the downsampling pass a Sparkline runs per
+# redraw for several window lengths.
+#
+#   python benchmarks/bench_history.py [--rate 200] [--seconds 3600] [--width 300]
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from history import RingSeries  # noqa: E402
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rate", type=float, default=200.0)
+    ap.add_argument("--seconds", type=float, default=3600.0)
+    ap.add_argument("--width", type=int, default=300)
+    ap.add_argument("--repeat", type=int, default=50)
+    args = ap.parse_args()
+
+    capacity = int(args.rate * args.seconds)
+    series = RingSeries(capacity)
+    n = capacity + capacity // 10      # overfill so the ring has wrapped
+    ts = (time.time() + np.arange(n) / args.rate).tolist()
+    vs = (50 + 40 * np.sin(np.arange(n) / (args.rate * 30)) + np.random.randn(n)).tolist()
+
+    t0 = time.perf_counter()
+    for t, v in zip(ts, vs):
+        series.append(t, v)
+    append_us = (time.perf_counter() - t0) / n * 1e6
+    print(f"{len(series):,} samples  {series.nbytes / 1e6:.1f} MB  append {append_us:.2f} us/sample")
+
+    end = ts[-1]
+    for window in (60, 600, args.seconds):
+        for method in ("minmax", "lttb"):
+            t0 = time.perf_counter()
+            for _ in range(args.repeat):
+                x, _ = series.downsample(end - window, end, args.width, method)
+            ms = (time.perf_counter() - t0) / args.repeat * 1000
+            print(f"  window {window:>6.0f} s  {method:>6}: {ms:6.2f} ms  ({len(x)} points)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# Per-frame cost of the laser scan panel for 360..1080-point scans:
+#
+#   decode    "scan" codec: packed float32 payload -> LaserScan
+#   project   ScanProjector.coords(): polar -> canvas points, decimated
+#   per-item  the naive alternative: one Python loop over the points
+#   redraw    LaserScanView.show() incl. the Tk coords() call (needs a
+#             display, skipped otherwise)
+#
+# Every frame is a new noisy scan so nothing is cached but the trig tables.
+# The budget is 10 ms per frame at 20 Hz.
+#
+#   python benchmarks/bench_laser_scan.py [--frames 400] [--size 220]
+import argparse
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from laser_scan import ScanProjector, decode_scan  # noqa: E402
+from metrics import LatencyHistogram  # noqa: E402
+
+POINTS = (360, 720, 1080)
+
+
+def _payloads(n: int, frames: int):
+    # a 6 x 4 m room seen from off-centre, with noise and a few dropouts
+    rng = np.random.default_rng(n)
+    angles = -math.pi + np.arange(n) * (2 * math.pi / n)
+    c, s = np.abs(np.cos(angles)), np.abs(np.sin(angles))
+    room = np.minimum(np.where(np.cos(angles) > 0, 4.0, 2.0) / np.maximum(c, 1e-9),
+                      np.where(np.sin(angles) > 0, 1.5, 2.5) / np.maximum(s, 1e-9))
+    out = []
+    for _ in range(frames):
+        r = (room + rng.normal(0, 0.01, n)).astype("<f4")
+        r[rng.integers(0, n, n // 50)] = np.inf
+        out.append(r.tobytes())
+    return out
+
+
+def _per_item(scan, cx, cy, px_per_m):
+    coords = []
+    a0, da = scan.angle_min, scan.angle_increment
+    for i, r in enumerate(scan.ranges.tolist()):
+        if math.isfinite(r):
+            a = a0 + i * da
+            coords.append(cx - r * px_per_m * math.sin(a))
+            coords.append(cy - r * px_per_m * math.cos(a))
+    return coords
+
+
+def _line(name, hist):
+    return (f"  {name:<9} p50 {hist.percentile(50) * 1e3:7.3f} ms  p99 {hist.percentile(99) * 1e3:7.3f} ms  "
+            f"max {hist.max * 1e3:7.3f} ms")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--frames", type=int, default=400)
+    ap.add_argument("--size", type=int, default=220, help="canvas size in pixels")
+    args = ap.parse_args()
+
+    view = None
+    try:
+        import tkinter as tk
+        from scan_view import LaserScanView
+        root = tk.Tk()
+        view = LaserScanView(root, range_m=5.0, size=args.size)
+        view.pack()
+        root.update()
+    except Exception as e:      # no display
+        print(f"redraw: skipped ({e.__class__.__name__}: {e})")
+
+    cx = cy = args.size / 2.0
+    px_per_m = (args.size / 2.0 - 2.0) / 5.0
+    for n in POINTS:
+        payloads = _payloads(n, args.frames)
+        projector = ScanProjector()
+        hists = {k: LatencyHistogram(lo=1e-7, hi=1.0) for k in ("decode", "project", "per-item", "redraw")}
+        kept = 0
+        for payload in payloads:
+            t0 = time.perf_counter()
+            scan = decode_scan(payload)
+            t1 = time.perf_counter()
+            coords = projector.coords(scan, cx, cy, px_per_m)
+            t2 = time.perf_counter()
+            _per_item(scan, cx, cy, px_per_m)
+            t3 = time.perf_counter()
+            hists["decode"].record(t1 - t0)
+            hists["project"].record(t2 - t1)
+            hists["per-item"].record(t3 - t2)
+            kept += len(coords) // 2
+            if view is not None:
+                t4 = time.perf_counter()
+                view.show(scan)
+                view.update_idletasks()
+                hists["redraw"].record(time.perf_counter() - t4)
+        print(f"{n} points ({kept / len(payloads):.0f} drawn after decimation on {args.size} px):")
+        for name, hist in hists.items():
+            if hist.count:
+                print(_line(name, hist))
+
+
+if __name__ == "__main__":
+    main()
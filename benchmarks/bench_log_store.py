@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# Filter latency of the log viewer's LogStore: fills the store with a mix of
+# PUB/SUB/SYS entries over a few dozen topics, then times the queries the
+# filter bar issues (direction, topic prefix, free text, time window), the
+# incremental refine while typing a search, and the per-tick update of a
+# live query.
+#
+#   python benchmarks/bench_log_store.py [--entries 1000000] [--topics 40]
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from log_record import ERROR, INFO, PUB, SUB, SYS, LogRecord  # noqa: E402
+from log_store import LogFilter, LogStore  # noqa: E402
+
+
+def fill(store: LogStore, n: int, topics: list, start: float):
+    rnd = random.Random(1)
+    records = []
+    for i in range(n):
+        r = rnd.random()
+        topic = rnd.choice(topics)
+        if r < 0.8:
+            records.append(LogRecord(f"(SUB) value {i % 997} in {topic}", (), INFO, topic, start + i * 1e-3, SUB))
+        elif r < 0.95:
+            records.append(LogRecord(f"(PUB) command {i} in {topic}", (), INFO, topic, start + i * 1e-3, PUB))
+        else:
+            records.append(LogRecord(f"Connection lost rc={i % 7}", (), ERROR, None, start + i * 1e-3, SYS))
+    store.extend(records)
+
+
+def timed(label: str, fn, repeat: int = 3):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    print(f"  {label:<34} {best * 1000:8.2f} ms  {len(result):>9,} matches")
+    return result
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--entries", type=int, default=1_000_000)
+    ap.add_argument("--topics", type=int, default=40)
+    args = ap.parse_args()
+
+    topics = [f"/robot{r}/{name}" for r in range(args.topics // 8 or 1)
+              for name in ("speed", "battery", "motion", "bumper", "laser", "job", "status", "odom")][:args.topics]
+    store = LogStore(args.entries)
+    start = time.time() - args.entries * 1e-3
+    t0 = time.perf_counter()
+    fill(store, args.entries, topics, start)
+    print(f"{len(store):,} entries, {len(topics)} topics  "
+          f"append {(time.perf_counter() - t0) / args.entries * 1e6:.2f} us/entry")
+
+    end = start + args.entries * 1e-3
+    timed("all", lambda: store.query())
+    timed("direction PUB", lambda: store.query(LogFilter(direction=PUB)))
+    timed("topic prefix (one topic)", lambda: store.query(LogFilter(topic_prefix=topics[0])))
+    timed("topic prefix (one robot)", lambda: store.query(LogFilter(topic_prefix="/robot0/")))
+    timed("prefix + PUB", lambda: store.query(LogFilter(direction=PUB, topic_prefix="/robot0/")))
+    timed("last 60 s", lambda: store.query(LogFilter(since=end - 60)))
+    timed("text 'lost'", lambda: store.query(LogFilter(text="lost")))
+    timed("prefix + text", lambda: store.query(LogFilter(topic_prefix=topics[0], text="value 42")))
+
+    # typing "value 42" one character at a time, each keystroke refining the last
+    q = store.query(LogFilter(text="v"))
+    t0 = time.perf_counter()
+    for i in range(2, len("value 42") + 1):
+        q = store.query(LogFilter(text="value 42"[:i]), previous=q)
+    print(f"  {'typing refine (7 keystrokes)':<34} {(time.perf_counter() - t0) * 1000:8.2f} ms  {len(q):>9,} matches")
+
+    # live view: 200 new entries per tick on top of the full store
+    q = store.query(LogFilter(direction=SUB, text="value 1"))
+    t0 = time.perf_counter()
+    ticks = 50
+    for _ in range(ticks):
+        fill(store, 200, topics, time.time())
+        q.update()
+    print(f"  {'live update (200 new / tick)':<34} {(time.perf_counter() - t0) / ticks * 1000:8.2f} ms  {len(q):>9,} matches")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# Sustained load on AsyncLogWriter: a producer thread offers telemetry
+# messages (and one log record per message, as the SUB log does) at a fixed
+# rate for a while, measuring how long the enqueue takes on the producer
+# side and what the writer thread reports every second (throughput, pending,
+# dropped). Files go to a temporary directory unless --dir is given.
+#
+#   python benchmarks/bench_log_writer.py [--rate 1000] [--seconds 10] [--gzip] [--max-mb 4]
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from log_record import INFO, SUB, LogRecord  # noqa: E402
+from log_writer import AsyncLogWriter  # noqa: E402
+from metrics import LatencyHistogram  # noqa: E402
+
+TOPICS = ["/speed", "/battery", "/motion", "/bumper", "/laser_scan", "/odom"]
+
+
+def produce(writer: AsyncLogWriter, rate: float, seconds: float, enqueue: LatencyHistogram, done: threading.Event):
+    payload = b'{"x": 1.25, "y": -3.5, "theta": 0.7853, "v": 0.42, "w": -0.01}'
+    interval = 1.0 / rate
+    start = time.perf_counter()
+    i = 0
+    while True:
+        due = start + i * interval
+        now = time.perf_counter()
+        if now - start >= seconds:
+            break
+        if due > now:
+            time.sleep(due - now)
+        topic = TOPICS[i % len(TOPICS)]
+        t0 = time.perf_counter()
+        writer.telemetry(topic, payload)
+        writer.log(LogRecord(f"(SUB) {topic} value {i} in {topic}", (), INFO, topic, direction=SUB))
+        enqueue.record(time.perf_counter() - t0)
+        i += 1
+    done.set()
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rate", type=float, default=1000.0, help="messages per second")
+    ap.add_argument("--seconds", type=float, default=10.0)
+    ap.add_argument("--gzip", action="store_true")
+    ap.add_argument("--max-mb", type=float, default=4.0, help="rotation size")
+    ap.add_argument("--dir", help="output directory (default: a temporary one)")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = args.dir or tmp
+        writer = AsyncLogWriter(directory, max_bytes=int(args.max_mb * (1 << 20)), compress=args.gzip)
+        writer.start()
+        enqueue = LatencyHistogram(lo=1e-7, hi=1.0)
+        done = threading.Event()
+        producer = threading.Thread(target=produce, args=(writer, args.rate, args.seconds, enqueue, done))
+        producer.start()
+
+        print(f"{'s':>3} {'rec/s':>9} {'KiB/s':>9} {'written':>10} {'pending':>8} {'dropped':>8}")
+        tick = 0
+        while not done.wait(1.0):
+            tick += 1
+            s = writer.stats()
+            print(f"{tick:>3} {s.rate:>9,.0f} {s.byte_rate / 1024:>9,.1f} {s.records + s.telemetry:>10,} "
+                  f"{s.pending:>8,} {s.dropped:>8,}")
+        producer.join()
+        t0 = time.perf_counter()
+        writer.close()
+        drain_ms = (time.perf_counter() - t0) * 1000
+        s = writer.stats()
+
+        files = sorted(os.listdir(directory))
+        size = sum(os.path.getsize(os.path.join(directory, f)) for f in files)
+        print(f"\nwritten {s.records:,} records + {s.telemetry:,} messages, {s.bytes / 1e6:.1f} MB "
+              f"({size / 1e6:.1f} MB on disk in {len(files)} files, {s.rotations} rotations)")
+        print(f"dropped {s.dropped:,}  errors {s.errors}  close/drain {drain_ms:.1f} ms")
+        print(f"enqueue (telemetry + log) p50 {enqueue.percentile(50) * 1e6:.1f} us  "
+              f"p99 {enqueue.percentile(99) * 1e6:.1f} us  max {enqueue.max * 1e6:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# Reconnect behaviour of MqttService against the LocalBroker, which is
+# stopped (every connection dropped) and restarted on the same port for a
+# number of cycles. Per cycle it reports the service's disconnect ->
+# resubscribed time and checks that:
+#   - the filters came back in a single SUBSCRIBE,
+#   - each filter kept the QoS it was subscribed with,
+#   - a message published after the restart reaches its handler.
+# Exits non-zero if a check fails.
+#
+#   python benchmarks/bench_reconnect.py [--cycles 5] [--outage 0.5] [--engine paho|asyncio|both]
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.local_broker import LocalBroker  # noqa: E402
+from mqtt_service import MqttService  # noqa: E402
+
+SUBSCRIPTIONS = {
+    "/low_level_controller/speed/data/value": 0,
+    "/fleet/battery_status/status": 1,
+    "/low_level_controller/bumper/state": 2,
+    "/robots/+/telemetry/#": 1,
+}
+
+
+def _wait(predicate, timeout: float = 10.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.002)
+    return False
+
+
+def run(engine: str, cycles: int, outage: float) -> bool:
+    broker = LocalBroker()
+    port = broker.start()
+    mqtt = MqttService("127.0.0.1", port, engine=engine, log_fn=lambda r: None)
+    received = threading.Event()
+    for topic, qos in SUBSCRIPTIONS.items():
+        mqtt.subscribe(topic, lambda t, v: received.set(), qos=qos)
+    mqtt.start()
+    ok = _wait(lambda: mqtt.connected and broker.subscriber_count() == 1)
+
+    times = []
+    print(f"{engine}:")
+    try:
+        for cycle in range(1, cycles + 1):
+            if not ok:
+                print("  initial connect failed")
+                break
+            reconnects = mqtt.metrics.reconnects
+            broker.stop()
+            if not _wait(lambda: not mqtt.connected):
+                print(f"  cycle {cycle}: drop not detected")
+                ok = False
+                break
+            broker.requested_qos.clear()
+            packets = broker.subscribe_packets
+            time.sleep(outage)
+            broker.start()
+            if not _wait(lambda: mqtt.metrics.reconnects > reconnects, timeout=outage + 35.0):
+                print(f"  cycle {cycle}: not resubscribed")
+                ok = False
+                break
+            received.clear()
+            broker.blast("/low_level_controller/speed/data/value", [b"42"], 1)
+            delivered = received.wait(5.0)
+            single = broker.subscribe_packets - packets == 1
+            qos_kept = broker.requested_qos == SUBSCRIPTIONS
+            t = mqtt.metrics.last_reconnect
+            times.append(t)
+            print(f"  cycle {cycle}: resubscribed {t:6.3f} s after the drop ({t - outage:6.3f} s after restart)  "
+                  f"single SUBSCRIBE {'yes' if single else 'NO'}  QoS kept {'yes' if qos_kept else 'NO'}  "
+                  f"delivery {'yes' if delivered else 'NO'}")
+            ok = ok and single and qos_kept and delivered
+    finally:
+        mqtt.stop()
+        broker.stop()
+    if times:
+        print(f"  median {statistics.median(times):.3f} s  max {max(times):.3f} s  (outage {outage:.2f} s)")
+    return ok
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--cycles", type=int, default=5)
+    ap.add_argument("--outage", type=float, default=0.5, help="seconds the broker stays down")
+    ap.add_argument("--engine", choices=("paho", "asyncio", "both"), default="both")
+    args = ap.parse_args()
+
+    engines = ("paho", "asyncio") if args.engine == "both" else (args.engine,)
+    results = [run(engine, args.cycles, args.outage) for engine in engines]
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# Records a synthetic session (default: one hour of 200 Hz traffic spread
+# over the bindings.json topics) and replays it at max speed through the
+# dashboard's headless pipeline: MqttService.inject -> parse-once decode ->
+# DashboardModel (bindings, history) -> UiUpdateScheduler (flushed every
+# --tick change events, renderers are no-ops).
+#
+#   python benchmarks/bench_replay.py [--seconds 3600] [--rate 200] [--gz] [--file PATH]
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bindings import BindingRegistry  # noqa: E402
+from mqtt_service import MqttService  # noqa: E402
+from recorder import SessionRecorder, SessionReplayer  # noqa: E402
+from render_cache import RENDER_STATE, RenderCache  # noqa: E402
+from ui_scheduler import UiUpdateScheduler  # noqa: E402
+from view_model import CHANGE, HISTORY, DashboardModel  # noqa: E402
+
+SAMPLES = {
+    "/low_level_controller/speed/data/value": [b"42", b"87.5", b"100"],
+    "/fleet/battery_status/status": [b"87%", b"12", b"100"],
+    "/low_level_controller/battery/percentage": [b"87", b"55"],
+    "/low_level_controller/motion/command": [b"9", b"120"],
+    "/core/sensor_bumper/data": [b"false", b"true"],
+    "/fleet/connection_status/state": [b"true"],
+    "/fleet/robot_status/state": [b"READY", b"warn: low battery"],
+}
+
+
+def record(path: str, seconds: float, rate: float) -> int:
+    pool = [(t, p) for t, payloads in SAMPLES.items() for p in payloads]
+    rec = SessionRecorder(path)
+    start = time.time()
+    n = int(seconds * rate)
+    for i in range(n):
+        topic, payload = pool[i % len(pool)]
+        rec.record(topic, payload, start + i / rate)
+    rec.close()
+    return n
+
+
+def pipeline(tick: int):
+    registry = BindingRegistry.load()
+    model = DashboardModel(registry)
+    ui = UiUpdateScheduler(None)
+    # no-op renderers behind the render cache, keyed by the configured widget names
+    cache = RenderCache()
+    renders = {}
+    for entry in registry.entries:
+        for spec in entry.get("bindings", []):
+            render = cache.wrap(lambda w, v: None, RENDER_STATE[spec["render"]])
+            renders[spec["name"]] = lambda v, w=spec["widget"], r=render: r(w, v)
+    count = [0]
+
+    def on_change(name, visual, received):
+        ui.post((visual.topic, name), renders[name], visual)
+        count[0] += 1
+        if count[0] % tick == 0:
+            ui.flush()
+
+    model.listen(CHANGE, on_change)
+    model.listen(HISTORY, lambda key: ui.post((key, "history"), _render, None))
+    svc = MqttService()
+    model.attach(svc)
+    return svc, ui, model, cache
+
+
+def _render(value):
+    pass
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--seconds", type=float, default=3600.0)
+    ap.add_argument("--rate", type=float, default=200.0)
+    ap.add_argument("--tick", type=int, default=1000, help="change events between simulated UI ticks")
+    ap.add_argument("--gz", action="store_true", help="gzip the capture")
+    ap.add_argument("--file", help="replay an existing capture instead of a synthetic one")
+    args = ap.parse_args()
+
+    tmp = None
+    path = args.file
+    if path is None:
+        tmp = tempfile.mkdtemp()
+        path = os.path.join(tmp, "session.mqrc" + (".gz" if args.gz else ""))
+        t0 = time.perf_counter()
+        n = record(path, args.seconds, args.rate)
+        size = os.path.getsize(path)
+        print(f"recorded {n:,} frames in {time.perf_counter() - t0:.1f} s: "
+              f"{size / 1e6:.1f} MB ({size / n:.1f} bytes/frame)")
+
+    svc, ui, model, cache = pipeline(args.tick)
+    stats = SessionReplayer(path).replay(svc.inject, speed=0)
+    ui.flush()
+    print(f"replayed {stats.messages:,} messages in {stats.elapsed:.2f} s: {stats.rate:,.0f} msg/s "
+          f"({model.changes:,} changes, {ui.total_rendered:,} renders, {ui.total_coalesced:,} coalesced, "
+          f"{cache.skipped:,} redraws skipped by the render cache)")
+
+    if tmp is not None:
+        os.remove(path)
+        os.rmdir(tmp)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# Cold-start time of the dashboard window. Each run is a fresh interpreter
+# that imports the dashboard, constructs MobileRobotDashboard against an
+# in-process LocalBroker (run by this parent process) and reports, in ms
+# from interpreter start:
+#
+#   import    dashboard module (and its dependencies) imported
+#   shell     constructor returned: column frames + log, MQTT connecting
+#   paint     first Expose event, i.e. the window is on screen
+#   panels    remaining panels built and topics subscribed
+#   restored  (--warm) last-known state restored from the snapshot
+#   message   first received message rendered into its widget
+#
+# The broker keeps publishing the speed topic until the child has rendered
+# it. With --warm the runs share a snapshot file (the first run creates it),
+# so the displays are painted from it before the first message. Needs a
+# display (Tk).
+#
+#   python benchmarks/bench_startup.py [--runs 5] [--engine paho] [--warm]
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Optional
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+TOPIC = "/low_level_controller/speed/data/value"
+MARKS = ("import", "shell", "paint", "panels", "restored", "message")
+
+
+def child(port: int, engine: str, snapshot: Optional[str]):
+    t0 = time.perf_counter()
+    from dashboard import MobileRobotDashboard
+    t_import = time.perf_counter() - t0
+
+    app = MobileRobotDashboard(mqtt_host="127.0.0.1", mqtt_port=port, mqtt_engine=engine, outbox_path=None,
+                               snapshot_path=snapshot)
+    offset = app._t0 - t0       # app.startup is relative to construction
+
+    def check():
+        if "message" in app.startup:
+            marks = {k: (v + offset) * 1000.0 for k, v in app.startup.items()}
+            marks["import"] = t_import * 1000.0
+            print(json.dumps(marks), flush=True)
+            app._on_close()
+        else:
+            app.after(5, check)
+
+    app.after(5, check)
+    app.after(30000, app._on_close)
+    app.mainloop()
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--engine", choices=("paho", "asyncio"), default="paho")
+    ap.add_argument("--warm", action="store_true", help="start from a snapshot of the previous run")
+    ap.add_argument("--child", type=int, metavar="PORT", help=argparse.SUPPRESS)
+    ap.add_argument("--snapshot", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+    if args.child:
+        child(args.child, args.engine, args.snapshot)
+        return
+
+    tmp = tempfile.TemporaryDirectory()
+    snapshot = ["--snapshot", os.path.join(tmp.name, "snapshot.bin")] if args.warm else []
+
+    from local_broker import LocalBroker
+    broker = LocalBroker()
+    port = broker.start()
+    results = []
+    try:
+        for run in range(args.runs):
+            stop = threading.Event()
+
+            def publish():
+                while not stop.wait(0.005):
+                    broker.blast(TOPIC, [b"42"], 1)
+
+            publisher = threading.Thread(target=publish, daemon=True)
+            publisher.start()
+            proc = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", str(port),
+                                   "--engine", args.engine] + snapshot, capture_output=True, text=True, timeout=60)
+            stop.set()
+            publisher.join()
+            lines = [line for line in proc.stdout.splitlines() if line.startswith("{")]
+            if proc.returncode != 0 or not lines:
+                sys.exit(f"run {run + 1} failed:\n{proc.stderr.strip()}")
+            marks = json.loads(lines[-1])
+            results.append(marks)
+            print(f"run {run + 1}: " + "  ".join(f"{k} {marks[k]:7.1f}" for k in MARKS if k in marks))
+    finally:
+        broker.stop()
+        tmp.cleanup()
+
+    print("\nmedian ms from interpreter start")
+    for k in MARKS:
+        values = [r[k] for r in results if k in r]
+        if values:
+            print(f"  {k:<8} {statistics.median(values):8.1f}")
+
+
+if __name__ == "__main__":
+    main()
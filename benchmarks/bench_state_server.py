@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# Load test of the StateServer with hundreds of local viewers. A
+# DashboardModel is fed through MqttService.inject (the dispatch path of the
+# Tk window) at --rate msg/s for --seconds, then left idle for --idle
+# seconds, while a child process (so viewers don't compete with the server
+# for the GIL) runs:
+#
+#   --ws N     WebSocket viewers on /stream
+#   --poll M   HTTP viewers long-polling /state?since=V&wait=10 on a
+#              keep-alive connection
+#
+# Reports per phase the server's bytes/s per viewer, messages/responses
+# received, 304s, receive -> viewer latency and the CPU time of the server
+# thread.
+#
+#   python benchmarks/bench_state_server.py [--ws 300] [--poll 100] [--rate 200] [--seconds 5] [--idle 5]
+import argparse
+import asyncio
+import base64
+import json
+import multiprocessing
+import os
+import struct
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bindings import BindingRegistry  # noqa: E402
+from metrics import LatencyHistogram  # noqa: E402
+from mqtt_service import MqttService  # noqa: E402
+from state_server import StateServer  # noqa: E402
+from view_model import DashboardModel  # noqa: E402
+
+TOPICS = {
+    "/low_level_controller/speed/data/value": lambda i: str(i % 101).encode(),
+    "/fleet/battery_status/status": lambda i: f"{(i // 7) % 101}%".encode(),
+    "/low_level_controller/battery/percentage": lambda i: str((i // 5) % 101).encode(),
+    "/low_level_controller/motion/command": lambda i: str(i % 40).encode(),
+    "/fleet/robot_status/state": lambda i: (b"READY", b"moving", b"warn: low battery")[(i // 50) % 3],
+}
+
+
+class Viewers:
+    def __init__(self):
+        self.latency = LatencyHistogram(lo=1e-5, hi=100.0)
+        self.messages = 0
+        self.connected = 0
+        self.errors = 0
+
+    def received(self, body: bytes):
+        self.messages += 1
+        msg = json.loads(body)
+        stamps = [e["received"] for e in msg["state"].values() if e["received"] is not None]
+        if stamps and not msg["full"]:
+            self.latency.record(max(time.time() - max(stamps), 0.0))
+
+    def snapshot(self) -> dict:
+        # counters, and the latency percentiles since the previous snapshot
+        lat = self.latency
+        snap = {"messages": self.messages, "connected": self.connected, "errors": self.errors,
+                "latency": (lat.count, lat.percentile(50), lat.percentile(99), lat.max)}
+        self.latency = LatencyHistogram(lo=1e-5, hi=100.0)
+        return snap
+
+
+async def ws_viewer(port: int, viewers: Viewers, stop: asyncio.Event):
+    try:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        key = base64.b64encode(os.urandom(16)).decode()
+        writer.write((f"GET /stream HTTP/1.1\r\nHost: 127.0.0.1:{port}\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                      f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n").encode())
+        head = await reader.readuntil(b"\r\n\r\n")
+        if b" 101 " not in head.split(b"\r\n")[0]:
+            raise ConnectionError(head.split(b"\r\n")[0])
+        viewers.connected += 1
+        while not stop.is_set():
+            b0, b1 = await reader.readexactly(2)
+            n = b1 & 0x7F
+            if n == 126:
+                n = struct.unpack("!H", await reader.readexactly(2))[0]
+            elif n == 127:
+                n = struct.unpack("!Q", await reader.readexactly(8))[0]
+            data = await reader.readexactly(n)
+            if b0 & 0x0F == 0x1:
+                viewers.received(data)
+        writer.close()
+    except (OSError, asyncio.IncompleteReadError, ConnectionError):
+        if not stop.is_set():
+            viewers.errors += 1
+
+
+async def poll_viewer(port: int, viewers: Viewers, stop: asyncio.Event):
+    try:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        viewers.connected += 1
+        since = 0
+        while not stop.is_set():
+            writer.write(f"GET /state?since={since}&wait=10 HTTP/1.1\r\nHost: 127.0.0.1:{port}\r\n\r\n".encode())
+            head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1").split("\r\n")
+            headers = {k.lower(): v.strip() for k, _, v in (line.partition(":") for line in head[1:])}
+            body = await reader.readexactly(int(headers.get("content-length", 0)))
+            since = int(headers["etag"].strip('"'))
+            if head[0].split(" ")[1] == "200":
+                viewers.received(body)
+        writer.close()
+    except (OSError, asyncio.IncompleteReadError, ConnectionError):
+        if not stop.is_set():
+            viewers.errors += 1
+
+
+def run_viewers(port: int, n_ws: int, n_poll: int, conn):
+    # child process: answers "snap" with both Viewers' snapshots until "stop"
+    ws, poll = Viewers(), Viewers()
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        stop = asyncio.Event()
+        tasks = [asyncio.ensure_future(ws_viewer(port, ws, stop)) for _ in range(n_ws)]
+        tasks += [asyncio.ensure_future(poll_viewer(port, poll, stop)) for _ in range(n_poll)]
+        while ws.connected + ws.errors < n_ws or poll.connected + poll.errors < n_poll:
+            await asyncio.sleep(0.01)
+        conn.send("ready")
+        while (await loop.run_in_executor(None, conn.recv)) == "snap":
+            conn.send((ws.snapshot(), poll.snapshot()))
+        stop.set()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    asyncio.run(main())
+
+
+def server_cpu(server: StateServer) -> float:
+    async def cpu():
+        return time.thread_time()
+    return asyncio.run_coroutine_threadsafe(cpu(), server._loop).result()
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--ws", type=int, default=300)
+    ap.add_argument("--poll", type=int, default=100)
+    ap.add_argument("--rate", type=float, default=200.0, help="messages per second into the model")
+    ap.add_argument("--seconds", type=float, default=5.0)
+    ap.add_argument("--idle", type=float, default=5.0)
+    args = ap.parse_args()
+
+    model = DashboardModel(BindingRegistry.load())
+    mqtt = MqttService()
+    model.attach(mqtt)
+    server = StateServer(model, port=0)
+    server.start()
+
+    ctx = multiprocessing.get_context("spawn")
+    conn, child_conn = ctx.Pipe()
+    clients = ctx.Process(target=run_viewers, args=(server.port, args.ws, args.poll, child_conn))
+    clients.start()
+    conn.recv()
+
+    def snap():
+        conn.send("snap")
+        return conn.recv()
+
+    ws, poll = snap()
+    print(f"{ws['connected']} WebSocket + {poll['connected']} long-poll viewers connected "
+          f"({ws['errors'] + poll['errors']} failed) to {server.url}")
+
+    def phase(name: str, seconds: float, rate: float):
+        ws0, poll0 = snap()
+        b0, r0, c0, nm0 = server.bytes_sent, server.requests, server_cpu(server), server.not_modified
+        topics = list(TOPICS.items())
+        start = time.perf_counter()
+        i = 0
+        while time.perf_counter() - start < seconds:
+            if rate > 0:
+                due = start + i / rate
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                topic, payload = topics[i % len(topics)]
+                mqtt.inject(topic, payload(i))
+                i += 1
+            else:
+                time.sleep(0.05)
+        elapsed = time.perf_counter() - start
+        cpu = server_cpu(server) - c0
+        ws1, poll1 = snap()
+        viewers = max(ws1["connected"] + poll1["connected"], 1)
+        print(f"\n{name}: {i / elapsed:,.0f} msg/s for {elapsed:.1f} s, model version {server.version:,}")
+        print(f"  server   {(server.bytes_sent - b0) / elapsed / viewers:>10,.1f} B/s per viewer  "
+              f"{(server.requests - r0) / elapsed:>8,.1f} HTTP req/s  {server.not_modified - nm0:,} x 304  "
+              f"CPU {cpu / elapsed * 100:.1f}%")
+        for kind, before, after, unit in (("ws", ws0, ws1, "msg/s"), ("poll", poll0, poll1, "responses/s")):
+            rate_per = (after["messages"] - before["messages"]) / elapsed / max(after["connected"], 1)
+            line = f"  {kind:<8} {rate_per:>10,.1f} {unit} per viewer"
+            count, p50, p99, worst = after["latency"]
+            if count:
+                line += f"  receive -> viewer p50 {p50 * 1e3:.1f} ms  p99 {p99 * 1e3:.1f} ms  max {worst * 1e3:.1f} ms"
+            print(line)
+
+    phase("active", args.seconds, args.rate)
+    time.sleep(0.5)     # let the last change drain before measuring idle
+    phase("idle", args.idle, 0.0)
+
+    conn.send("stop")
+    clients.join()
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# Dispatch cost of TopicTrie.match() as the number of subscribed filters grows.
+#
+#   python benchmarks/bench_topic_trie.py [--iterations 200000]
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from topic_trie import TopicTrie  # noqa: E402
+
+
+def _noop(topic, payload):
+    pass
+
+
+def build(n_filters: int) -> TopicTrie:
+    trie = TopicTrie()
+    # a realistic mix: mostly exact per-robot topics plus a few wildcards
+    for i in range(n_filters):
+        kind = i % 10
+        if kind == 0:
+            trie.add(f"/fleet/robot{i}/+", _noop)
+        elif kind == 1:
+            trie.add(f"/low_level_controller/robot{i}/#", _noop)
+        else:
+            trie.add(f"/fleet/robot{i}/battery_status/status", _noop)
+    trie.add("/fleet/+/state", _noop)
+    trie.add("/low_level_controller/#", _noop)
+    return trie
+
+
+def bench(n_filters: int, iterations: int) -> float:
+    trie = build(n_filters)
+    topics = [
+        "/fleet/robot3/battery_status/status",
+        "/fleet/robot7/state",
+        "/low_level_controller/speed/data/value",
+        "/core/sensor_bumper/data",
+    ]
+    match = trie.match
+    t0 = time.perf_counter()
+    for i in range(iterations):
+        match(topics[i & 3])
+    return (time.perf_counter() - t0) / iterations * 1e9
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--iterations", type=int, default=200_000)
+    args = ap.parse_args()
+
+    print(f"{'filters':>8}  {'ns/match':>10}")
+    for n in (10, 100, 1_000, 10_000):
+        print(f"{n:>8}  {bench(n, args.iterations):>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
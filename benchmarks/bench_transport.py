@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# Receive throughput of MqttService with the paho engine vs the asyncio engine
+# (callback and pull delivery) against the in-process LocalBroker.
+#
+#   python benchmarks/bench_transport.py [--messages 100000]
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.local_broker import LocalBroker  # noqa: E402
+from mqtt_async import BLOCK  # noqa: E402
+from mqtt_service import MqttService  # noqa: E402
+from payloads import PayloadDecoder  # noqa: E402
+
+TOPIC = "/low_level_controller/speed/data/value"
+PAYLOADS = [str(v).encode() for v in range(0, 101, 7)]
+
+
+def _wait(predicate, timeout: float = 10.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.005)
+    return False
+
+
+def run(broker: LocalBroker, engine: str, pull: bool, n: int) -> dict:
+    received = [0]
+    done = threading.Event()
+
+    def handler(topic, reading):
+        received[0] += 1
+        if received[0] >= n:
+            done.set()
+
+    svc = MqttService(port=broker.port, engine=engine, pull=pull, queue_size=n, overflow=BLOCK)
+    svc.subscribe(TOPIC, handler, qos=0, decoder=PayloadDecoder("int", [0, 100]))
+    svc.start()
+    if not _wait(lambda: broker.subscriber_count() > 0):
+        svc.stop()
+        raise RuntimeError(f"{engine}: no subscription reached the broker")
+
+    t0 = time.perf_counter()
+    if pull:
+        sender = threading.Thread(target=broker.blast, args=(TOPIC, PAYLOADS, n))
+        sender.start()
+        while received[0] < n and time.perf_counter() - t0 < 60:
+            if not svc.poll():
+                time.sleep(0.001)
+        sender.join()
+    else:
+        broker.blast(TOPIC, PAYLOADS, n)
+        done.wait(60)
+    elapsed = time.perf_counter() - t0
+
+    result = {"received": received[0], "msg_per_s": received[0] / elapsed}
+    client = svc._client
+    if engine == "asyncio":
+        result["avg_batch"] = client.received / max(1, client.batches)
+    svc.stop()
+    _wait(lambda: broker.subscriber_count() == 0, 2)
+    return result
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--messages", type=int, default=100_000)
+    args = ap.parse_args()
+
+    broker = LocalBroker()
+    broker.start()
+    try:
+        for label, engine, pull in (("paho", "paho", False),
+                                    ("asyncio", "asyncio", False),
+                                    ("asyncio-pull", "asyncio", True)):
+            r = run(broker, engine, pull, args.messages)
+            extra = f"  avg batch {r['avg_batch']:.0f}" if "avg_batch" in r else ""
+            print(f"{label:>13}: {r['msg_per_s']:>10,.0f} msg/s  ({r['received']} received){extra}")
+    finally:
+        broker.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# In-process MQTT 3.1.1 broker stand-in for benchmarks.
+#
+# Supports CONNECT, SUBSCRIBE/UNSUBSCRIBE (with '+'/'#' filters), PUBLISH
+# fan-out (delivered at QoS 0), PINGREQ and DISCONNECT; enough for paho and
+# AsyncioClient. It runs its own asyncio loop on a background thread and can
+# be stopped and restarted on the same port to exercise reconnects.
+#
+#   python benchmarks/local_broker.py [--port 1883]
+import argparse
+import asyncio
+import os
+import struct
+import sys
+import threading
+from typing import Dict, List, Optional, Set, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mqtt_async import (  # noqa: E402
+    CONNACK, CONNECT, DISCONNECT, PINGREQ, PINGRESP, PUBACK, PUBLISH, SUBACK, SUBSCRIBE,
+    UNSUBACK, UNSUBSCRIBE, decode_publish, encode_packet, encode_publish, split_packets,
+)
+from topic_trie import TopicTrie  # noqa: E402
+
+
+class _Session:
+    def __init__(self, writer: asyncio.StreamWriter):
+        self.writer = writer
+        self.filters: Set[str] = set()
+
+
+class LocalBroker:
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.host = host
+        self.port = port
+        self._routes = TopicTrie()
+        self._sessions: Set[_Session] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+        # counters
+        self.published = 0
+        self.delivered = 0
+        self.subscribe_packets = 0
+        self.requested_qos: Dict[str, int] = {}     # filter -> QoS of its last SUBSCRIBE
+
+    # --- API --------------------------------------------------------------
+    def start(self) -> int:
+        ready = threading.Event()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            self._server = self._loop.run_until_complete(
+                asyncio.start_server(self._handle, self.host, self.port, reuse_address=True))
+            self.port = self._server.sockets[0].getsockname()[1]
+            ready.set()
+            self._loop.run_forever()
+            self._loop.close()
+
+        self._thread = threading.Thread(target=run, name="local-broker", daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self.port
+
+    def stop(self):
+        # Closes the listener and drops every client connection.
+        if self._loop is None:
+            return
+
+        async def shutdown():
+            self._server.close()
+            for session in list(self._sessions):
+                session.writer.close()
+            self._sessions.clear()
+            self._routes = TopicTrie()
+            await self._server.wait_closed()
+
+        asyncio.run_coroutine_threadsafe(shutdown(), self._loop).result(timeout=5)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+        self._loop = None
+
+    def subscriber_count(self) -> int:
+        return sum(1 for s in list(self._sessions) if s.filters)
+
+    def blast(self, topic: str, payloads: List[bytes], count: int) -> int:
+        # Writes `count` PUBLISH packets straight to every matching subscriber,
+        # bypassing any publisher client, and waits until they are flushed.
+        packets = [encode_publish(topic, p) for p in payloads]
+
+        async def run():
+            sessions = self._routes.match(topic)
+            for session in sessions:
+                w = session.writer
+                for i in range(count):
+                    w.write(packets[i % len(packets)])
+                    if i % 1024 == 1023:
+                        await w.drain()
+                await w.drain()
+            self.delivered += count * len(sessions)
+            return len(sessions)
+
+        return asyncio.run_coroutine_threadsafe(run(), self._loop).result()
+
+    def publish_batch(self, items: List[Tuple[str, bytes]]):
+        # Fans a batch of (topic, payload) out to the subscribers as if a
+        # client had published it; callable from any thread, returns once
+        # the data is written.
+        async def run():
+            for topic, payload in items:
+                self._fan_out(topic, payload, False)
+            for session in list(self._sessions):
+                await session.writer.drain()
+
+        asyncio.run_coroutine_threadsafe(run(), self._loop).result()
+
+    # --- Protocol ---------------------------------------------------------
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        session = _Session(writer)
+        self._sessions.add(session)
+        buf = bytearray()
+        try:
+            while True:
+                data = await reader.read(65536)
+                if not data:
+                    break
+                buf += data
+                for header, body in split_packets(buf):
+                    kind = header & 0xF0
+                    if kind == CONNECT:
+                        writer.write(encode_packet(CONNACK, b"\x00\x00"))
+                    elif kind == SUBSCRIBE:
+                        mid = body[:2]
+                        granted = bytearray()
+                        pos = 2
+                        while pos < len(body):
+                            (n,) = struct.unpack_from("!H", body, pos)
+                            topic_filter = body[pos + 2:pos + 2 + n].decode("utf-8")
+                            pos += 3 + n
+                            self._routes.add(topic_filter, session)
+                            session.filters.add(topic_filter)
+                            self.requested_qos[topic_filter] = body[pos - 1]
+                            granted.append(0)
+                        self.subscribe_packets += 1
+                        writer.write(encode_packet(SUBACK, mid + bytes(granted)))
+                    elif kind == UNSUBSCRIBE:
+                        pos = 2
+                        while pos < len(body):
+                            (n,) = struct.unpack_from("!H", body, pos)
+                            topic_filter = body[pos + 2:pos + 2 + n].decode("utf-8")
+                            pos += 2 + n
+                            self._routes.remove(topic_filter, session)
+                            session.filters.discard(topic_filter)
+                        writer.write(encode_packet(UNSUBACK, body[:2]))
+                    elif kind == PUBLISH:
+                        msg = decode_publish(header, body)
+                        if msg.qos:
+                            writer.write(encode_packet(PUBACK, struct.pack("!H", msg.mid)))
+                        self._fan_out(msg.topic, msg.payload, msg.retain)
+                    elif kind == PINGREQ:
+                        writer.write(encode_packet(PINGRESP))
+                    elif kind == DISCONNECT:
+                        return
+        except (OSError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            for topic_filter in session.filters:
+                self._routes.remove(topic_filter, session)
+            self._sessions.discard(session)
+            writer.close()
+
+    def _fan_out(self, topic: str, payload: bytes, retain: bool):
+        self.published += 1
+        packet = encode_publish(topic, payload, 0, retain)
+        for session in self._routes.match(topic):
+            session.writer.write(packet)
+            self.delivered += 1
+
+
+def main():
+    ap = argparse.ArgumentParser(description="In-process MQTT broker stand-in")
+    ap.add_argument("--port", type=int, default=1883)
+    args = ap.parse_args()
+    broker = LocalBroker(port=args.port)
+    print(f"local broker listening on 127.0.0.1:{broker.start()}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        broker.stop()
+
+
+if __name__ == "__main__":
+    main()
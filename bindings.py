@@ -0,0 +1,183 @@
+import json
+import os
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from filters import IngestFilter
+from payloads import PayloadDecoder, Reading, value_decoder
+
+DEFAULT_CONFIG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bindings.json")
+
+
+# --- Rules --------------------------------------------------------------------
+class Visual(NamedTuple):
+    topic: str
+    raw: str
+    value: Any
+    text: Optional[str]
+    color: Optional[str]
+    font: Optional[str]
+    stale: bool = False     # restored from the last-known-state snapshot, not live
+
+
+class _Rule(NamedTuple):
+    test: Callable[[Any], bool]
+    text: Optional[str]
+    color: Optional[str]
+    font: Optional[str]
+
+
+def _compile_test(spec: Dict[str, Any]) -> Callable[[Any], bool]:
+    tests: List[Callable[[Any], bool]] = []
+    if "is" in spec:
+        expected = spec["is"]
+        tests.append(lambda v, e=expected: v is e if e is None else (v is not None and bool(v) == e))
+    for key, op in (("lt", float.__lt__), ("le", float.__le__), ("gt", float.__gt__), ("ge", float.__ge__)):
+        if key in spec:
+            limit = float(spec[key])
+            tests.append(lambda v, op=op, limit=limit: isinstance(v, (int, float)) and op(float(v), limit))
+    if "eq" in spec:
+        expected = spec["eq"]
+        tests.append(lambda v, e=expected: v == e)
+    if "contains" in spec:
+        needles = spec["contains"]
+        needles = tuple(n.lower() for n in ([needles] if isinstance(needles, str) else needles))
+        tests.append(lambda v, n=needles: v is not None and any(k in str(v).lower() for k in n))
+
+    if not tests:
+        return lambda v: True
+    if len(tests) == 1:
+        return tests[0]
+    return lambda v, t=tuple(tests): all(f(v) for f in t)
+
+
+def _compile_rules(specs: List[Dict[str, Any]]) -> Tuple[_Rule, ...]:
+    return tuple(_Rule(_compile_test(s), s.get("text"), s.get("color"), s.get("font")) for s in specs)
+
+
+# --- Bindings -----------------------------------------------------------------
+class Binding:
+    # One compiled reading -> widget binding. evaluate() is safe to run on any
+    # thread; apply() touches the widget and must run on the Tk thread.
+    __slots__ = ("name", "topic", "widget", "_rules", "_render", "_log", "_log_fn")
+
+    def __init__(self, name, topic, widget, rules, render, log, log_fn):
+        self.name = name
+        self.topic = topic
+        self.widget = widget
+        self._rules = rules
+        self._render = render
+        self._log = log
+        self._log_fn = log_fn
+
+    def evaluate(self, reading: Reading) -> Visual:
+        value = reading.value
+        for rule in self._rules:
+            if rule.test(value):
+                text = rule.text.format(value=value, raw=reading.raw) if rule.text is not None else None
+                return Visual(reading.topic, reading.raw, value, text, rule.color, rule.font)
+        return Visual(reading.topic, reading.raw, value, None, None, None)
+
+    def apply(self, visual: Visual, log: bool = True):
+        self._render(self.widget, visual)
+        if log and self._log is not None:
+            self._log_fn(self._log, visual)
+
+
+class TopicRoute(NamedTuple):
+    # decoder runs once per message; every binding consumes the same Reading
+    decoder: PayloadDecoder
+    bindings: Tuple[Binding, ...]
+
+
+class BindingRegistry:
+    # Topic-to-widget bindings loaded from a JSON config file:
+    #
+    #   {"publish":   {"<field>": "<topic>", ...},
+    #    "outbox":    {"<field>": "latest" | "all", ...},
+    #    "subscribe": [{"topic", "codec", "clamp", "history", "filter",
+    #                   "bindings": [{"name", "rules", "widget", "render", "log"}, ...]}, ...]}
+    #
+    # The codec and clamp belong to the topic so each payload is parsed once;
+    # binary codecs (see payloads) leave "raw" empty, so their log templates
+    # should use {value}.
+    # compile() resolves decoders, rules, widgets and renderers up front.
+    # "history" names a sparkline widget that charts the topic's numeric values.
+    # "filter" drops republished copies before they reach the bindings, e.g.
+    # {"dedup": true, "deadband": 1, "max_rate": 5, "heartbeat": 10} (see
+    # filters.IngestFilter); the deadband compares the codec's values.
+
+    def __init__(self,
+                 publish: Dict[str, str],
+                 subscribe: List[Dict[str, Any]],
+                 outbox: Optional[Dict[str, str]] = None):
+        self.publish = dict(publish)
+        # offline collapse policy per publish field (see outbox.DiskOutbox)
+        self.outbox = dict(outbox or {})
+        self.entries = list(subscribe)
+        for entry in self.entries:
+            try:
+                PayloadDecoder(entry.get("codec", "text"))
+                if entry.get("filter"):
+                    IngestFilter.from_spec(entry["filter"])
+            except ValueError as e:
+                raise ValueError(f"topic '{entry.get('topic')}': {e}")
+
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> "BindingRegistry":
+        with open(path or DEFAULT_CONFIG, "r", encoding="utf-8") as f:
+            cfg = json.load(f)
+        return cls(cfg.get("publish", {}), cfg.get("subscribe", []), cfg.get("outbox"))
+
+    @property
+    def topics(self) -> List[str]:
+        return [entry["topic"] for entry in self.entries]
+
+    @property
+    def history(self) -> Dict[str, str]:
+        # topic -> sparkline widget name
+        return {entry["topic"]: entry["history"] for entry in self.entries if entry.get("history")}
+
+    def ingest_filters(self) -> Dict[str, IngestFilter]:
+        # topic -> a new IngestFilter for every topic with a "filter"
+        return {entry["topic"]: IngestFilter.from_spec(entry["filter"], value_decoder(entry.get("codec", "text")))
+                for entry in self.entries if entry.get("filter")}
+
+    def topic_of(self, name: str) -> Optional[str]:
+        for entry in self.entries:
+            for binding in entry.get("bindings", []):
+                if binding["name"] == name:
+                    return entry["topic"]
+        return None
+
+    def decoder(self, topic: str) -> PayloadDecoder:
+        for entry in self.entries:
+            if entry["topic"] == topic:
+                return PayloadDecoder(entry.get("codec", "text"), entry.get("clamp"))
+        raise KeyError(topic)
+
+    def compile(self,
+                resolve_widget: Optional[Callable[[str], Any]] = None,
+                renderers: Optional[Dict[str, Callable[[Any, Visual], None]]] = None,
+                log_fn: Optional[Callable[[str, Visual], None]] = None) -> Dict[str, TopicRoute]:
+        # Without renderers the bindings are headless: evaluate() only.
+        table: Dict[str, TopicRoute] = {}
+        for entry in self.entries:
+            topic = entry["topic"]
+            bindings = []
+            for spec in entry.get("bindings", []):
+                render = None
+                if renderers is not None:
+                    render = renderers.get(spec["render"])
+                    if render is None:
+                        raise ValueError(f"binding '{spec['name']}': unknown renderer '{spec['render']}'")
+                bindings.append(Binding(
+                    spec["name"],
+                    topic,
+                    resolve_widget(spec["widget"]) if resolve_widget is not None else None,
+                    _compile_rules(spec.get("rules", [])),
+                    render,
+                    spec.get("log"),
+                    log_fn,
+                ))
+            table[topic] = TopicRoute(PayloadDecoder(entry.get("codec", "text"), entry.get("clamp")), tuple(bindings))
+        return table
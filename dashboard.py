@@ -1,16 +1,107 @@
 import customtkinter as ctk
+import json
+import os
+import threading
+import time
 import tkinter as tk
+from typing import Callable, Dict, Optional, Tuple
 from mqtt_service import MqttService
+from ui_scheduler import UiUpdateScheduler
+from log_view import LogView
+from log_record import ERROR, INFO, PUB, SUB, SYS, WARN, LogRecord
+from log_writer import DEFAULT_DIR as DEFAULT_LOG_DIR, AsyncLogWriter
+from fleet import RobotState
+from fleet_view import FleetOverview
+from bindings import BindingRegistry, Visual
+from throttle import ThrottledPublisher
+from outbox import DEFAULT_PATH as DEFAULT_OUTBOX, DiskOutbox
+from scan_view import LaserScanView
+from snapshot import DEFAULT_PATH as DEFAULT_SNAPSHOT, SnapshotCache
+from state_server import StateServer
+from sparkline import Sparkline
+from recorder import SessionRecorder, SessionReplayer
+from view_model import CHANGE, HISTORY, ROBOT, DashboardModel
+from render_cache import RENDER_STATE, RenderCache
+
+STATS_DIR = os.path.join(os.path.expanduser("~"), ".mqtt_dashboard")
 
 ctk.set_appearance_mode("System")  
 ctk.set_default_color_theme("blue")
 
 class MobileRobotDashboard(ctk.CTk):
-    def __init__(self):
+    STATS_REFRESH_MS = 1000
+    STALE_COLOR = "#777777"     # text of values restored from the snapshot
+
+    def __init__(self,
+                 ui_fps: float = 30.0,
+                 log_capacity: int = 100_000,
+                 log_flush_ms: int = 200,
+                 fleet_prefix: Optional[str] = None,
+                 bindings_path: Optional[str] = None,
+                 mqtt_engine: str = "paho",
+                 stream_rate: float = 10.0,
+                 outbox_path: Optional[str] = None,
+                 outbox_max_age_s: Optional[float] = 60.0,
+                 history_capacity: int = 200 * 3600,
+                 sparkline_window_s: float = 3600.0,
+                 record_path: Optional[str] = None,
+                 replay_path: Optional[str] = None,
+                 replay_speed: float = 1.0,
+                 log_dir: Optional[str] = None,
+                 log_max_bytes: int = 16 << 20,
+                 log_max_age_s: float = 3600.0,
+                 log_compress: bool = False,
+                 log_telemetry: bool = False,
+                 mqtt_host: str = "localhost",
+                 mqtt_port: int = 1883,
+                 scan_range: Optional[float] = None,
+                 snapshot_path: Optional[str] = DEFAULT_SNAPSHOT,
+                 snapshot_interval_s: float = 2.0,
+                 state_port: Optional[int] = None):
+        # startup marks (seconds since construction began), see _mark()
+        self._t0 = time.perf_counter()
+        self.startup: Dict[str, float] = {}
         super().__init__()
+        self._mqtt_host = mqtt_host
+        self._mqtt_port = mqtt_port
+        self._mqtt_engine = mqtt_engine
+        # offline publish queue (opt-in); commands older than the max age are not replayed
+        self._outbox_path = outbox_path
+        self._outbox_max_age_s = outbox_max_age_s
+        # session capture / replay (replay feeds the dispatch path without a broker)
+        self._record_path = record_path
+        self._replay_path = replay_path
+        self._replay_speed = replay_speed
+        self._replayer: Optional[SessionReplayer] = None
+        # last-known state per topic, painted (stale) at startup
+        self._snapshot_path = snapshot_path
+        self._snapshot_interval_s = snapshot_interval_s
+        self._snapshot: Optional[SnapshotCache] = None
+        # read-only HTTP/WebSocket view of the state for extra local viewers
+        self._state_port = state_port
+        self._state_server: Optional[StateServer] = None
+        self._stream_rate = stream_rate
+        self._sparkline_window_s = sparkline_window_s     # time span of the sparklines (the history holds an hour)
+        self._scan_range = scan_range       # laser plot radius (m), None = the scan's range_max
+        self._log_capacity = log_capacity
+        self._log_flush_ms = log_flush_ms
+        # log records (and raw telemetry with log_telemetry) are persisted to
+        # rotating files under log_dir by a background writer
+        self._log_writer: Optional[AsyncLogWriter] = None
+        self._log_writer_args = (log_dir, log_max_bytes, log_max_age_s, log_compress)
+        self._log_telemetry = log_telemetry
+
+        # widget-free state (bindings.json by default); this window only renders it
+        self._model = DashboardModel(BindingRegistry.load(bindings_path), fleet_prefix, history_capacity)
+        self._fonts: Dict[Tuple, ctk.CTkFont] = {}
+        # tab name -> builder, run the first time the tab is shown
+        self._lazy_tabs: Dict[str, Callable[[ctk.CTkFrame], None]] = {}
+        self.fleet_overview: Optional[FleetOverview] = None
 
         self.title("Mobile Robot Dashboard")
         self.geometry("1320x550")
+        # closing the window flushes and closes every subsystem
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
 
         self.grid_rowconfigure(0, weight=1)
         for c in range(4):
@@ -27,29 +118,70 @@ class MobileRobotDashboard(ctk.CTk):
             f.grid_rowconfigure(1, weight=1)
             self.col_frames.append(f)
 
-        # columns
+        # shell: the column frames and the log, so the window paints at once
         self._log_window(self.col_frames[0])
+        self._log_view.start()
+        if log_dir:
+            self._start_log_writer()
+
+        # UI update scheduler (one coalescing tick instead of one after() per message)
+        self._ui = UiUpdateScheduler(self, fps=ui_fps, on_error=self._on_ui_update_error)
+        self._ui.start()
+        # renderers only touch Tk when the drawn state differs from the last one
+        self._render_cache = RenderCache()
+
+        # the broker connection is made in the background while the panels
+        # are built; subscriptions are added once the bound widgets exist
+        self._connect_mqtt()
+        self._mark("shell")
+        self._paint_bind = self.bind("<Expose>", self._on_first_paint, add="+")
+        self.after_idle(self._build_panels)
+
+    def _build_panels(self):
+        # runs after the shell was painted
         self._fleet_manager(self.col_frames[1])
         self._robot_core(self.col_frames[2])
         self._low_level_microcontroller(self.col_frames[3])
-
-        # MQTT service init
         self._init_mqtt()
+        self._mark("panels")
+        self.after(self.STATS_REFRESH_MS, self._refresh_stats)
+
+    def _on_first_paint(self, _):
+        self._mark("paint")
+        self.unbind("<Expose>", self._paint_bind)
+
+    def _mark(self, name: str):
+        self.startup.setdefault(name, time.perf_counter() - self._t0)
+
+    def _font(self, size: int, weight: str = "bold", family: Optional[str] = None) -> ctk.CTkFont:
+        # one shared font object per style instead of one per widget
+        key = (size, weight, family)
+        font = self._fonts.get(key)
+        if font is None:
+            font = self._fonts[key] = ctk.CTkFont(family=family, size=size, weight=weight)
+        return font
+
+    def _on_tab_changed(self):
+        name = self.tabview.get()
+        build = self._lazy_tabs.pop(name, None)
+        if build is not None:
+            build(self.tabview.tab(name))
 
 
     # --- Devices --------------------------------------------------------------
     def _log_window(self, parent: ctk.CTkFrame):
-        title = ctk.CTkLabel(parent, text="Log", font=ctk.CTkFont(size=18, weight="bold"))
+        title = ctk.CTkLabel(parent, text="Log", font=self._font(18))
         title.grid(row=0, column=0, sticky="ew", padx=12, pady=(12, 8))
-        self.text_log = ctk.CTkTextbox(parent)
-        self.text_log.grid(row=1, column=0, sticky="nsew", padx=12, pady=(0, 12))
+        # indexed store + virtualized rows: filtering stays interactive on large logs
+        self._log_view = LogView(parent, capacity=self._log_capacity, flush_ms=self._log_flush_ms)
+        self._log_view.grid(row=1, column=0, sticky="nsew", padx=12, pady=(0, 12))
         clear_btn = ctk.CTkFrame(parent, fg_color="transparent")
         clear_btn.grid(row=2, column=0, sticky="ew", padx=12, pady=(0, 12))
         clear_btn.grid_columnconfigure(0, weight=1)
         ctk.CTkButton(clear_btn, text="Clear", command=self._clear_log).grid(row=0, column=0, padx=4, pady=4, sticky="ew")
 
     def _fleet_manager(self, parent: ctk.CTkFrame):
-        title = ctk.CTkLabel(parent, text="Fleet Manager", font=ctk.CTkFont(size=18, weight="bold"))
+        title = ctk.CTkLabel(parent, text="Fleet Manager", font=self._font(18))
         title.grid(row=0, column=0, sticky="ew", padx=12, pady=(12, 8))
 
         # row/column configuration
@@ -58,7 +190,7 @@ class MobileRobotDashboard(ctk.CTk):
         parent.grid_rowconfigure(3, weight=0)       # bumper frame
         parent.grid_columnconfigure(0, weight=1)
     
-        self.tabview = ctk.CTkTabview(parent)
+        self.tabview = ctk.CTkTabview(parent, command=self._on_tab_changed)
         self.tabview.grid(row=1, column=0, sticky="nsew", padx=8, pady=(0, 12))
         self.tabview.add("Config")
         cfg_tab = self.tabview.tab("Config")
@@ -69,17 +201,17 @@ class MobileRobotDashboard(ctk.CTk):
         switch_panel.grid(row=1, column=0, sticky="ew", padx=8, pady=(12, 12))
         switch_panel.grid_columnconfigure(0, weight=1)
         switch_panel.grid_columnconfigure(1, weight=0)
-        ctk.CTkLabel(switch_panel, text="Connection", font=ctk.CTkFont(size=14, weight="bold")).grid(row=0, column=0, columnspan=2, padx=4, pady=(8,4), sticky="w")
+        ctk.CTkLabel(switch_panel, text="Connection", font=self._font(14)).grid(row=0, column=0, columnspan=2, padx=4, pady=(8,4), sticky="w")
         self.connection_switch = ctk.CTkSwitch(switch_panel, text="Robot Connected", command=self._on_connection_switch_toggled)
         self.connection_switch.grid(row=1, column=0, padx=4, pady=(0,6), sticky="w")
-        self.connection_led = ctk.CTkLabel(switch_panel, text="●", font=ctk.CTkFont(size=30, weight="bold"), text_color="#ff4444")
+        self.connection_led = ctk.CTkLabel(switch_panel, text="●", font=self._font(30), text_color="#ff4444")
         self.connection_led.grid(row=1, column=1, padx=(0,8), pady=(0,6), sticky="e")
 
         # job panel
         job_panel = ctk.CTkFrame(cfg_tab)
         job_panel.grid(row=2, column=0, sticky="ew", padx=8, pady=(0, 12))
         job_panel.grid_columnconfigure(0, weight=1)
-        ctk.CTkLabel(job_panel, text="Job", font=ctk.CTkFont(size=14, weight="bold")).grid(row=0, column=0, padx=4, pady=(8,4), sticky="w")
+        ctk.CTkLabel(job_panel, text="Job", font=self._font(14)).grid(row=0, column=0, padx=4, pady=(8,4), sticky="w")
         self.job_var = tk.StringVar(value="Idle")
         self.job_menu = ctk.CTkOptionMenu(job_panel, variable=self.job_var, values=["Idle", "Moving", "Delivery", "Task failed"], command=self._on_job_selected)
         self.job_menu.grid(row=1, column=0, padx=4, pady=(0,6), sticky="ew")
@@ -88,7 +220,7 @@ class MobileRobotDashboard(ctk.CTk):
         self.robot_status_display = ctk.CTkLabel(
             job_panel,
             text="--",
-            font=ctk.CTkFont(size=50, weight="bold"),
+            font=self._font(50),
             text_color="#cccccc",
             fg_color="#303030",
             corner_radius=8,
@@ -101,11 +233,11 @@ class MobileRobotDashboard(ctk.CTk):
         battery_panel = ctk.CTkFrame(cfg_tab)
         battery_panel.grid(row=3, column=0, sticky="ew", padx=8, pady=(0, 12))
         battery_panel.grid_columnconfigure(0, weight=1)
-        ctk.CTkLabel(battery_panel, text="Battery", font=ctk.CTkFont(size=14, weight="bold")).grid(row=0, column=0, padx=4, pady=(8,4), sticky="w")
+        ctk.CTkLabel(battery_panel, text="Battery", font=self._font(14)).grid(row=0, column=0, padx=4, pady=(8,4), sticky="w")
         self.battery_display = ctk.CTkLabel(
             battery_panel,
             text="--",
-            font=ctk.CTkFont(size=50, weight="bold"),
+            font=self._font(50),
             fg_color="#202020",
             corner_radius=8,
             height=110,
@@ -115,8 +247,38 @@ class MobileRobotDashboard(ctk.CTk):
         )
         self.battery_display.grid(row=1, column=0, padx=4, pady=(0, 12), sticky="ew")
 
+        # live instrumentation and (fleet mode) the robot list, built on first view
+        self.tabview.add("Stats")
+        self._lazy_tabs["Stats"] = self._stats_tab
+        if self._model.fleet_store is not None:
+            self.tabview.add("Fleet")
+            self._lazy_tabs["Fleet"] = self._fleet_tab
+
+    def _stats_tab(self, stats_tab: ctk.CTkFrame):
+        stats_tab.grid_columnconfigure(0, weight=1)
+        stats_tab.grid_rowconfigure(0, weight=1)
+        self.stats_box = ctk.CTkTextbox(stats_tab, wrap="none", font=self._font(11, "normal", "Consolas"))
+        self.stats_box.grid(row=0, column=0, sticky="nsew", padx=4, pady=4)
+        self.stats_box.configure(state="disabled")
+        ctk.CTkButton(stats_tab, text="Export snapshot", command=self._export_stats).grid(row=1, column=0, padx=4, pady=(0, 4), sticky="ew")
+        self._refresh_stats_box()
+
+    def _fleet_tab(self, fleet_tab: ctk.CTkFrame):
+        fleet_tab.grid_columnconfigure(0, weight=1)
+        fleet_tab.grid_rowconfigure(0, weight=1)
+        self.fleet_overview = FleetOverview(
+            fleet_tab,
+            self._model.fleet_store,
+            format_row=self._format_fleet_row,
+            on_select=self._select_robot,
+            header=f"{'ROBOT':<12}{'STATUS':<10}{'BAT':>5}{'SPD':>5} C",
+        )
+        self.fleet_overview.grid(row=0, column=0, sticky="nsew", padx=4, pady=4)
+        if self._model.robot_id is not None:
+            self.fleet_overview.select(self._model.robot_id)
+
     def _robot_core(self, parent: ctk.CTkFrame):
-        title = ctk.CTkLabel(parent, text="Core", font=ctk.CTkFont(size=18, weight="bold"))
+        title = ctk.CTkLabel(parent, text="Core", font=self._font(18))
         title.grid(row=0, column=0, sticky="ew", padx=12, pady=(12, 8))
 
         # row/column configuration
@@ -130,7 +292,7 @@ class MobileRobotDashboard(ctk.CTk):
         mode_panel = ctk.CTkFrame(parent)
         mode_panel.grid(row=1, column=0, sticky="ew", padx=12, pady=(0,12))
         mode_panel.grid_columnconfigure(0, weight=1)
-        ctk.CTkLabel(mode_panel, text="Driving Mode", font=ctk.CTkFont(size=14, weight="bold")).grid(row=0, column=0, padx=8, pady=(12,4), sticky="w")
+        ctk.CTkLabel(mode_panel, text="Driving Mode", font=self._font(14)).grid(row=0, column=0, padx=8, pady=(12,4), sticky="w")
         self.selected_mode = tk.StringVar(value="Auto")
         mode_row = ctk.CTkFrame(mode_panel, fg_color="transparent")
         mode_row.grid(row=1, column=0, sticky="ew", padx=8, pady=4)
@@ -142,22 +304,25 @@ class MobileRobotDashboard(ctk.CTk):
         laser_panel = ctk.CTkFrame(parent)
         laser_panel.grid(row=2, column=0, sticky="ew", padx=12, pady=(0,12))
         laser_panel.grid_columnconfigure(0, weight=1)
-        ctk.CTkLabel(laser_panel, text="Laser (cm)", font=ctk.CTkFont(size=14, weight="bold")).grid(row=0, column=0, padx=12, pady=(12,4), sticky="w")
+        ctk.CTkLabel(laser_panel, text="Laser (cm)", font=self._font(14)).grid(row=0, column=0, padx=12, pady=(12,4), sticky="w")
         self.laser_progressbar = ctk.CTkProgressBar(laser_panel)
         self.laser_progressbar.grid(row=1, column=0, padx=12, pady=4, sticky="ew")
-        self.laser_slider = ctk.CTkSlider(laser_panel, from_=0, to=100, number_of_steps=100)
+        self._laser_stream = ThrottledPublisher(self, self._publish_laser, max_rate=self._stream_rate)
+        self.laser_slider = ctk.CTkSlider(laser_panel, from_=0, to=100, number_of_steps=100, command=self._on_laser_dragged)
         self.laser_slider.grid(row=2, column=0, padx=12, pady=(4,12), sticky="ew")
         self.laser_slider.set(50)
         self.laser_slider.bind("<ButtonRelease-1>", lambda e: self._on_laser_released())
+        self.laser_scan_view = LaserScanView(laser_panel, range_m=self._scan_range, size=220)
+        self.laser_scan_view.grid(row=3, column=0, padx=12, pady=(0,12))
 
         # bumper panel 
         bumper_panel = ctk.CTkFrame(parent)
         bumper_panel.grid(row=3, column=0, sticky="ew", padx=12, pady=(0,12))
         bumper_panel.grid_columnconfigure(0, weight=1)
         bumper_panel.grid_rowconfigure(2, minsize=132)
-        btn_font = ctk.CTkFont(size=16, weight="bold")
-        self._bumper_font_large = ctk.CTkFont(family="Consolas", size=80, weight="bold")
-        self._bumper_font_medium = ctk.CTkFont(family="Consolas", size=50, weight="bold")
+        btn_font = self._font(16)
+        self._bumper_font_large = self._font(80, family="Consolas")
+        self._bumper_font_medium = self._font(50, family="Consolas")
         self.bumper_true_button = ctk.CTkButton(
             bumper_panel,
             text="Bumper",
@@ -192,7 +357,7 @@ class MobileRobotDashboard(ctk.CTk):
         self.bumper_display.grid(row=2, column=0, padx=12, pady=(6,12), sticky="ew")
 
     def _low_level_microcontroller(self, parent: ctk.CTkFrame):
-        title = ctk.CTkLabel(parent, text="Low Level Microcontroller", font=ctk.CTkFont(size=18, weight="bold"))
+        title = ctk.CTkLabel(parent, text="Low Level Microcontroller", font=self._font(18))
         title.grid(row=0, column=0, sticky="ew", padx=12, pady=(12, 8))
 
         # row/column configuration
@@ -207,10 +372,11 @@ class MobileRobotDashboard(ctk.CTk):
         speed.grid_columnconfigure(0, weight=1)
 
         # slider to publish speed 
-        ctk.CTkLabel(speed, text="Speed", font=ctk.CTkFont(size=14, weight="bold")).grid(row=0, column=0, padx=12, pady=(12, 4), sticky="w")
+        ctk.CTkLabel(speed, text="Speed", font=self._font(14)).grid(row=0, column=0, padx=12, pady=(12, 4), sticky="w")
         self.speed_progressbar = ctk.CTkProgressBar(speed)
         self.speed_progressbar.grid(row=1, column=0, padx=12, pady=4, sticky="ew")
-        self.speed_slider = ctk.CTkSlider(speed, from_=0, to=100, number_of_steps=100)
+        self._speed_stream = ThrottledPublisher(self, self._publish_speed, max_rate=self._stream_rate)
+        self.speed_slider = ctk.CTkSlider(speed, from_=0, to=100, number_of_steps=100, command=self._on_speed_dragged)
         self.speed_slider.grid(row=2, column=0, padx=12, pady=(4, 12), sticky="ew")
         self.speed_slider.set(50)
         self.speed_slider.bind("<ButtonRelease-1>", lambda e: self._on_speed_released())
@@ -220,6 +386,8 @@ class MobileRobotDashboard(ctk.CTk):
         self.speed_value_box.grid(row=3, column=0, padx=12, pady=(0, 12), sticky="ew")
         self.speed_value_box.insert("0.0", " -- ")
         self.speed_value_box.configure(state="disabled")  
+        self.speed_sparkline = Sparkline(speed, window_s=self._sparkline_window_s, value_range=(0, 100), width=260)
+        self.speed_sparkline.grid(row=4, column=0, padx=12, pady=(0, 12), sticky="ew")
         
         # battery panel 
         battery_panel = ctk.CTkFrame(parent)
@@ -269,6 +437,9 @@ class MobileRobotDashboard(ctk.CTk):
         self.battery_entry.grid(row=0, column=0, padx=(0, 6), pady=4, sticky="ew")
         self.battery_send_btn = ctk.CTkButton(input_row, text="Send", width=70, command=self._send_battery)
         self.battery_send_btn.grid(row=0, column=1, padx=0, pady=4)
+        self.battery_sparkline = Sparkline(battery_panel, window_s=self._sparkline_window_s, value_range=(0, 100),
+                                           color="#9aff9a", width=260)
+        self.battery_sparkline.grid(row=2, column=0, padx=4, pady=(0, 8), sticky="ew")
 
         # LCD display for motion subscriber
         motion_panel = ctk.CTkFrame(parent)
@@ -277,7 +448,7 @@ class MobileRobotDashboard(ctk.CTk):
         self.motion_display = ctk.CTkLabel(
             motion_panel,
             text="--",
-            font=ctk.CTkFont(size=80, weight="bold"),
+            font=self._font(80),
             text_color="#ffd27f",   
             fg_color="#202020",
             corner_radius=8,
@@ -285,144 +456,106 @@ class MobileRobotDashboard(ctk.CTk):
             pady=6
         )
         self.motion_display.grid(row=0, column=0, columnspan=2, padx=4, pady=(8, 8), sticky="ew")
+        self.motion_sparkline = Sparkline(motion_panel, window_s=self._sparkline_window_s, color="#ffd27f", width=260)
+        self.motion_sparkline.grid(row=1, column=0, columnspan=2, padx=4, pady=(0, 8), sticky="ew")
 
 
     # --- Callbacks Log --------------------------------------------------------
     def _clear_log(self):
-        self.text_log.delete("0.0", "end")
+        self._log_view.clear()
+
+    def _append_log(self, line: str, level: str = INFO, topic: Optional[str] = None, direction: str = SYS):
+        self._log_record(LogRecord(line, (), level, topic, direction=direction))
+
+    def _log_binding(self, template: str, visual: Visual):
+        # runs on the Tk thread once per rendered (coalesced) update
+        line = "(SUB) " + template.format(**visual._asdict()) + f" in {visual.topic}"
+        self._log_record(LogRecord(line, (), INFO, visual.topic, direction=SUB))
 
-    def _append_log(self, line: str):
-        self.text_log.insert("end", line + "\n")
-        self.text_log.see("end")
+    def _log_record(self, record: LogRecord):
+        # thread-safe: only enqueues; the LogView flushes on the Tk thread and
+        # the file writer on its own thread
+        self._log_view.append(record)
+        if self._log_writer is not None:
+            self._log_writer.log(record)
+
+    def _start_log_writer(self):
+        directory, max_bytes, max_age_s, compress = self._log_writer_args
+        try:
+            writer = AsyncLogWriter(directory, max_bytes=max_bytes, max_age_s=max_age_s, compress=compress)
+        except OSError as e:
+            self._append_log(f"Log writer disabled: {e}", level=ERROR)
+            return
+        writer.start()
+        self._log_writer = writer
+        what = "log and telemetry" if self._log_telemetry else "log"
+        self._append_log(f"Writing {what} to {directory}")
+
+    def _publish(self, field: str, payload, description: str):
+        topic = self._model.topic_for(field)
+        if topic is None:
+            self._append_log(f"{field} topic not available", level=WARN)
+            return
+        self.mqtt.publish(topic, payload)
+        self._append_log(f"(PUB) {description} in {topic}", topic=topic, direction=PUB)
+
+
+    def _log_stream(self, label: str, stats):
+        if stats.sent > 1 or stats.dropped:
+            self._append_log(f"(PUB) {label} stream: {stats.sent} sent, {stats.dropped} dropped, {stats.rate:.1f} msg/s", direction=PUB)
 
         
     # --- Callbacks Fleet Manager  ---------------------------------------------
-    # connection switch subscriber
-    def _handle_connection_state_update(self, payload: str):
-        val = (payload or '').strip().lower()
-        is_on = val in ("true", "1", "on", "yes")
-        if is_on:
-            self.connection_switch.select()
-            self.connection_led.configure(text_color="#00cc55")
-        else:
-            self.connection_switch.deselect()
-            self.connection_led.configure(text_color="#ff4444")
-        self._append_log(f"(SUB) Connection state '{payload}' in {getattr(self, '_connection_state_sub', '?')}")
-
     # job publisher
     def _on_job_selected(self, choice: str):
-        if hasattr(self, 'mqtt') and hasattr(self, '_job_pub'):
-            self.mqtt.publish(self._job_pub, choice)
-            self._append_log(f"(PUB) Job '{choice}' in {self._job_pub}")
-
-    # job subscriber
-    def _handle_robot_status_update(self, payload: str):
-        raw = (payload or '').strip()
-        if not raw:
-            text = "--"; color = "#cccccc"
-        else:
-            text = raw
-            lw = raw.lower()
-            if any(k in lw for k in ("ok", "ready", "idle")):
-                color = "#9aff9a"
-            elif any(k in lw for k in ("error", "fail", "stuck")):
-                color = "#ff5555"
-            elif "warn" in lw:
-                color = "#ffd27f"
-            else:
-                color = "#cccccc"
-        self.robot_status_display.configure(text=text, text_color=color)
-        self._append_log(f"(SUB) Robot status '{payload}' in {getattr(self, '_robot_status_sub', '?')}")
-
-     # battery subscriber 
-    def _handle_battery_update(self, payload: str):
-        raw = (payload or "").strip()
-        val = None
-        try:
-            num = raw.rstrip('%').strip()
-            if num:
-                val = int(float(num))
-                val = max(0, min(100, val))
-        except Exception:
-            val = None
-
-        if val is not None:
-            if val == 0:
-                display_text = "EMPTY"; color = "#ff5555"
-            elif val < 30:
-                display_text = "CHARGING"; color = "#ffd27f"
-            elif val >= 100:
-                display_text = "FULL"; color = "#9aff9a"
-            else:
-                display_text = "STANDBY"; color = "#cccccc"
-        self.battery_display.configure(text=display_text, text_color=color)
-        self._append_log(f"(SUB) Battery state '{payload}' in {getattr(self, '_battery_sub', '?')}")
+        self._publish("job", choice, f"Job '{choice}'")
+
+    # connection switch publisher
+    def _on_connection_switch_toggled(self):
+        payload = "true" if self.connection_switch.get() else "false"
+        self._publish("connection_switch", payload, f"Connection request {payload}")
 
 
     # --- Callbacks Core ------------------------------------------------------
     # laser publisher
+    def _on_laser_dragged(self, value: float):
+        self._laser_stream.push(int(value))
+
     def _on_laser_released(self):
-        cm = int(self.laser_slider.get())
-        if hasattr(self, '_laser_pub'):
-            self.mqtt.publish(self._laser_pub, cm)
-            self._append_log(f"(PUB) Laser {cm} cm in {self._laser_pub}")
+        stats = self._laser_stream.release(int(self.laser_slider.get()))
+        self._log_stream("Laser", stats)
+        self._laser_stream.reset_stats()
+
+    def _publish_laser(self, cm: int):
+        self._publish("laser", cm, f"Laser {cm} cm")
         self.laser_progressbar.set(cm / 100.0)
 
     # mode publisher
     def _on_mode_apply(self):
         mode = self.selected_mode.get()
-        if hasattr(self, 'mqtt') and hasattr(self, '_mode_pub'):
-            self.mqtt.publish(self._mode_pub, mode)
-            self._append_log(f"(PUB) Mode {mode} in {self._mode_pub}")
+        self._publish("mode", mode, f"Mode {mode}")
 
     # bumper publisher true
     def _on_bumper_true(self):
-        if hasattr(self, 'mqtt') and hasattr(self, '_bumper_pub'):
-            self.mqtt.publish(self._bumper_pub, "true")
-            self._append_log(f"(PUB) Bumper true in {self._bumper_pub}")
+        self._publish("bumper", "true", "Bumper true")
 
     # bumper publisher false
     def _on_bumper_false(self):
-        if hasattr(self, 'mqtt') and hasattr(self, '_bumper_pub'):
-            self.mqtt.publish(self._bumper_pub, "false")
-            self._append_log(f"(PUB) Bumper false in {self._bumper_pub}")
-
-    # bumper subscriber
-    def _handle_bumper_sensor_update(self, payload: str):
-        raw = (payload or "").strip()
-        obstacle = None
-        if "true" in raw.lower():
-            obstacle = True
-            display_text = "OBSTACLE"
-            color = "#ffd27f"
-        elif "false" in raw.lower():
-            obstacle = False
-            display_text = "FREE"
-            color = "#9aff9a"
-        else:
-            display_text = "--"
-            color = "#cccccc"
-        font_to_use = self._bumper_font_medium if display_text == "OBSTACLE" else self._bumper_font_large
-        self.bumper_display.configure(text=display_text, text_color=color, font=font_to_use)
-        log_val = "true" if obstacle is True else ("false" if obstacle is False else "--")
-        self._append_log(f"(SUB) Bumper sensor '{log_val}' in {getattr(self, '_bumper_sensor_sub', '?')}")
+        self._publish("bumper", "false", "Bumper false")
+
 
     # --- Callbacks Low-level-microcontroller ----------------------------------
     # speed publisher
+    def _on_speed_dragged(self, value: float):
+        self._speed_stream.push(int(value))
+
     def _on_speed_released(self):
-        percent = int(self.speed_slider.get())  
-        self.mqtt.publish(self._speed_pub, percent)
-        self._append_log(f"(PUB) Speed {percent}% in {self._speed_pub}")
-
-    # speed subscriber
-    def _handle_speed_update(self, val: int):
-        self.speed_progressbar.set(val / 100.0)
-        if hasattr(self, "speed_value_box"):
-            self.speed_value_box.configure(state="normal")
-            self.speed_value_box.delete("0.0", "end")
-            self.speed_value_box.insert("0.0", f"{val}%")
-            self.speed_value_box.configure(state="disabled")
-        self._append_log(f"(SUB) Speed {val}% in {self._speed_sub}")
+        stats = self._speed_stream.release(int(self.speed_slider.get()))
+        self._log_stream("Speed", stats)
+        self._speed_stream.reset_stats()
+
+    def _publish_speed(self, percent: int):
+        self._publish("speed", percent, f"Speed {percent}%")
 
     # battery publisher
     def _send_battery(self):
@@ -430,142 +563,410 @@ class MobileRobotDashboard(ctk.CTk):
             val = int(float(self.battery_entry.get()))
             val = max(0, min(100, val))
             self.battery_entry.delete(0, "end")
-            if hasattr(self, "_battery_pub"):
-                self.mqtt.publish(self._battery_pub, val)
-                self._append_log(f"(PUB) Battery {val}% in {self._battery_pub}")
-            else:
-                self._append_log("(WARN) Battery topic no inicializado")
+            self._publish("battery", val, f"Battery {val}%")
         except Exception as e:
             self._append_log(f"Payload inválido '{self.battery_entry.get()}': {e}")
 
-    # motion subscriber 
-    def _handle_motion_update(self, payload: str):
-        raw = (payload or "").strip()
-        try:
-            val_cm = int(float(raw))
-            if val_cm < 0:
-                val_cm = 0
-        except Exception:
-            val_cm = getattr(self, "_last_laser_cm", None)
-
-        if val_cm is None:
-            text = "--"; color = "#cccccc"
-        elif val_cm < 15:
-            text = "STOP"; color = "#ff5555"
-        else:
-            text = "GO"; color = "#9aff9a"
-        self.motion_display.configure(text=text, text_color=color)
-        self._append_log(f"(SUB) Motion '{payload}' in {getattr(self, '_motion_sub', '?')}")
 
+    # --- Renderers ------------------------------------------------------------
+    # referenced by name from the "render" key of each binding
+    def _renderers(self) -> dict:
+        fonts = {
+            "bumper_large": self._bumper_font_large,
+            "bumper_medium": self._bumper_font_medium,
+        }
 
-    # --- MQTT -----------------------------------------------------------------
-    def _init_mqtt(self):
-        # topics
-        self._speed_pub = "/speed_slider/data/value"
-        self._speed_sub = "/low_level_controller/speed/data/value"
-        self._battery_pub = "/battery_entry/data/value"          
-        self._battery_sub = "/fleet/battery_status/status"  
-        self._laser_pub = "/laser_slider/data/value"
-        self._motion_sub = "/low_level_controller/motion/command"
-        self._bumper_pub = "/bumper_button/pressed/value"
-        self._bumper_sensor_sub = "/core/sensor_bumper/data"
-        self._mode_pub = "/mode_selector/drive_mode/value"
-        self._connection_switch_pub = "/switch_connection/state"  
-        self._connection_state_sub = "/fleet/connection_status/state"
-        self._job_pub = "/option_list/job"
-        self._robot_status_sub = "/fleet/robot_status/state"
-        self._battery_percentage_sub = "/low_level_controller/battery/percentage"
-        
-        self.mqtt = MqttService(log_fn=self._append_log)
-        self.mqtt.start()
-
-        self.mqtt.subscribe(self._speed_sub, self._on_speed_message)
-        self.mqtt.subscribe(self._battery_sub, self._on_battery_message)
-        self.mqtt.subscribe(self._motion_sub, self._on_motion_message)
-        self.mqtt.subscribe(self._bumper_sensor_sub, self._on_bumper_sensor_message)
-        self.mqtt.subscribe(self._connection_state_sub, self._on_connection_state_message)
-        self.mqtt.subscribe(self._robot_status_sub, self._on_robot_status_message)
-        self.mqtt.subscribe(self._battery_percentage_sub, self._on_battery_percentage_message)
-
-    def _on_speed_message(self, topic: str, payload: str):
-        try:
-            val = int(float(payload))
-            val = max(0, min(100, val))
-            self.after(0, lambda v=val: self._handle_speed_update(v))
-        except Exception as e:
-            self._append_log(f"Payload inválido '{payload}': {e}")
+        text_colors = {}        # textbox -> its themed text colour, while shown stale
 
-    def _on_battery_message(self, topic: str, payload: str):
-        self.after(0, lambda p=payload: self._handle_battery_update(p))
-        raw = payload.strip()
-        try:
-            num = raw.rstrip('%').strip()
-            val = int(float(num))
-            val = max(0, min(100, val))
-            self.after(0, lambda v=val: self._handle_battery_percentage_update(str(v)))
-        except Exception:
-            pass
-
-    def _on_motion_message(self, topic: str, payload: str):
-        self.after(0, lambda p=payload: self._handle_motion_update(p))
-    
-    def _on_bumper_sensor_message(self, topic: str, payload: str):
-        self.after(0, lambda p=payload: self._handle_bumper_sensor_update(p))
+        def label(widget, v: Visual):
+            color = self.STALE_COLOR if v.stale else v.color
+            if v.font is not None:
+                widget.configure(text=v.text, text_color=color, font=fonts[v.font])
+            else:
+                widget.configure(text=v.text, text_color=color)
+
+        def progress(widget, v: Visual):
+            widget.set((v.value or 0) / 100.0)
+
+        def textbox(widget, v: Visual):
+            if v.stale:
+                text_colors.setdefault(widget, widget.cget("text_color"))
+                widget.configure(text_color=self.STALE_COLOR)
+            elif widget in text_colors:
+                widget.configure(text_color=text_colors.pop(widget))
+            widget.configure(state="normal")
+            widget.delete("0.0", "end")
+            widget.insert("0.0", v.text)
+            widget.configure(state="disabled")
+
+        def gauge(widget, v: Visual):
+            right = self._battery_fill_left
+            if v.value is not None:
+                right += (v.value / 100.0) * (self._battery_fill_right_max - self._battery_fill_left)
+            widget.coords(self._battery_fill_rect, self._battery_fill_left, self._battery_fill_top, right, self._battery_fill_bottom)
+            self._battery_percent_value = v.value
+
+        def switch(widget, v: Visual):
+            if v.value:
+                widget.select()
+            else:
+                widget.deselect()
 
-    def _on_connection_state_message(self, topic: str, payload: str):
-        self.after(0, lambda p=payload: self._handle_connection_state_update(p))
+        def scan(widget, v: Visual):
+            widget.show(v.value)
 
-    def _on_robot_status_message(self, topic: str, payload: str):
-        self.after(0, lambda p=payload: self._handle_robot_status_update(p))
+        renderers = {"label": label, "progress": progress, "textbox": textbox, "gauge": gauge, "switch": switch,
+                     "scan": scan}
+        return {kind: self._render_cache.wrap(fn, RENDER_STATE[kind]) for kind, fn in renderers.items()}
 
-    def _on_battery_percentage_message(self, topic: str, payload: str):
-        self.after(0, lambda p=payload: self._handle_battery_percentage_update(p))
 
-    def _on_connection_switch_toggled(self):
-        if hasattr(self, 'mqtt') and hasattr(self, '_connection_switch_pub'):
-            payload = "true" if self.connection_switch.get() else "false"
-            self.mqtt.publish(self._connection_switch_pub, payload)
-            self._append_log(f"(PUB) Connection request {payload} in {self._connection_switch_pub}")
+    # --- MQTT -----------------------------------------------------------------
+    def _init_mqtt(self):
+        model = self._model
+        # the same bindings, resolved to widgets and renderers, keyed by name
+        routes = model.registry.compile(
+            resolve_widget=lambda name: getattr(self, name),
+            renderers=self._renderers(),
+            log_fn=self._log_binding,
+        )
+        self._views = {b.name: b for route in routes.values() for b in route.bindings}
+        self._sparklines = {}
+        for topic, name in model.registry.history.items():
+            spark = getattr(self, name)
+            spark.set_series(model.history.series(topic))
+            self._sparklines[topic] = spark
+        model.listen(CHANGE, self._on_model_change)
+        model.listen(HISTORY, self._on_model_history)
+        model.listen(ROBOT, self._on_model_robot)
+        if self._state_port is not None:
+            self._start_state_server()
+        self._restore_snapshot()
+        model.attach(self.mqtt)
+
+        if self._record_path:
+            try:
+                self.mqtt.recorder = SessionRecorder(self._record_path)
+                self._append_log(f"Recording session to {self._record_path}")
+            except OSError as e:
+                self._append_log(f"Recorder disabled: {e}", level=ERROR)
+        if self._replay_path:
+            self._replayer = SessionReplayer(self._replay_path)
+            threading.Thread(target=self._run_replay, name="session-replay", daemon=True).start()
+
+    def _start_state_server(self):
+        try:
+            self._state_server = StateServer(self._model, port=self._state_port)
+            self._state_server.start()
+        except OSError as e:
+            self._state_server = None
+            self._append_log(f"State server disabled: {e}", level=ERROR)
+            return
+        self._append_log(f"Serving the dashboard state on {self._state_server.url} (/state, /stream)")
 
-    def _handle_battery_percentage_update(self, payload: str):
-        raw = (payload or "").strip()
+    def _restore_snapshot(self):
+        # paint the last-known state before live data arrives and keep it
+        # current from here on; a replayed session is not cached
+        if not self._snapshot_path or self._replay_path:
+            return
         try:
-            if raw == "":
-                percent = None
-            else:
-                percent = int(float(raw))
-                percent = max(0, min(100, percent))
-        except Exception:
-            percent = None
-
-        left_x = getattr(self, "_battery_fill_left", 4)
-        right_x_max = getattr(self, "_battery_fill_right_max", 184)
-        if percent is None:
-            top = getattr(self, "_battery_fill_top", 4)
-            bottom = getattr(self, "_battery_fill_bottom", 52)
-            self.battery_canvas.coords(self._battery_fill_rect, left_x, top, left_x, bottom)
-            self.battery_canvas.itemconfig(self._battery_fill_rect, fill="#ffffff")
-            self._append_log(f"(SUB) Battery % '--' in {getattr(self, '_battery_percentage_sub', '?')}")
+            self._snapshot = SnapshotCache(self._snapshot_path, self._snapshot_interval_s)
+        except OSError as e:
+            self._append_log(f"Snapshot disabled: {e}", level=ERROR)
+            return
+        try:
+            entries = self._snapshot.load()
+        except (OSError, ValueError) as e:
+            self._append_log(f"Snapshot not restored: {e}", level=ERROR)
+            entries = {}
+        restored = self._model.restore(entries)
+        if restored:
+            self._mark("restored")
+            saved = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self._snapshot.saved_at))
+            self._append_log(f"Restored {restored} topics from the snapshot of {saved} (stale until live data arrives)")
+        self.mqtt.snapshot = self._snapshot
+        self._snapshot.start()
+
+    def _connect_mqtt(self):
+        # publishes made while offline are persisted and replayed on reconnect
+        self._outbox = self._open_outbox() if self._outbox_path else None
+
+        host, port = self._mqtt_host, self._mqtt_port
+        if self._mqtt_engine == "asyncio":
+            # the asyncio engine queues batches; the Tk thread pulls them
+            self.mqtt = MqttService(host, port, log_fn=self._log_record, engine="asyncio", pull=True, outbox=self._outbox)
+            self.after(self._ui.interval_ms, self._poll_mqtt)
+        else:
+            self.mqtt = MqttService(host, port, log_fn=self._log_record, outbox=self._outbox)
+        if self._log_writer is not None and self._log_telemetry:
+            self.mqtt.writer = self._log_writer
+        if self._replay_path is None:
+            self.mqtt.start()
+
+    def _run_replay(self):
+        speed = f"{self._replay_speed:g}x" if self._replay_speed > 0 else "max speed"
+        self._append_log(f"Replaying {self._replay_path} at {speed}")
+        try:
+            stats = self._replayer.replay(self.mqtt.inject, self._replay_speed)
+        except (OSError, ValueError) as e:
+            self._append_log(f"Replay error: {e}", level=ERROR)
+            return
+        self._append_log(f"Replay finished: {stats.messages} messages in {stats.elapsed:.1f} s ({stats.rate:,.0f} msg/s)")
+
+    def _open_outbox(self) -> Optional[DiskOutbox]:
+        policies = {}
+        registry, fleet_topics = self._model.registry, self._model.fleet_topics
+        for field, policy in registry.outbox.items():
+            topic = registry.publish.get(field)
+            if topic is not None:
+                key = fleet_topics.filter(topic) if fleet_topics else topic
+                policies[key] = policy
+        try:
+            outbox = DiskOutbox(self._outbox_path, policies, max_age_s=self._outbox_max_age_s)
+        except (OSError, ValueError) as e:
+            self._append_log(f"Outbox disabled: {e}", level=ERROR)
+            return None
+        if len(outbox):
+            self._append_log(f"Outbox: {len(outbox)} publishes pending from a previous session")
+        return outbox
+
+    def _on_model_change(self, name: str, visual: Visual, received: Optional[float]):
+        # model event (MQTT thread): render on the next UI tick, latest wins
+        self._ui.post((visual.topic, name), self._render_view, (self._views[name], visual, received))
+
+    def _render_view(self, item):
+        view, visual, received = item
+        if received is None:
+            view.apply(visual, log=False)       # repaint, e.g. robot switch
             return
+        view.apply(visual)
+        self.mqtt.metrics.record_latency(time.time() - received)
+        if "message" not in self.startup:
+            self._mark("message")
+
+    def _on_model_history(self, key: str):
+        spark = self._sparklines.get(key)
+        if spark is not None:
+            self._ui.post((key, "history"), spark.redraw, None)
 
-        fill_width = (percent / 100.0) * (right_x_max - left_x)
-        new_right = left_x + fill_width
-        top = getattr(self, "_battery_fill_top", 4)
-        bottom = getattr(self, "_battery_fill_bottom", 52)
-        self.battery_canvas.coords(self._battery_fill_rect, left_x, top, new_right, bottom)
-        self.battery_canvas.itemconfig(self._battery_fill_rect, fill="#ffffff")
-        self._battery_percent_value = percent
-        self._append_log(f"(SUB) Battery % '{percent}' in {getattr(self, '_battery_percentage_sub', '?')}")
+    def _poll_mqtt(self):
+        try:
+            self.mqtt.poll(max_batch=5000)
+        finally:
+            self.after(self._ui.interval_ms, self._poll_mqtt)
+
+    # --- Stats ----------------------------------------------------------------
+    def _stats_snapshot(self) -> dict:
+        queues = {"mqtt": self.mqtt.queue_depth(), "ui": self._ui.depth()}
+        if self._outbox is not None:
+            queues["outbox"] = len(self._outbox)
+        snap = self.mqtt.metrics.snapshot(queues)
+        snap["ui"] = {"posted": self._ui.total_posted, "rendered": self._ui.total_rendered,
+                      "coalesced": self._ui.total_coalesced, "last_tick_ms": round(self._ui.last_tick.duration_ms, 3)}
+        snap["startup_ms"] = {k: round(v * 1000.0, 1) for k, v in self.startup.items()}
+        snap["render_cache"] = {"applied": self._render_cache.applied, "skipped": self._render_cache.skipped}
+        log = self._log_view
+        snap["log"] = {"entries": len(log.store), "appended": log.store.appended,
+                       "evicted": log.store.evicted, "dropped": log.dropped}
+        if self._log_writer is not None:
+            w = self._log_writer.stats()
+            snap["log_writer"] = dict(w._asdict(), rate=round(w.rate, 1), byte_rate=round(w.byte_rate, 1))
+        if self._state_server is not None:
+            s = self._state_server
+            snap["state_server"] = {"clients": s.clients, "streams": s.streams, "requests": s.requests,
+                                    "not_modified": s.not_modified, "ws_messages": s.ws_messages,
+                                    "bytes_sent": s.bytes_sent, "rejected": s.rejected,
+                                    "forbidden": s.forbidden}
+        if self._snapshot is not None:
+            s = self._snapshot
+            snap["snapshot"] = {"topics": len(s), "saves": s.saves, "bytes": s.bytes,
+                                "last_save_ms": round(s.last_save_ms, 3), "errors": s.errors}
+        filters = self.mqtt.filter_stats()
+        if filters:
+            snap["filters"] = {f: dict(s._asdict(), dropped=s.dropped) for f, s in filters.items()}
+        return snap
+
+    def _refresh_stats(self):
+        try:
+            self.mqtt.metrics.update_rates()
+            if self.tabview.get() == "Stats":
+                self._refresh_stats_box()
+        finally:
+            self.after(self.STATS_REFRESH_MS, self._refresh_stats)
+
+    def _refresh_stats_box(self):
+        text = self._format_stats(self._stats_snapshot())
+        self.stats_box.configure(state="normal")
+        self.stats_box.delete("1.0", "end")
+        self.stats_box.insert("1.0", text)
+        self.stats_box.configure(state="disabled")
+
+    def _format_stats(self, snap: dict) -> str:
+        lat = snap["latency_ms"]
+        lines = [
+            f"rate {snap['rate']:,.1f} msg/s   {snap['byte_rate'] / 1024:,.1f} KiB/s",
+            "queues " + "  ".join(f"{k} {v}" for k, v in snap["queues"].items()),
+            f"ui ticks: {snap['ui']['rendered']:,} rendered, {snap['ui']['coalesced']:,} coalesced, "
+            f"last {snap['ui']['last_tick_ms']:.2f} ms",
+            f"render cache: {snap['render_cache']['applied']:,} applied, "
+            f"{snap['render_cache']['skipped']:,} redundant redraws skipped",
+            f"reconnects: {snap['reconnect_s']['reconnects']} of {snap['reconnect_s']['disconnects']} drops, "
+            f"last {snap['reconnect_s']['last']:.2f} s, max {snap['reconnect_s']['max']:.2f} s to resubscribed",
+            "startup " + "  ".join(f"{k} {v:,.0f} ms" for k, v in snap["startup_ms"].items()),
+            f"log: {snap['log']['entries']:,} entries, {snap['log']['evicted']:,} evicted, "
+            f"{snap['log']['dropped']:,} dropped",
+        ]
+        if "log_writer" in snap:
+            w = snap["log_writer"]
+            lines.append(f"log writer: {w['rate']:,.0f} rec/s  {w['byte_rate'] / 1024:,.1f} KiB/s  "
+                         f"{w['records'] + w['telemetry']:,} written, {w['dropped']:,} dropped, "
+                         f"{w['pending']:,} pending, {w['rotations']} rotations")
+        if "state_server" in snap:
+            s = snap["state_server"]
+            lines.append(f"state server: {s['clients']} viewers ({s['streams']} streams), {s['requests']:,} requests, "
+                         f"{s['not_modified']:,} not modified, {s['bytes_sent'] / 1024:,.1f} KiB sent")
+        if "snapshot" in snap:
+            s = snap["snapshot"]
+            lines.append(f"snapshot: {s['topics']} topics, {s['bytes'] / 1024:,.1f} KiB, {s['saves']:,} saves, "
+                         f"last {s['last_save_ms']:.2f} ms, {s['errors']} errors")
+        lines += [
+            "",
+            f"receive -> render latency ({lat['count']:,} updates)",
+            f"  p50 {lat['p50']:.1f}  p90 {lat['p90']:.1f}  p99 {lat['p99']:.1f}  max {lat['max']:.1f} ms",
+        ]
+        # regroup the fine histogram buckets into 1-2-5 bins for display
+        edges = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, None)
+        bins = [0] * len(edges)
+        for bound, count in lat["buckets"]:
+            i = next(i for i, e in enumerate(edges) if e is None or (bound is not None and bound <= e * 1.0001))
+            bins[i] += count
+        peak = max(bins) or 1
+        for edge, count in zip(edges, bins):
+            label = f"<={edge}" if edge is not None else ">1000"
+            lines.append(f"  {label:>6} ms {'#' * round(20 * count / peak):<20} {count:,}")
+        lines += ["", f"{'TOPIC':<34}{'MSGS':>9}{'RATE':>8}{'KIB':>8}{'ERR':>5}"]
+        for topic, t in snap["topics"].items():
+            name = topic if len(topic) <= 33 else "…" + topic[-32:]
+            lines.append(f"{name:<34}{t['messages']:>9,}{t['rate']:>8.1f}{t['bytes'] / 1024:>8.1f}{t['errors']:>5}")
+        if "filters" in snap:
+            lines += ["", f"{'FILTER':<34}{'PASSED':>9}{'DUP':>9}{'DEADBAND':>9}{'RATE':>9}{'HEARTBT':>8}"]
+            for topic, f in snap["filters"].items():
+                name = topic if len(topic) <= 33 else "…" + topic[-32:]
+                lines.append(f"{name:<34}{f['passed']:>9,}{f['duplicates']:>9,}{f['deadband']:>9,}"
+                             f"{f['rate_limited']:>9,}{f['heartbeats']:>8,}")
+        return "\n".join(lines)
+
+    def _export_stats(self):
+        path = os.path.join(STATS_DIR, time.strftime("stats-%Y%m%d-%H%M%S.json"))
+        try:
+            os.makedirs(STATS_DIR, exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(self._stats_snapshot(), f, indent=2)
+            self._append_log(f"Stats snapshot written to {path}")
+        except OSError as e:
+            self._append_log(f"Stats export error: {e}", level=ERROR)
+
+    def _on_ui_update_error(self, key, e: Exception):
+        self._append_log(f"UI update error {key}: {e}", level=ERROR)
+
+
+    # --- Fleet ----------------------------------------------------------------
+    def _on_model_robot(self, robot_id: str, is_new: bool):
+        if self.fleet_overview is not None:
+            self._ui.post("fleet", self.fleet_overview.refresh, None)
+        if is_new and self._model.robot_id is None:
+            self._ui.post("fleet_select", self._select_robot, robot_id)
+
+    def _select_robot(self, robot_id: str):
+        if robot_id == self._model.robot_id:
+            return
+        # the model re-emits this robot's stored state (not logged)
+        self._model.select(robot_id)
+        self.title(f"Mobile Robot Dashboard - {robot_id}")
+        if self.fleet_overview is not None:
+            self.fleet_overview.select(robot_id)
+        self._append_log(f"Fleet: selected robot {robot_id}")
+
+    def _format_fleet_row(self, state: RobotState) -> str:
+        def get(name: str) -> Optional[str]:
+            reading = self._model.fleet_store.get(state.robot_id, self._model.registry.topic_of(name))
+            if reading is None:
+                return None
+            return reading.raw or (None if reading.value is None else str(reading.value))
+        status = get("robot_status") or "--"
+        battery = get("battery_percentage") or get("battery") or "--"
+        speed = get("speed") or "--"
+        conn = get("connection_state") or ""
+        led = "●" if conn.strip().lower() in ("true", "1", "on", "yes") else "○"
+        return f"{state.robot_id[:11]:<12}{status[:9]:<10}{battery[:4]:>5}{speed[:4]:>5} {led}"
 
     def _on_close(self):
+        # Every subsystem is closed in its own step, so one failure doesn't
+        # leave the others (log files, capture, snapshot, outbox) unfinalized.
+        # The log writer goes last so earlier failures still reach the file.
+        mqtt = getattr(self, "mqtt", None)
+        steps = (
+            ("UI scheduler", getattr(self, "_ui", None), "stop"),
+            ("log view", getattr(self, "_log_view", None), "stop"),
+            ("replay", self._replayer, "stop"),
+            ("MQTT connection", mqtt, "stop"),
+            ("recorder", getattr(mqtt, "recorder", None), "close"),
+            ("state server", self._state_server, "stop"),
+            ("snapshot", self._snapshot, "close"),
+            ("outbox", getattr(self, "_outbox", None), "close"),
+            ("log writer", self._log_writer, "close"),
+        )
         try:
-            if hasattr(self, "mqtt"):
-                self.mqtt.stop()
+            for name, subsystem, method in steps:
+                if subsystem is None:
+                    continue
+                try:
+                    getattr(subsystem, method)()
+                except Exception as e:
+                    try:
+                        self._append_log(f"Shutdown: closing the {name} failed: {e}", level=ERROR)
+                    except Exception:
+                        pass
         finally:
             self.destroy()
 
-
 if __name__ == "__main__":
-	app = MobileRobotDashboard()
+	import argparse
+	parser = argparse.ArgumentParser(description="Mobile Robot Dashboard")
+	parser.add_argument("--host", default="localhost", help="MQTT broker host")
+	parser.add_argument("--port", type=int, default=1883, help="MQTT broker port")
+	parser.add_argument("--fleet", metavar="PREFIX", nargs="?", const="/robots/{robot_id}", default=None,
+	                    help="fleet mode; topics are namespaced under PREFIX (default: /robots/{robot_id})")
+	parser.add_argument("--engine", choices=("paho", "asyncio"), default="paho", help="MQTT transport engine")
+	parser.add_argument("--outbox", metavar="PATH", nargs="?", const=DEFAULT_OUTBOX, default=None,
+	                    help="queue publishes made while disconnected in PATH and replay them (default: %(const)s)")
+	parser.add_argument("--outbox-max-age", metavar="SECONDS", type=float, default=60.0,
+	                    help="drop queued publishes older than this instead of replaying them")
+	parser.add_argument("--snapshot", metavar="PATH", default=DEFAULT_SNAPSHOT,
+	                    help="last-known state shown at startup until live data arrives (default: %(default)s)")
+	parser.add_argument("--no-snapshot", dest="snapshot", action="store_const", const=None,
+	                    help="start with empty displays")
+	parser.add_argument("--serve", metavar="PORT", type=int, nargs="?", const=8765, default=None,
+	                    help="serve the state read-only on http://127.0.0.1:PORT (default: %(const)s)")
+	parser.add_argument("--record", metavar="PATH", help="capture received messages to PATH (.gz compresses)")
+	parser.add_argument("--replay", metavar="PATH", help="replay a captured session instead of connecting")
+	parser.add_argument("--speed", type=float, default=1.0, help="replay speed factor; 0 replays as fast as possible")
+	parser.add_argument("--log-capacity", type=int, default=100_000, help="log entries kept for filtering")
+	parser.add_argument("--log-dir", metavar="PATH", nargs="?", const=DEFAULT_LOG_DIR, default=None,
+	                    help="write the log to rotating files in PATH (default: %(const)s)")
+	parser.add_argument("--log-max-mb", type=float, default=16.0, help="rotate log files at this size")
+	parser.add_argument("--log-max-age", type=float, default=60.0, help="rotate log files after this many minutes")
+	parser.add_argument("--log-gzip", action="store_true", help="gzip the log files")
+	parser.add_argument("--log-telemetry", action="store_true", help="also write every received message (needs --log-dir)")
+	parser.add_argument("--sparkline-window", type=float, default=60.0, help="minutes of history shown by the sparklines")
+	parser.add_argument("--scan-range", type=float, default=None, help="laser scan plot radius in metres (default: the scan's range_max)")
+	args = parser.parse_args()
+	app = MobileRobotDashboard(mqtt_host=args.host, mqtt_port=args.port, fleet_prefix=args.fleet, mqtt_engine=args.engine, outbox_path=args.outbox,
+	                           outbox_max_age_s=args.outbox_max_age,
+	                           record_path=args.record, replay_path=args.replay, replay_speed=args.speed,
+	                           log_capacity=args.log_capacity, log_dir=args.log_dir,
+	                           log_max_bytes=int(args.log_max_mb * (1 << 20)), log_max_age_s=args.log_max_age * 60.0,
+	                           log_compress=args.log_gzip, log_telemetry=args.log_telemetry, scan_range=args.scan_range,
+	                           sparkline_window_s=args.sparkline_window * 60.0,
+	                           snapshot_path=args.snapshot, state_port=args.serve)
 	app.mainloop()
 
@@ -0,0 +1,159 @@
+import time
+from typing import Any, Callable, Dict, NamedTuple, Optional
+
+# (topic, payload) -> value, the MqttService decoder signature
+ValueFn = Callable[[str, bytes], Any]
+
+# bindings.json "filter" keys
+SPEC_KEYS = ("dedup", "deadband", "max_rate", "heartbeat")
+
+
+class FilterStats(NamedTuple):
+    passed: int         # delivered, heartbeats included
+    heartbeats: int     # delivered only because the heartbeat was due
+    duplicates: int     # dropped: same payload as the last delivered one
+    deadband: int       # dropped: numeric change below the deadband
+    rate_limited: int   # dropped: over max_rate
+
+    @property
+    def dropped(self) -> int:
+        return self.duplicates + self.deadband + self.rate_limited
+
+
+class _TopicState:
+    __slots__ = ("payload", "value", "passed_at", "due")
+
+    def __init__(self):
+        self.payload: Optional[bytes] = None
+        self.value: Any = None
+        self.passed_at = 0.0
+        self.due = 0.0          # max_rate: scheduled time of the next delivery
+
+
+def _text_number(topic: str, payload: bytes) -> Any:
+    try:
+        return float(payload)
+    except (TypeError, ValueError):
+        return None
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and value == value     # not NaN
+
+
+class IngestFilter:
+    # Subscriber-side filter for the messages of one topic filter, applied by
+    # MqttService before a message is decoded or dispatched. State is
+    # kept per concrete topic, so a wildcard filter in fleet mode filters
+    # every robot independently. Compared with the last *delivered* message:
+    #
+    #   dedup      drop a payload identical to the last one
+    #   max_rate   cap deliveries at max_rate per second on average: each
+    #              delivery books the next 1 / max_rate slot, and a message
+    #              up to half an interval early still takes it, so a jittery
+    #              stream at exactly max_rate passes whole
+    #   deadband   drop numeric values closer than `deadband` to the last one
+    #              (non-numeric values always pass); `value` turns the
+    #              payload into a number, the plain text is parsed by default
+    #   heartbeat  deliver anyway once `heartbeat` seconds passed since the
+    #              last delivery, so charts and staleness keep moving
+    #
+    # The first message of a topic always passes. Filters only run when a
+    # message arrives: the value dropped by max_rate is superseded by the
+    # next copy of a periodic publisher, not delivered later on its own.
+    # Live messages are timed on the monotonic clock; MqttService passes the
+    # recorded receive time of replayed frames instead, so a session replayed
+    # at any speed is filtered the same way. A time earlier than the last
+    # delivery (a clock step, or live and replayed traffic mixed) restarts
+    # the topic as if it were its first message. admit() runs on the MQTT
+    # thread only.
+
+    def __init__(self,
+                 dedup: bool = False,
+                 deadband: Optional[float] = None,
+                 max_rate: Optional[float] = None,
+                 heartbeat: Optional[float] = None,
+                 value: Optional[ValueFn] = None):
+        if deadband is not None and deadband < 0:
+            raise ValueError("deadband must be >= 0")
+        if max_rate is not None and max_rate <= 0:
+            raise ValueError("max_rate must be > 0 messages per second")
+        if heartbeat is not None and heartbeat <= 0:
+            raise ValueError("heartbeat must be > 0 seconds")
+        self.dedup = dedup
+        self.deadband = deadband
+        self.max_rate = max_rate
+        self.heartbeat = heartbeat
+        self._min_interval = 1.0 / max_rate if max_rate else 0.0
+        self._early = self._min_interval / 2.0
+        self._value = value or _text_number
+        self._topics: Dict[str, _TopicState] = {}
+
+        # counters
+        self.passed = 0
+        self.heartbeats = 0
+        self.duplicates = 0
+        self.below_deadband = 0
+        self.rate_limited = 0
+
+    @classmethod
+    def from_spec(cls, spec: Dict[str, Any], value: Optional[ValueFn] = None) -> "IngestFilter":
+        # {"dedup": true, "deadband": 1, "max_rate": 5, "heartbeat": 10}
+        unknown = set(spec) - set(SPEC_KEYS)
+        if unknown:
+            raise ValueError(f"unknown filter option(s): {', '.join(sorted(unknown))}")
+        return cls(bool(spec.get("dedup", False)), spec.get("deadband"), spec.get("max_rate"),
+                   spec.get("heartbeat"), value)
+
+    # --- API --------------------------------------------------------------
+    def admit(self, topic: str, payload: bytes, now: Optional[float] = None) -> bool:
+        # True if the message should be delivered; `now` is its receive time
+        if now is None:
+            now = time.monotonic()
+        state = self._topics.get(topic)
+        if state is None or now < state.passed_at:
+            state = self._topics[topic] = _TopicState()
+            return self._pass(state, payload, now, self._value(topic, payload) if self.deadband is not None else None)
+
+        # the drop checks, cheapest first
+        value = None
+        if self.dedup and payload == state.payload:
+            keep = self._heartbeat_due(state, now)
+            if not keep:
+                self.duplicates += 1
+        elif now < state.due - self._early:
+            keep = self._heartbeat_due(state, now)
+            if not keep:
+                self.rate_limited += 1
+        elif self.deadband is not None:
+            value = self._value(topic, payload)
+            keep = (not _is_number(value) or not _is_number(state.value)
+                    or abs(value - state.value) >= self.deadband or self._heartbeat_due(state, now))
+            if not keep:
+                self.below_deadband += 1
+        else:
+            keep = True
+        if not keep:
+            return False
+        if self.deadband is not None and value is None:
+            value = self._value(topic, payload)
+        return self._pass(state, payload, now, value)
+
+    def stats(self) -> FilterStats:
+        return FilterStats(self.passed, self.heartbeats, self.duplicates, self.below_deadband, self.rate_limited)
+
+    # --- Internals --------------------------------------------------------
+    def _heartbeat_due(self, state: _TopicState, now: float) -> bool:
+        if self.heartbeat is not None and now - state.passed_at >= self.heartbeat:
+            self.heartbeats += 1
+            return True
+        return False
+
+    def _pass(self, state: _TopicState, payload: bytes, now: float, value: Any) -> bool:
+        state.payload = bytes(payload) if self.dedup else None
+        state.value = value
+        state.passed_at = now
+        state.due = max(now, state.due) + self._min_interval
+        self.passed += 1
+        return True
+
@@ -0,0 +1,95 @@
+import bisect
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+ROBOT_ID = "{robot_id}"
+
+
+class TopicTemplate:
+    # Per-robot topic namespace, e.g. "/robots/{robot_id}" + "/fleet/robot_status/state".
+    # The placeholder must occupy a whole topic level so it can be replaced by
+    # a `+` wildcard for the shared fleet subscription.
+
+    def __init__(self, prefix: str = "/robots/{robot_id}"):
+        levels = prefix.split("/")
+        if ROBOT_ID not in levels:
+            raise ValueError(f"fleet prefix must contain a '{ROBOT_ID}' level: {prefix}")
+        self.prefix = prefix
+        self._index = levels.index(ROBOT_ID)
+
+    def topic(self, robot_id: str, suffix: str) -> str:
+        return self.prefix.replace(ROBOT_ID, robot_id) + suffix
+
+    def filter(self, suffix: str) -> str:
+        return self.prefix.replace(ROBOT_ID, "+") + suffix
+
+    def robot_id(self, topic: str) -> Optional[str]:
+        levels = topic.split("/")
+        if len(levels) <= self._index:
+            return None
+        return levels[self._index] or None
+
+
+class RobotState:
+    __slots__ = ("robot_id", "values", "last_seen")
+
+    def __init__(self, robot_id: str, n_fields: int):
+        self.robot_id = robot_id
+        self.values: List[Any] = [None] * n_fields
+        self.last_seen = 0.0
+
+
+class FleetStateStore:
+    # Latest decoded reading per (robot, field). Written from the MQTT thread,
+    # read from the Tk thread; robots are kept sorted by id for the overview.
+
+    def __init__(self, fields: Iterable[str]):
+        self.fields: Tuple[str, ...] = tuple(fields)
+        self._field_index: Dict[str, int] = {f: i for i, f in enumerate(self.fields)}
+        self._lock = threading.Lock()
+        self._robots: Dict[str, RobotState] = {}
+        self._order: List[str] = []
+        self._dirty: Set[str] = set()
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def update(self, robot_id: str, field: str, value: Any) -> bool:
+        # Returns True when the robot was seen for the first time.
+        idx = self._field_index[field]
+        with self._lock:
+            state = self._robots.get(robot_id)
+            is_new = state is None
+            if is_new:
+                state = self._robots[robot_id] = RobotState(robot_id, len(self.fields))
+                bisect.insort(self._order, robot_id)
+            state.values[idx] = value
+            state.last_seen = time.time()
+            self._dirty.add(robot_id)
+        return is_new
+
+    def get(self, robot_id: str, field: str) -> Any:
+        state = self._robots.get(robot_id)
+        if state is None:
+            return None
+        return state.values[self._field_index[field]]
+
+    def robot(self, robot_id: str) -> Optional[RobotState]:
+        return self._robots.get(robot_id)
+
+    def robot_ids(self, start: int = 0, stop: Optional[int] = None) -> List[str]:
+        with self._lock:
+            return self._order[start:stop]
+
+    def index_of(self, robot_id: str) -> int:
+        with self._lock:
+            i = bisect.bisect_left(self._order, robot_id)
+            if i < len(self._order) and self._order[i] == robot_id:
+                return i
+            return -1
+
+    def take_dirty(self) -> Set[str]:
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+        return dirty
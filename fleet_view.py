@@ -0,0 +1,131 @@
+import customtkinter as ctk
+from typing import Callable, List, Optional, Set
+
+from fleet import FleetStateStore, RobotState
+
+
+class FleetOverview(ctk.CTkFrame):
+    # Virtualized robot list: only as many row labels as fit in the visible
+    # area are created, and scrolling rebinds them to a different slice of
+    # the store instead of creating widgets per robot.
+
+    ROW_HEIGHT = 26
+    SELECTED_COLOR = "#1f538d"
+
+    def __init__(self,
+                 master,
+                 store: FleetStateStore,
+                 format_row: Callable[[RobotState], str],
+                 on_select: Callable[[str], None],
+                 header: str = ""):
+        super().__init__(master)
+        self._store = store
+        self._format_row = format_row
+        self._on_select = on_select
+        self._font = ctk.CTkFont(family="Consolas", size=13)
+
+        self._rows: List[ctk.CTkLabel] = []
+        self._row_ids: List[Optional[str]] = []
+        self._visible = 0
+        self._offset = 0
+        self._selected: Optional[str] = None
+
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(1, weight=1)
+        ctk.CTkLabel(self, text=header, font=self._font, anchor="w").grid(row=0, column=0, columnspan=2, padx=6, pady=(4, 2), sticky="ew")
+        self._body = ctk.CTkFrame(self, fg_color="transparent")
+        self._body.grid(row=1, column=0, sticky="nsew")
+        self._body.grid_columnconfigure(0, weight=1)
+        self._scrollbar = ctk.CTkScrollbar(self, command=self._on_scrollbar)
+        self._scrollbar.grid(row=1, column=1, sticky="ns")
+
+        self._body.bind("<Configure>", self._on_resize)
+        self._bind_wheel(self._body)
+
+    # --- API --------------------------------------------------------------
+    @property
+    def selected(self) -> Optional[str]:
+        return self._selected
+
+    def select(self, robot_id: Optional[str]):
+        self._selected = robot_id
+        self._render(None)
+
+    def refresh(self, _=None):
+        self._render(self._store.take_dirty())
+
+    def scroll_to(self, offset: int):
+        self._offset = offset
+        self._render(None)
+
+    # --- Rendering --------------------------------------------------------
+    def _render(self, dirty: Optional[Set[str]]):
+        # dirty=None re-renders every visible row
+        total = len(self._store)
+        self._offset = max(0, min(self._offset, total - self._visible))
+        ids = self._store.robot_ids(self._offset, self._offset + self._visible)
+
+        for i in range(self._visible):
+            rid = ids[i] if i < len(ids) else None
+            if dirty is not None and rid == self._row_ids[i] and rid not in dirty:
+                continue
+            self._row_ids[i] = rid
+            state = self._store.robot(rid) if rid is not None else None
+            self._rows[i].configure(
+                text=self._format_row(state) if state is not None else "",
+                fg_color=self.SELECTED_COLOR if rid is not None and rid == self._selected else "transparent",
+            )
+
+        if total:
+            self._scrollbar.set(self._offset / total, min(1.0, (self._offset + self._visible) / total))
+        else:
+            self._scrollbar.set(0.0, 1.0)
+
+    def _on_resize(self, event):
+        visible = max(1, event.height // self.ROW_HEIGHT)
+        if visible == self._visible:
+            return
+        while len(self._rows) < visible:
+            i = len(self._rows)
+            row = ctk.CTkLabel(self._body, text="", font=self._font, anchor="w", height=self.ROW_HEIGHT - 2, corner_radius=4)
+            row.bind("<Button-1>", lambda e, i=i: self._on_row_click(i))
+            self._bind_wheel(row)
+            self._rows.append(row)
+            self._row_ids.append(None)
+        for i, row in enumerate(self._rows):
+            if i < visible:
+                row.grid(row=i, column=0, sticky="ew", padx=4, pady=1)
+            else:
+                row.grid_remove()
+                self._row_ids[i] = None
+        self._visible = visible
+        self._render(None)
+
+    # --- Input ------------------------------------------------------------
+    def _on_row_click(self, i: int):
+        rid = self._row_ids[i] if i < len(self._row_ids) else None
+        if rid is None:
+            return
+        self.select(rid)
+        self._on_select(rid)
+
+    def _on_scrollbar(self, *args):
+        total = len(self._store)
+        if args[0] == "moveto":
+            self._offset = int(float(args[1]) * total)
+        elif args[0] == "scroll":
+            step = self._visible if args[2] == "pages" else 1
+            self._offset += int(args[1]) * step
+        self._render(None)
+
+    def _on_wheel(self, event):
+        if getattr(event, "num", None) == 4 or getattr(event, "delta", 0) > 0:
+            self._offset -= 3
+        else:
+            self._offset += 3
+        self._render(None)
+
+    def _bind_wheel(self, widget):
+        widget.bind("<MouseWheel>", self._on_wheel)
+        widget.bind("<Button-4>", self._on_wheel)
+        widget.bind("<Button-5>", self._on_wheel)
@@ -0,0 +1,210 @@
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+BLOCK = 256   # samples per pre-aggregated min/max block
+
+Series = Tuple[np.ndarray, np.ndarray]   # (timestamps, values)
+
+
+class RingSeries:
+    # Fixed-size (timestamp, value) ring buffer for one numeric topic.
+    # Alongside the raw samples it keeps a running min/max per BLOCK-sized
+    # slot, so downsample() over a long window reads ~n/BLOCK block summaries
+    # instead of every sample: a redraw costs O(width), not O(samples).
+    # append() runs on the MQTT thread, downsample() on the Tk thread.
+
+    def __init__(self, capacity: int):
+        self._nblocks = max(1, -(-capacity // BLOCK))
+        self.capacity = self._nblocks * BLOCK
+        self._t = np.zeros(self.capacity)
+        self._v = np.zeros(self.capacity)
+        self._bmin = np.zeros(self._nblocks)
+        self._bmax = np.zeros(self._nblocks)
+        self._bt0 = np.zeros(self._nblocks)
+        self._bt1 = np.zeros(self._nblocks)
+        self._head = 0     # next write position
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in (self._t, self._v, self._bmin, self._bmax, self._bt0, self._bt1))
+
+    def append(self, t: float, v: float):
+        with self._lock:
+            i = self._head
+            self._t[i] = t
+            self._v[i] = v
+            b, off = divmod(i, BLOCK)
+            if off == 0:
+                self._bmin[b] = self._bmax[b] = v
+                self._bt0[b] = t
+            elif v < self._bmin[b]:
+                self._bmin[b] = v
+            elif v > self._bmax[b]:
+                self._bmax[b] = v
+            self._bt1[b] = t
+            self._head = (i + 1) % self.capacity
+            if self._size < self.capacity:
+                self._size += 1
+
+    def clear(self):
+        with self._lock:
+            self._head = self._size = 0
+
+    def last(self) -> Optional[Tuple[float, float]]:
+        with self._lock:
+            if not self._size:
+                return None
+            i = self._head - 1
+            return float(self._t[i]), float(self._v[i])
+
+    def window(self, t0: float = -np.inf, t1: float = np.inf) -> Series:
+        # Samples with t0 <= t <= t1, oldest first (copies).
+        with self._lock:
+            return self._window(t0, t1)
+
+    def downsample(self, t0: float, t1: float, width: int, method: str = "minmax") -> Series:
+        # At most ~2*width points covering [t0, t1] for a `width`-pixel plot.
+        width = max(1, int(width))
+        with self._lock:
+            count = sum(hi - lo for lo, hi in self._ranges(t0, t1))
+            if count <= 2 * width:
+                return self._window(t0, t1)
+            if method == "lttb":
+                # min/max pre-pass bounds the LTTB input to 4*width points
+                t, v = self._minmax(t0, t1, 2 * width, count)
+                return lttb(t, v, width)
+            return self._minmax(t0, t1, width, count)
+
+    # --- Internals --------------------------------------------------------
+    def _segments(self) -> List[Tuple[int, int]]:
+        # Chronological index ranges of the stored samples.
+        if self._size < self.capacity:
+            return [(0, self._size)]
+        return [(self._head, self.capacity), (0, self._head)]
+
+    def _ranges(self, t0: float, t1: float) -> List[Tuple[int, int]]:
+        out = []
+        for lo, hi in self._segments():
+            ts = self._t[lo:hi]
+            a = lo + int(np.searchsorted(ts, t0, "left"))
+            b = lo + int(np.searchsorted(ts, t1, "right"))
+            if a < b:
+                out.append((a, b))
+        return out
+
+    def _window(self, t0: float, t1: float) -> Series:
+        ranges = self._ranges(t0, t1)
+        if not ranges:
+            return np.empty(0), np.empty(0)
+        if len(ranges) == 1:
+            lo, hi = ranges[0]
+            return self._t[lo:hi].copy(), self._v[lo:hi].copy()
+        return (np.concatenate([self._t[lo:hi] for lo, hi in ranges]),
+                np.concatenate([self._v[lo:hi] for lo, hi in ranges]))
+
+    def _block_order(self) -> np.ndarray:
+        # Chronological block slots; the slot being written is the newest.
+        hb, off = divmod(self._head, BLOCK)
+        if self._size < self.capacity:
+            return np.arange(hb + (1 if off else 0))
+        start = hb + 1 if off else hb
+        return (np.arange(self._nblocks) + start) % self._nblocks
+
+    def _minmax(self, t0: float, t1: float, buckets: int, count: int) -> Series:
+        if count >= buckets * BLOCK:
+            # every bucket spans at least one block: aggregate the summaries
+            order = self._block_order()
+            bt0, bt1 = self._bt0[order], self._bt1[order]
+            keep = (bt1 >= t0) & (bt0 <= t1)
+            return _bucket_minmax(bt0[keep], bt1[keep], self._bmin[order][keep], self._bmax[order][keep],
+                                  t0, t1, buckets)
+        t, v = self._window(t0, t1)
+        return _bucket_minmax(t, t, v, v, t0, t1, buckets)
+
+
+def _bucket_minmax(ts: np.ndarray, te: np.ndarray, vmin: np.ndarray, vmax: np.ndarray,
+                   t0: float, t1: float, buckets: int) -> Series:
+    # Groups time-sorted spans into `buckets` equal time slices and emits the
+    # (first, min) and (last, max) points of every non-empty slice.
+    if not len(ts):
+        return np.empty(0), np.empty(0)
+    edges = np.searchsorted(ts, np.linspace(t0, t1, buckets + 1)[1:-1], "left")
+    starts = np.unique(np.concatenate(([0], edges)))
+    starts = starts[starts < len(ts)]
+    ends = np.append(starts[1:], len(ts)) - 1
+    out_t = np.empty(2 * len(starts))
+    out_v = np.empty(2 * len(starts))
+    out_t[0::2] = ts[starts]
+    out_t[1::2] = te[ends]
+    out_v[0::2] = np.minimum.reduceat(vmin, starts)
+    out_v[1::2] = np.maximum.reduceat(vmax, starts)
+    return out_t, out_v
+
+
+def lttb(t: np.ndarray, v: np.ndarray, n_out: int) -> Series:
+    # Largest-Triangle-Three-Buckets downsampling to n_out points. Bucket
+    # averages are vectorized; the sequential pick runs on plain floats since
+    # buckets are small after the min/max pre-pass.
+    n = len(t)
+    if n_out >= n or n_out < 3:
+        return t, v
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    bounds = np.append(edges, n)
+    counts = np.diff(bounds)
+    mean_t = (np.add.reduceat(t, bounds[:-1]) / counts).tolist()
+    mean_v = (np.add.reduceat(v, bounds[:-1]) / counts).tolist()
+    tl, vl, el = t.tolist(), v.tolist(), edges.tolist()
+    idx = [0]
+    a = 0
+    for i in range(n_out - 2):
+        ta, va = tl[a], vl[a]
+        ct, cv = mean_t[i + 1], mean_v[i + 1]
+        best, a = -1.0, el[i]
+        for j in range(el[i], el[i + 1]):
+            area = abs((ta - ct) * (vl[j] - va) - (ta - tl[j]) * (cv - va))
+            if area > best:
+                best, a = area, j
+        idx.append(a)
+    idx.append(n - 1)
+    return t[idx], v[idx]
+
+
+class HistoryStore:
+    # Per-topic numeric history (one RingSeries per key, created on first use).
+
+    def __init__(self, capacity: int = 200 * 3600):
+        self.capacity = capacity
+        self._series: Dict[str, RingSeries] = {}
+        self._lock = threading.Lock()
+
+    def series(self, key: str) -> RingSeries:
+        s = self._series.get(key)
+        if s is None:
+            with self._lock:
+                s = self._series.setdefault(key, RingSeries(self.capacity))
+        return s
+
+    def record(self, key: str, t: float, value) -> bool:
+        # Non-numeric values (None, text) are skipped.
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            return False
+        self.series(key).append(t, value)
+        return True
+
+    def clear(self):
+        for s in list(self._series.values()):
+            s.clear()
+
+    def keys(self) -> List[str]:
+        return list(self._series)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(s.nbytes for s in list(self._series.values()))
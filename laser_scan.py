@@ -0,0 +1,138 @@
+import json
+import math
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+class LaserScan:
+    # One range scan: ranges[i] (metres) measured at angle_min + i *
+    # angle_increment (radians, 0 = robot forward, counter-clockwise), same
+    # fields as a ROS sensor_msgs/LaserScan. Ranges outside
+    # [range_min, range_max] or not finite are invalid (no return).
+    # Compared by identity, so every received scan counts as a change.
+
+    __slots__ = ("ranges", "angle_min", "angle_increment", "range_min", "range_max")
+
+    def __init__(self,
+                 ranges: np.ndarray,
+                 angle_min: float = -math.pi,
+                 angle_increment: Optional[float] = None,
+                 range_min: float = 0.0,
+                 range_max: float = math.inf):
+        self.ranges = ranges
+        self.angle_min = float(angle_min)
+        # default: the points span one full turn
+        self.angle_increment = 2 * math.pi / max(len(ranges), 1) if angle_increment is None else float(angle_increment)
+        self.range_min = float(range_min)
+        self.range_max = float(range_max)
+
+    def __len__(self) -> int:
+        return len(self.ranges)
+
+    def valid(self) -> np.ndarray:
+        r = self.ranges
+        return np.isfinite(r) & (r >= self.range_min) & (r <= self.range_max)
+
+    def nearest(self) -> Optional[float]:
+        # closest valid return in metres, None if there is none
+        r = self.ranges[self.valid()]
+        return float(r.min()) if len(r) else None
+
+    def full_turn(self) -> bool:
+        return abs(len(self.ranges) * self.angle_increment) >= 2 * math.pi - 1e-6
+
+    def as_json(self) -> dict:
+        # summary for JSON consumers (the ranges themselves stay binary)
+        return {"points": len(self.ranges), "nearest": self.nearest(), "angle_min": self.angle_min,
+                "angle_increment": self.angle_increment, "range_max": self.range_max}
+
+
+# --- Codecs -------------------------------------------------------------------
+# payloads codec "scan": packed little-endian float32 ranges spanning one full
+# turn from -pi, read in place with np.frombuffer (no copy).
+# payloads codec "scan_json": {"ranges": [...], "angle_min", "angle_increment",
+# "range_min", "range_max"} with the optional fields defaulting as above.
+def decode_scan(buf) -> Optional[LaserScan]:
+    n = len(buf)
+    if n == 0 or n % 4:
+        return None
+    return LaserScan(np.frombuffer(buf, dtype="<f4"))
+
+
+def decode_scan_json(buf) -> Optional[LaserScan]:
+    try:
+        msg = json.loads(bytes(buf))
+        ranges = np.asarray(msg["ranges"], dtype=np.float32)
+        if ranges.ndim != 1 or not len(ranges):
+            return None
+        return LaserScan(ranges,
+                         msg.get("angle_min", -math.pi),
+                         msg.get("angle_increment"),
+                         msg.get("range_min", 0.0),
+                         msg.get("range_max", math.inf))
+    except (ValueError, TypeError, KeyError):
+        return None
+
+
+# --- Projection ---------------------------------------------------------------
+class ScanProjector:
+    # Scan -> canvas polyline coordinates in one vectorized pass: invalid
+    # returns dropped, decimated to the canvas resolution, then polar to
+    # pixels with cached cos/sin tables (the geometry of a sensor rarely
+    # changes). Decimation bins the returns into angular columns, one per
+    # `min_px` of canvas width over a full turn, and keeps the nearest and
+    # the farthest return of each column (just one when they are less than
+    # `min_px` apart), so the polyline has at most two vertices per column
+    # however dense the scan. Robot forward is up, its left is canvas left.
+
+    def __init__(self, min_px: float = 1.0):
+        self.min_px = max(float(min_px), 1e-3)
+        self._geometry: Optional[Tuple[int, float, float, int]] = None
+        self._sin = self._cos = np.empty(0, dtype=np.float32)
+        self._column = np.empty(0, dtype=np.int32)
+
+    def project(self, scan: LaserScan, cx: float, cy: float, px_per_m: float) -> np.ndarray:
+        # (N, 2) float32 canvas points in scan order, N <= 2 * columns
+        columns = max(int(math.ceil(2.0 * max(cx, cy) / self.min_px)), 1)
+        self._tables(scan, columns)
+        idx = np.flatnonzero(scan.valid())
+        if len(idx) > 2:
+            idx = self._decimate(idx, scan.ranges[idx], px_per_m)
+        r = scan.ranges[idx] * np.float32(px_per_m)
+        pts = np.empty((len(r), 2), dtype=np.float32)
+        np.multiply(r, self._sin[idx], out=pts[:, 0])
+        np.multiply(r, self._cos[idx], out=pts[:, 1])
+        np.subtract(np.float32(cx), pts[:, 0], out=pts[:, 0])
+        np.subtract(np.float32(cy), pts[:, 1], out=pts[:, 1])
+        return pts
+
+    def coords(self, scan: LaserScan, cx: float, cy: float, px_per_m: float) -> list:
+        # flat [x0, y0, x1, y1, ...] for Canvas.coords(); a full-turn scan
+        # is closed back to its first point
+        pts = self.project(scan, cx, cy, px_per_m)
+        if len(pts) > 2 and scan.full_turn():
+            pts = np.concatenate((pts, pts[:1]))
+        return pts.ravel().tolist()
+
+    # --- Internals --------------------------------------------------------
+    def _tables(self, scan: LaserScan, columns: int):
+        geometry = (len(scan.ranges), scan.angle_min, scan.angle_increment, columns)
+        if geometry != self._geometry:
+            n = np.arange(len(scan.ranges))
+            angles = scan.angle_min + n * scan.angle_increment
+            self._sin = np.sin(angles).astype(np.float32)
+            self._cos = np.cos(angles).astype(np.float32)
+            # column of each return; non-decreasing in scan order
+            self._column = (n * (abs(scan.angle_increment) * columns / (2 * math.pi))).astype(np.int32)
+            self._geometry = geometry
+
+    def _decimate(self, idx: np.ndarray, r: np.ndarray, px_per_m: float) -> np.ndarray:
+        # indices (scan order) of the nearest/farthest valid return per column
+        col = self._column[idx]
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(col)) + 1))
+        ends = np.append(starts[1:], len(idx)) - 1
+        order = np.lexsort((r, col))        # by column, then range
+        near, far = order[starts], order[ends]
+        apart = (r[far] - r[near]) * np.float32(px_per_m) >= self.min_px
+        return idx[np.union1d(near, far[apart])]
@@ -0,0 +1,40 @@
+import time
+from dataclasses import dataclass, field
+from typing import Optional, Tuple
+
+DEBUG = "DEBUG"
+INFO = "INFO"
+WARN = "WARN"
+ERROR = "ERROR"
+
+# direction of the entry: published, received, or the dashboard itself
+PUB = "PUB"
+SUB = "SUB"
+SYS = "SYS"
+
+
+@dataclass(frozen=True)
+class LogRecord:
+    # Structured log entry. `message` is a str.format template and `args` are
+    # only substituted in format(), i.e. when the line is actually displayed.
+    message: str
+    args: Tuple = ()
+    level: str = INFO
+    topic: Optional[str] = None
+    timestamp: float = field(default_factory=time.time)
+    direction: str = SYS
+
+    def text(self) -> str:
+        if not self.args:
+            return self.message
+        try:
+            return self.message.format(*self.args)
+        except Exception:
+            return f"{self.message} {self.args!r}"
+
+    def format(self) -> str:
+        clock = time.strftime("%H:%M:%S", time.localtime(self.timestamp))
+        if self.level == INFO:
+            return f"{clock} {self.text()}"
+        return f"{clock} ({self.level}) {self.text()}"
+
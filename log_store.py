@@ -0,0 +1,304 @@
+import bisect
+import threading
+from array import array
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from log_record import PUB, SUB, SYS, LogRecord
+
+_DIRECTIONS = (SYS, PUB, SUB)
+_DIRECTION_CODE = {d: i for i, d in enumerate(_DIRECTIONS)}
+
+
+class LogFilter(NamedTuple):
+    direction: Optional[str] = None     # PUB / SUB / SYS, None = all
+    topic_prefix: str = ""
+    text: str = ""                      # case-insensitive substring
+    since: Optional[float] = None       # epoch seconds, inclusive
+    until: Optional[float] = None       # epoch seconds, exclusive
+
+
+_ALL = LogFilter()
+
+
+class LogStore:
+    # Append-only log of LogRecords, addressed by a monotonically increasing
+    # sequence number (seq) and indexed as it grows:
+    #   direction  PUB/SUB/SYS -> sorted seqs
+    #   topic      interned topic id -> sorted seqs (a prefix filter unions
+    #              the lists of the matching topics, there are few of them)
+    #   time       per-entry timestamps, searched with bisect
+    #   text       lower-cased message text as a byte-string array per chunk
+    #              of TEXT_CHUNK entries, built on the first search and
+    #              scanned with np.char.find instead of entry by entry
+    # Old entries are evicted in chunks once `capacity` is exceeded.
+    #
+    # append()/extend() and query() may run on different threads.
+
+    TEXT_CHUNK = 4096
+
+    def __init__(self, capacity: int = 1_000_000):
+        self.capacity = max(1, int(capacity))
+        self._evict_slack = max(1, self.capacity // 10)
+        self._lock = threading.Lock()
+
+        self._records: List[LogRecord] = []
+        self._times = array("d")
+        self._dirs = bytearray()
+        self._tids = array("I")
+        self._base = 0          # seq of self._records[0]
+
+        self._topic_ids: Dict[str, int] = {}
+        self._topic_names: List[Optional[str]] = [None]     # id 0: no topic
+        self._by_direction: Dict[int, array] = {i: array("q") for i in range(len(_DIRECTIONS))}
+        self._by_topic: Dict[int, array] = {}
+        self._text_chunks: Dict[int, np.ndarray] = {}
+
+        # counters
+        self.appended = 0
+        self.evicted = 0
+
+    # --- API --------------------------------------------------------------
+    def append(self, record: LogRecord) -> int:
+        with self._lock:
+            return self._append(record)
+
+    def extend(self, records: Iterable[LogRecord]) -> int:
+        with self._lock:
+            n = 0
+            for record in records:
+                self._append(record)
+                n += 1
+            return n
+
+    def clear(self):
+        with self._lock:
+            self.evicted += len(self._records)
+            self._base += len(self._records)
+            del self._records[:]
+            del self._times[:]
+            del self._dirs[:]
+            del self._tids[:]
+            for index in self._by_direction.values():
+                del index[:]
+            self._by_topic.clear()
+            self._topic_ids.clear()
+            del self._topic_names[1:]
+            self._text_chunks.clear()
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    @property
+    def first_seq(self) -> int:
+        return self._base
+
+    @property
+    def next_seq(self) -> int:
+        return self._base + len(self._records)
+
+    def get(self, seq: int) -> Optional[LogRecord]:
+        i = seq - self._base
+        records = self._records
+        return records[i] if 0 <= i < len(records) else None
+
+    def topics(self) -> List[str]:
+        with self._lock:
+            return sorted(self._topic_ids)
+
+    def query(self, flt: LogFilter = _ALL, previous: Optional["LogQuery"] = None) -> "LogQuery":
+        # A new query over the current contents. If every match of `flt` is
+        # also a match of `previous` (the user kept typing into the search
+        # box), the previous matches are refined instead of starting over.
+        q = LogQuery(self, flt)
+        if previous is not None and previous._store is self and _narrows(previous.filter, flt):
+            previous.update()
+            q._scanned = previous._scanned
+            q._seqs = self._select(flt, self._base, q._scanned, within=previous._seqs)
+        else:
+            q._scanned = self.next_seq
+            q._seqs = self._select(flt, self._base, q._scanned)
+        return q
+
+    # --- Internals --------------------------------------------------------
+    def _append(self, record: LogRecord) -> int:
+        seq = self._base + len(self._records)
+        self._records.append(record)
+        self._times.append(record.timestamp)
+        code = _DIRECTION_CODE.get(record.direction, 0)
+        self._dirs.append(code)
+        self._by_direction[code].append(seq)
+        tid = 0
+        if record.topic is not None:
+            tid = self._topic_ids.get(record.topic)
+            if tid is None:
+                tid = self._topic_ids[record.topic] = len(self._topic_names)
+                self._topic_names.append(record.topic)
+                self._by_topic[tid] = array("q")
+            self._by_topic[tid].append(seq)
+        self._tids.append(tid)
+        self.appended += 1
+        if len(self._records) >= self.capacity + self._evict_slack:
+            self._evict(len(self._records) - self.capacity)
+        return seq
+
+    def _evict(self, n: int):
+        del self._records[:n]
+        del self._times[:n]
+        del self._dirs[:n]
+        del self._tids[:n]
+        self._base += n
+        self.evicted += n
+        for index in self._by_direction.values():
+            del index[:bisect.bisect_left(index, self._base)]
+        for tid, index in list(self._by_topic.items()):
+            del index[:bisect.bisect_left(index, self._base)]
+            if not index:
+                del self._by_topic[tid]
+                del self._topic_ids[self._topic_names[tid]]
+                self._topic_names[tid] = None
+        for c in [c for c in self._text_chunks if (c + 1) * self.TEXT_CHUNK <= self._base]:
+            del self._text_chunks[c]
+
+    def _select(self, flt: LogFilter, lo: int, hi: int, within: Optional[array] = None) -> array:
+        # seqs in [lo, hi) matching `flt`; `within` is a sorted superset of
+        # the result (e.g. the previous query's matches)
+        with self._lock:
+            lo, hi = self._seq_range(flt, max(lo, self._base), min(hi, self.next_seq))
+            if lo >= hi:
+                return array("q")
+            if within is not None:
+                candidates = within[bisect.bisect_left(within, lo):bisect.bisect_left(within, hi)]
+            elif flt.direction is not None or flt.topic_prefix:
+                candidates = self._candidates(flt, lo, hi)
+            elif not flt.text:
+                return array("q", np.arange(lo, hi, dtype=np.int64).tobytes())
+            else:
+                candidates = None   # every entry in range
+            if not flt.text:
+                return candidates
+            needle = flt.text.lower()
+            if candidates is None or len(candidates) * 16 > hi - lo:
+                # many candidates: one vectorized pass over the chunked
+                # text, then check the hits against the other filters
+                return self._check(flt, self._scan_text(needle, lo, hi))
+            get = self.get
+            return array("q", [s for s in candidates if needle in get(s).text().lower()])
+
+    def _seq_range(self, flt: LogFilter, lo: int, hi: int):
+        # narrow [lo, hi) by the time bounds (timestamps are append-ordered)
+        times, base = self._times, self._base
+        if flt.since is not None:
+            lo = max(lo, base + bisect.bisect_left(times, flt.since, lo - base, hi - base))
+        if flt.until is not None:
+            hi = min(hi, base + bisect.bisect_left(times, flt.until, lo - base, hi - base))
+        return lo, hi
+
+    def _topic_set(self, prefix: str) -> List[int]:
+        return [tid for topic, tid in self._topic_ids.items() if topic.startswith(prefix)]
+
+    def _candidates(self, flt: LogFilter, lo: int, hi: int) -> array:
+        # seqs in [lo, hi) that satisfy the direction and topic filters
+        if flt.topic_prefix:
+            parts = []
+            for tid in self._topic_set(flt.topic_prefix):
+                index = self._by_topic[tid]
+                a, b = bisect.bisect_left(index, lo), bisect.bisect_left(index, hi)
+                parts.append(np.frombuffer(index[a:b], dtype=np.int64))
+            seqs = np.sort(np.concatenate(parts)) if parts else np.empty(0, dtype=np.int64)
+            if flt.direction is not None:
+                dirs = np.frombuffer(bytes(self._dirs), dtype=np.uint8)
+                seqs = seqs[dirs[seqs - self._base] == _DIRECTION_CODE[flt.direction]]
+            return array("q", seqs.tobytes())
+        index = self._by_direction[_DIRECTION_CODE[flt.direction]]
+        return index[bisect.bisect_left(index, lo):bisect.bisect_left(index, hi)]
+
+    def _check(self, flt: LogFilter, seqs: np.ndarray) -> array:
+        # direction/topic filters applied to an explicit list of seqs
+        if flt.direction is not None:
+            dirs = np.frombuffer(bytes(self._dirs), dtype=np.uint8)
+            seqs = seqs[dirs[seqs - self._base] == _DIRECTION_CODE[flt.direction]]
+        if flt.topic_prefix:
+            tids = np.frombuffer(self._tids.tobytes(), dtype=np.uint32)
+            seqs = seqs[np.isin(tids[seqs - self._base], self._topic_set(flt.topic_prefix))]
+        return array("q", seqs.astype(np.int64).tobytes())
+
+    def _scan_text(self, needle: str, lo: int, hi: int) -> np.ndarray:
+        # seqs in [lo, hi) whose text contains `needle` (already lower-cased)
+        pattern = needle.encode("utf-8")
+        parts = []
+        size = self.TEXT_CHUNK
+        for c in range(lo // size, (hi - 1) // size + 1):
+            first, texts = self._chunk_text(c)
+            a, b = max(lo - first, 0), min(hi - first, len(texts))
+            hits = np.flatnonzero(np.char.find(texts[a:b], pattern) >= 0)
+            parts.append(hits + (first + a))
+        return np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+
+    def _chunk_text(self, c: int) -> Tuple[int, np.ndarray]:
+        # (first seq, lower-cased utf-8 text per entry); complete chunks are
+        # cached, partial head/tail chunks are rebuilt
+        size = self.TEXT_CHUNK
+        start = c * size
+        cached = self._text_chunks.get(c)
+        if cached is not None:
+            return start, cached
+        first = max(start, self._base)
+        end = min(start + size, self.next_seq)
+        texts = np.array([r.text().lower().encode("utf-8")
+                          for r in self._records[first - self._base:end - self._base]], dtype="S")
+        if first == start and end == start + size:
+            self._text_chunks[c] = texts
+        return first, texts
+
+
+def _narrows(old: LogFilter, new: LogFilter) -> bool:
+    # True if every match of `new` is also a match of `old`
+    return (old._replace(text="", since=None) == new._replace(text="", since=None)
+            and old.text.lower() in new.text.lower()
+            and (old.since is None or (new.since is not None and new.since >= old.since)))
+
+
+class LogQuery:
+    # The matches of a LogFilter as an ordered list of seqs. update() folds in
+    # entries appended since the query was made (only those are examined) and
+    # drops evicted ones, so a live view stays O(new entries) per refresh.
+
+    def __init__(self, store: LogStore, flt: LogFilter):
+        self._store = store
+        self.filter = flt
+        self._seqs = array("q")
+        self._scanned = 0
+
+    def update(self) -> int:
+        # returns the number of new matches
+        store = self._store
+        seqs = self._seqs
+        if seqs and seqs[0] < store.first_seq:
+            del seqs[:bisect.bisect_left(seqs, store.first_seq)]
+        hi = store.next_seq
+        if hi <= self._scanned:
+            return 0
+        new = store._select(self.filter, self._scanned, hi)
+        self._scanned = hi
+        seqs.extend(new)
+        return len(new)
+
+    def expire(self, since: float) -> int:
+        # sliding time window: drops matches older than `since`
+        store, seqs = self._store, self._seqs
+        first = store.first_seq + bisect.bisect_left(store._times, since)
+        n = bisect.bisect_left(seqs, first)
+        del seqs[:n]
+        return n
+
+    def __len__(self) -> int:
+        return len(self._seqs)
+
+    def seqs(self, start: int, stop: int) -> array:
+        return self._seqs[start:stop]
+
+    def records(self, start: int, stop: int) -> List[LogRecord]:
+        get = self._store.get
+        return [r for r in map(get, self._seqs[start:stop]) if r is not None]
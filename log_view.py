@@ -0,0 +1,235 @@
+import time
+from collections import deque
+from typing import Deque, List, Optional
+
+import customtkinter as ctk
+
+from log_record import ERROR, PUB, SUB, SYS, WARN, LogRecord
+from log_store import LogFilter, LogQuery, LogStore
+
+
+class LogView(ctk.CTkFrame):
+    # Filterable log viewer over a LogStore. Records are queued by append()
+    # (safe from any thread), moved into the store in batches on a timer and
+    # rendered through a fixed pool of row labels sized to the visible area,
+    # so neither the store size nor the filter result size affects redraw
+    # cost. The view follows the tail while scrolled to the bottom.
+    #
+    # Filters: direction (All/PUB/SUB/SYS), topic prefix, free-text search and
+    # a time window. Typing into the search box refines the previous result
+    # instead of querying the store again.
+
+    ROW_HEIGHT = 18
+    FILTER_DELAY_MS = 150
+    DIRECTIONS = {"All": None, "PUB": PUB, "SUB": SUB, "SYS": SYS}
+    WINDOWS = {"All time": None, "1 min": 60, "10 min": 600, "1 h": 3600}
+    LEVEL_COLORS = {ERROR: "#ff6b6b", WARN: "#ffb347"}
+
+    def __init__(self,
+                 master,
+                 capacity: int = 1_000_000,
+                 flush_ms: int = 200):
+        super().__init__(master, fg_color="transparent")
+        self.store = LogStore(capacity)
+        self.flush_ms = max(10, int(flush_ms))
+        self._pending: Deque[LogRecord] = deque(maxlen=max(1, int(capacity)))
+        self._query: LogQuery = self.store.query()
+        self._font = ctk.CTkFont(family="Consolas", size=12)
+        self._text_color = ctk.ThemeManager.theme["CTkLabel"]["text_color"]
+
+        self._rows: List[ctk.CTkLabel] = []
+        self._row_seqs: List[Optional[int]] = []
+        self._visible = 0
+        self._offset = 0
+        self._follow = True
+        self._window_s: Optional[float] = None
+        self._after_id = None
+        self._filter_after_id = None
+        self._running = False
+
+        # counters
+        self.dropped = 0
+        self.flushed = 0
+
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(1, weight=1)
+
+        # filter bar
+        bar = ctk.CTkFrame(self, fg_color="transparent")
+        bar.grid(row=0, column=0, columnspan=2, sticky="ew", pady=(0, 4))
+        bar.grid_columnconfigure((0, 1), weight=1)
+        self._direction = ctk.CTkSegmentedButton(bar, values=list(self.DIRECTIONS), command=self._on_filter_changed)
+        self._direction.set("All")
+        self._direction.grid(row=0, column=0, padx=2, pady=2, sticky="ew")
+        self._window = ctk.CTkOptionMenu(bar, values=list(self.WINDOWS), width=90, command=self._on_filter_changed)
+        self._window.grid(row=0, column=1, padx=2, pady=2, sticky="e")
+        self._topic_entry = ctk.CTkEntry(bar, placeholder_text="topic prefix")
+        self._topic_entry.grid(row=1, column=0, padx=2, pady=2, sticky="ew")
+        self._search_entry = ctk.CTkEntry(bar, placeholder_text="search")
+        self._search_entry.grid(row=1, column=1, padx=2, pady=2, sticky="ew")
+        for entry in (self._topic_entry, self._search_entry):
+            entry.bind("<KeyRelease>", self._on_filter_changed)
+
+        # rows
+        self._body = ctk.CTkFrame(self, fg_color=("gray86", "gray17"))
+        self._body.grid(row=1, column=0, sticky="nsew")
+        self._body.grid_columnconfigure(0, weight=1)
+        self._body.grid_propagate(False)
+        self._scrollbar = ctk.CTkScrollbar(self, command=self._on_scrollbar)
+        self._scrollbar.grid(row=1, column=1, sticky="ns")
+        self._status = ctk.CTkLabel(self, text="", anchor="w", font=ctk.CTkFont(size=11))
+        self._status.grid(row=2, column=0, columnspan=2, sticky="ew")
+
+        self._body.bind("<Configure>", self._on_resize)
+        self._bind_wheel(self._body)
+
+    # --- API --------------------------------------------------------------
+    def start(self):
+        self._running = True
+        if self._after_id is None:
+            self._after_id = self.after(self.flush_ms, self._tick)
+
+    def stop(self):
+        self._running = False
+        for attr in ("_after_id", "_filter_after_id"):
+            after_id = getattr(self, attr)
+            if after_id is not None:
+                try:
+                    self.after_cancel(after_id)
+                except Exception:
+                    pass
+                setattr(self, attr, None)
+
+    def append(self, record: LogRecord):
+        if len(self._pending) == self._pending.maxlen:
+            self.dropped += 1
+        self._pending.append(record)
+
+    def clear(self):
+        self._pending.clear()
+        self.store.clear()
+        self._query = self.store.query(self._query.filter)
+        self._offset = 0
+        self._follow = True
+        self._render()
+
+    def flush(self) -> int:
+        pending = self._pending
+        batch: List[LogRecord] = []
+        while pending:
+            try:
+                batch.append(pending.popleft())
+            except IndexError:
+                break
+        if batch:
+            self.store.extend(batch)
+            self.flushed += len(batch)
+        changed = self._query.update()
+        if self._window_s:
+            # the time window slides even without new records
+            changed += self._query.expire(time.time() - self._window_s)
+        if changed or batch:
+            self._render()
+        return len(batch)
+
+    def set_filter(self, flt: LogFilter):
+        self._query = self.store.query(flt, previous=self._query)
+        self._offset = 0
+        self._follow = True
+        self._render()
+
+    # --- Rendering --------------------------------------------------------
+    def _render(self):
+        total = len(self._query)
+        if self._follow:
+            self._offset = total - self._visible
+        self._offset = max(0, min(self._offset, total - self._visible))
+        self._follow = self._offset + self._visible >= total
+        seqs = self._query.seqs(self._offset, self._offset + self._visible)
+        get = self.store.get
+
+        for i in range(self._visible):
+            seq = seqs[i] if i < len(seqs) else None
+            if seq == self._row_seqs[i]:
+                continue
+            self._row_seqs[i] = seq
+            record = get(seq) if seq is not None else None
+            if record is None:
+                self._rows[i].configure(text="")
+            else:
+                self._rows[i].configure(text=record.format(),
+                                        text_color=self.LEVEL_COLORS.get(record.level, self._text_color))
+
+        if total:
+            self._scrollbar.set(self._offset / total, min(1.0, (self._offset + self._visible) / total))
+        else:
+            self._scrollbar.set(0.0, 1.0)
+        self._status.configure(text=f"{total:,} of {len(self.store):,} entries")
+
+    def _on_resize(self, event):
+        visible = max(1, event.height // self.ROW_HEIGHT)
+        if visible == self._visible:
+            return
+        while len(self._rows) < visible:
+            row = ctk.CTkLabel(self._body, text="", font=self._font, anchor="w", height=self.ROW_HEIGHT)
+            self._bind_wheel(row)
+            self._rows.append(row)
+            self._row_seqs.append(None)
+        for i, row in enumerate(self._rows):
+            if i < visible:
+                row.grid(row=i, column=0, sticky="ew", padx=4)
+            else:
+                row.grid_remove()
+            self._row_seqs[i] = None
+        self._visible = visible
+        self._render()
+
+    # --- Input ------------------------------------------------------------
+    def _current_filter(self) -> LogFilter:
+        window = self._window_s = self.WINDOWS[self._window.get()]
+        return LogFilter(direction=self.DIRECTIONS[self._direction.get()],
+                         topic_prefix=self._topic_entry.get().strip(),
+                         text=self._search_entry.get(),
+                         since=time.time() - window if window else None)
+
+    def _on_filter_changed(self, _=None):
+        # debounce typing; the query itself runs once the user pauses
+        if self._filter_after_id is not None:
+            self.after_cancel(self._filter_after_id)
+        self._filter_after_id = self.after(self.FILTER_DELAY_MS, self._apply_filter)
+
+    def _apply_filter(self):
+        self._filter_after_id = None
+        self.set_filter(self._current_filter())
+
+    def _scroll(self, offset: int):
+        self._offset = offset
+        self._follow = False
+        self._render()
+
+    def _on_scrollbar(self, *args):
+        total = len(self._query)
+        if args[0] == "moveto":
+            self._scroll(int(float(args[1]) * total))
+        elif args[0] == "scroll":
+            step = self._visible if args[2] == "pages" else 1
+            self._scroll(self._offset + int(args[1]) * step)
+
+    def _on_wheel(self, event):
+        if getattr(event, "num", None) == 4 or getattr(event, "delta", 0) > 0:
+            self._scroll(self._offset - 3)
+        else:
+            self._scroll(self._offset + 3)
+
+    def _bind_wheel(self, widget):
+        widget.bind("<MouseWheel>", self._on_wheel)
+        widget.bind("<Button-4>", self._on_wheel)
+        widget.bind("<Button-5>", self._on_wheel)
+
+    def _tick(self):
+        self._after_id = None
+        try:
+            self.flush()
+        finally:
+            if self._running:
+                self._after_id = self.after(self.flush_ms, self._tick)
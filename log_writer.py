@@ -0,0 +1,230 @@
+import base64
+import gzip
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Deque, List, NamedTuple, Optional, Tuple
+
+from log_record import LogRecord
+
+DEFAULT_DIR = os.path.join(os.path.expanduser("~"), ".mqtt_dashboard", "logs")
+
+
+class WriterStats(NamedTuple):
+    records: int        # log records written
+    telemetry: int      # telemetry messages written
+    bytes: int          # uncompressed bytes written
+    dropped: int        # rejected because the queue was full, or lost to a write error
+    pending: int        # queued, not yet written
+    rotations: int
+    errors: int
+    rate: float         # records + messages per second, last interval
+    byte_rate: float
+
+
+class RotatingFile:
+    # Append-only file that rolls over to a new timestamped file once it
+    # holds `max_bytes` (uncompressed) or is `max_age_s` old, and deletes the
+    # oldest files past `keep`. Opened lazily on the first write, so an idle
+    # stream leaves no empty files. Writer thread only.
+
+    def __init__(self,
+                 directory: str,
+                 prefix: str,
+                 suffix: str,
+                 max_bytes: int = 16 << 20,
+                 max_age_s: float = 3600.0,
+                 compress: bool = False,
+                 keep: int = 20):
+        self.directory = directory
+        self.prefix = prefix
+        self.suffix = suffix + (".gz" if compress else "")
+        self.max_bytes = max_bytes
+        self.max_age_s = max_age_s
+        self.compress = compress
+        self.keep = keep
+        self.path: Optional[str] = None
+        self._f = None
+        self._opened = 0.0
+        self._size = 0
+
+        # counters
+        self.rotations = 0
+
+    def write(self, data: bytes):
+        if self._f is not None and (self._size >= self.max_bytes
+                                    or time.monotonic() - self._opened >= self.max_age_s):
+            self.close()
+            self.rotations += 1
+        if self._f is None:
+            self._open()
+        self._f.write(data)
+        self._size += len(data)
+
+    def flush(self):
+        if self._f is not None:
+            self._f.flush()
+
+    def close(self):
+        if self._f is not None:
+            f, self._f = self._f, None
+            f.close()
+
+    # --- Internals --------------------------------------------------------
+    def _open(self):
+        now = time.time()
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(now)) + f"-{int(now * 1000) % 1000:03d}"
+        self.path = os.path.join(self.directory, f"{self.prefix}-{stamp}{self.suffix}")
+        self._f = gzip.open(self.path, "ab", compresslevel=5) if self.compress else open(self.path, "ab")
+        self._opened = time.monotonic()
+        self._size = 0
+        self._prune()
+
+    def _prune(self):
+        if self.keep <= 0:
+            return
+        head = self.prefix + "-"
+        names = sorted(n for n in os.listdir(self.directory) if n.startswith(head) and n.endswith(self.suffix))
+        for name in names[:-self.keep]:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+
+
+class AsyncLogWriter:
+    # Persists log records and raw telemetry from a background thread.
+    # log()/telemetry() only append to a bounded in-memory queue, so the Tk
+    # and MQTT threads never touch the disk; the writer thread wakes every
+    # `flush_s` (or when a queue is half full), formats the whole batch and
+    # writes it with one call per file. When a queue is full new entries are
+    # dropped and counted rather than blocking the caller.
+    #
+    # Files (in `directory`): dashboard-<time>.log for log records and
+    # telemetry-<time>.jsonl for messages ({"t", "topic", "payload"} per
+    # line; payloads that aren't UTF-8, e.g. binary codecs, are base64 with
+    # "encoding": "base64"), both rotated by RotatingFile and optionally gzipped.
+
+    def __init__(self,
+                 directory: str = DEFAULT_DIR,
+                 max_bytes: int = 16 << 20,
+                 max_age_s: float = 3600.0,
+                 compress: bool = False,
+                 keep: int = 20,
+                 queue_size: int = 100_000,
+                 flush_s: float = 0.5):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.queue_size = max(1, int(queue_size))
+        self.flush_s = flush_s
+        self._logs = RotatingFile(directory, "dashboard", ".log", max_bytes, max_age_s, compress, keep)
+        self._telemetry = RotatingFile(directory, "telemetry", ".jsonl", max_bytes, max_age_s, compress, keep)
+        self._log_queue: Deque[LogRecord] = deque()
+        self._telemetry_queue: Deque[Tuple[float, str, bytes]] = deque()
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+        self.last_error: Optional[str] = None
+
+        # counters
+        self.records = 0
+        self.messages = 0
+        self.bytes = 0
+        self.dropped = 0
+        self.errors = 0
+        self._rate = 0.0
+        self._byte_rate = 0.0
+
+    # --- API --------------------------------------------------------------
+    def start(self):
+        if self._thread is None:
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+            self._thread.start()
+
+    def close(self, timeout: float = 5.0):
+        # writes what is still queued, then closes the files
+        self._stopping = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self._logs.close()
+        self._telemetry.close()
+
+    def log(self, record: LogRecord) -> bool:
+        return self._put(self._log_queue, record)
+
+    def telemetry(self, topic: str, payload: bytes, timestamp: Optional[float] = None) -> bool:
+        return self._put(self._telemetry_queue, (time.time() if timestamp is None else timestamp, topic, payload))
+
+    def stats(self) -> WriterStats:
+        return WriterStats(self.records, self.messages, self.bytes, self.dropped,
+                           len(self._log_queue) + len(self._telemetry_queue),
+                           self._logs.rotations + self._telemetry.rotations,
+                           self.errors, self._rate, self._byte_rate)
+
+    # --- Internals --------------------------------------------------------
+    def _put(self, queue: deque, item) -> bool:
+        n = len(queue)
+        if n >= self.queue_size:
+            self.dropped += 1
+            return False
+        queue.append(item)
+        if n == self.queue_size // 2:
+            self._wake.set()
+        return True
+
+    def _run(self):
+        prev_count, prev_bytes, prev_time = 0, 0, time.monotonic()
+        while True:
+            self._wake.wait(self.flush_s)
+            self._wake.clear()
+            stopping = self._stopping
+            self._write_batch(self._log_queue, self._logs, _format_record, "records")
+            self._write_batch(self._telemetry_queue, self._telemetry, _format_message, "messages")
+            now = time.monotonic()
+            if now - prev_time >= 1.0 or stopping:
+                count = self.records + self.messages
+                self._rate = (count - prev_count) / (now - prev_time)
+                self._byte_rate = (self.bytes - prev_bytes) / (now - prev_time)
+                prev_count, prev_bytes, prev_time = count, self.bytes, now
+            if stopping:
+                return
+
+    def _write_batch(self, queue: deque, out: RotatingFile, fmt, counter: str):
+        batch: List = []
+        popleft = queue.popleft
+        for _ in range(len(queue)):
+            batch.append(popleft())
+        if not batch:
+            return
+        try:
+            data = "".join(map(fmt, batch)).encode("utf-8", "backslashreplace")
+            out.write(data)
+            out.flush()
+        except (OSError, ValueError) as e:
+            self.errors += 1
+            self.dropped += len(batch)
+            self.last_error = str(e)
+            out.close()     # reopen (new file) on the next batch
+            return
+        setattr(self, counter, getattr(self, counter) + len(batch))
+        self.bytes += len(data)
+
+
+def _format_record(r: LogRecord) -> str:
+    clock = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(r.timestamp))
+    return f"{clock}.{int(r.timestamp * 1000) % 1000:03d} {r.level:<5} {r.direction} {r.topic or '-'} {r.text()}\n"
+
+
+def _format_message(item: Tuple[float, str, bytes]) -> str:
+    ts, topic, payload = item
+    payload = bytes(payload)
+    try:
+        return json.dumps({"t": round(ts, 6), "topic": topic, "payload": payload.decode("utf-8")}) + "\n"
+    except UnicodeDecodeError:
+        return json.dumps({"t": round(ts, 6), "topic": topic, "encoding": "base64",
+                           "payload": base64.b64encode(payload).decode("ascii")}) + "\n"
@@ -0,0 +1,169 @@
+import bisect
+import math
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+
+class LatencyHistogram:
+    # Fixed log-spaced buckets (default 0.1 ms .. 100 s, 10 per decade);
+    # record() is O(log buckets) and memory does not grow with samples.
+    # Percentiles are reported as the upper bound of the matching bucket.
+
+    def __init__(self, lo: float = 1e-4, hi: float = 100.0, per_decade: int = 10):
+        n = int(round(math.log10(hi / lo) * per_decade))
+        self.bounds: List[float] = [lo * 10 ** (i / per_decade) for i in range(n + 1)]
+        self._counts = [0] * (len(self.bounds) + 1)     # last bucket: overflow
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float):
+        i = bisect.bisect_left(self.bounds, seconds)
+        with self._lock:
+            self._counts[i] += 1
+            self.count += 1
+            self.total += seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    def percentile(self, p: float) -> float:
+        with self._lock:
+            if not self.count:
+                return 0.0
+            target = p / 100.0 * self.count
+            seen = 0
+            for i, c in enumerate(self._counts):
+                seen += c
+                if seen >= target and c:
+                    # a bucket's upper bound can exceed the largest sample
+                    return min(self.bounds[i], self.max) if i < len(self.bounds) else self.max
+        return self.max
+
+    def buckets(self) -> List[Tuple[float, int]]:
+        # (upper bound in seconds, count) for non-empty buckets
+        with self._lock:
+            return [(self.bounds[i] if i < len(self.bounds) else math.inf, c)
+                    for i, c in enumerate(self._counts) if c]
+
+    def reset(self):
+        with self._lock:
+            self._counts = [0] * len(self._counts)
+            self.count = 0
+            self.total = 0.0
+            self.max = 0.0
+
+
+class TopicCounters:
+    __slots__ = ("messages", "bytes", "errors", "last_seen", "rate")
+
+    def __init__(self):
+        self.messages = 0
+        self.bytes = 0
+        self.errors = 0
+        self.last_seen = 0.0
+        self.rate = 0.0
+
+
+class ServiceMetrics:
+    # Per-topic receive counters for MqttService plus the receive-to-render
+    # latency histogram. on_message()/on_error() run on the MQTT thread;
+    # update_rates() and snapshot() are called at a low rate by the viewer.
+
+    def __init__(self):
+        self._topics: Dict[str, TopicCounters] = {}
+        self._lock = threading.Lock()
+        self.latency = LatencyHistogram()
+        self.started = time.time()
+        self._prev: Dict[str, int] = {}
+        self._prev_time = time.monotonic()
+        self.rate = 0.0
+        self.byte_rate = 0.0
+        self._prev_bytes = 0
+        # connection drops and disconnect -> fully resubscribed time
+        self.disconnects = 0
+        self.reconnects = 0
+        self.reconnect_time = LatencyHistogram(lo=1e-3, hi=1000.0)
+        self.last_reconnect = 0.0
+
+    # --- Recording --------------------------------------------------------
+    def on_message(self, topic: str, nbytes: int):
+        c = self._topics.get(topic)
+        if c is None:
+            with self._lock:
+                c = self._topics.setdefault(topic, TopicCounters())
+        c.messages += 1
+        c.bytes += nbytes
+        c.last_seen = time.time()
+
+    def on_error(self, topic: str):
+        c = self._topics.get(topic)
+        if c is not None:
+            c.errors += 1
+
+    def record_latency(self, seconds: float):
+        self.latency.record(seconds)
+
+    def on_disconnect(self):
+        self.disconnects += 1
+
+    def on_resubscribed(self, seconds: float):
+        self.reconnects += 1
+        self.last_reconnect = seconds
+        self.reconnect_time.record(seconds)
+
+    # --- Reading ----------------------------------------------------------
+    def update_rates(self):
+        # Per-topic and total rates since the previous call.
+        now = time.monotonic()
+        dt = now - self._prev_time
+        if dt <= 0:
+            return
+        total = total_bytes = 0
+        with self._lock:
+            items = list(self._topics.items())
+        for topic, c in items:
+            c.rate = (c.messages - self._prev.get(topic, 0)) / dt
+            self._prev[topic] = c.messages
+            total += c.rate
+            total_bytes += c.bytes
+        self.rate = total
+        self.byte_rate = (total_bytes - self._prev_bytes) / dt
+        self._prev_bytes = total_bytes
+        self._prev_time = now
+
+    def topics(self) -> List[Tuple[str, TopicCounters]]:
+        with self._lock:
+            return sorted(self._topics.items())
+
+    def snapshot(self, queues: Optional[Dict[str, int]] = None) -> dict:
+        lat = self.latency
+        return {
+            "timestamp": time.time(),
+            "uptime_s": round(time.time() - self.started, 1),
+            "rate": round(self.rate, 1),
+            "byte_rate": round(self.byte_rate, 1),
+            "queues": dict(queues or {}),
+            "latency_ms": {
+                "count": lat.count,
+                "mean": round(lat.total / lat.count * 1000.0, 3) if lat.count else 0.0,
+                "p50": round(lat.percentile(50) * 1000.0, 3),
+                "p90": round(lat.percentile(90) * 1000.0, 3),
+                "p99": round(lat.percentile(99) * 1000.0, 3),
+                "max": round(lat.max * 1000.0, 3),
+                "buckets": [[b * 1000.0 if b != math.inf else None, c] for b, c in lat.buckets()],
+            },
+            "reconnect_s": {
+                "disconnects": self.disconnects,
+                "reconnects": self.reconnects,
+                "last": round(self.last_reconnect, 3),
+                "p50": round(self.reconnect_time.percentile(50), 3),
+                "max": round(self.reconnect_time.max, 3),
+            },
+            "topics": {
+                topic: {"messages": c.messages, "bytes": c.bytes, "errors": c.errors,
+                        "rate": round(c.rate, 1), "last_seen": c.last_seen}
+                for topic, c in self.topics()
+            },
+        }
@@ -0,0 +1,501 @@
+import asyncio
+import random
+import struct
+import threading
+import time
+from collections import deque
+from typing import AsyncIterator, Callable, Deque, List, Optional, Sequence, Tuple, Union
+
+# MQTT 3.1.1 control packet types (high nibble of the fixed header)
+CONNECT = 0x10
+CONNACK = 0x20
+PUBLISH = 0x30
+PUBACK = 0x40
+PUBREC = 0x50
+PUBREL = 0x60
+PUBCOMP = 0x70
+SUBSCRIBE = 0x80
+SUBACK = 0x90
+UNSUBSCRIBE = 0xA0
+UNSUBACK = 0xB0
+PINGREQ = 0xC0
+PINGRESP = 0xD0
+DISCONNECT = 0xE0
+
+# paho-compatible return codes
+MQTT_ERR_SUCCESS = 0
+MQTT_ERR_NO_CONN = 4
+
+DROP_OLDEST = "drop_oldest"
+DROP_NEWEST = "drop_newest"
+BLOCK = "block"
+
+
+# --- Packet codec -------------------------------------------------------------
+def _encode_length(n: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte = n % 128
+        n //= 128
+        if n:
+            byte |= 0x80
+        out.append(byte)
+        if not n:
+            return bytes(out)
+
+
+def _encode_str(s: str) -> bytes:
+    b = s.encode("utf-8")
+    return struct.pack("!H", len(b)) + b
+
+
+def encode_packet(header: int, body: bytes = b"") -> bytes:
+    return bytes((header,)) + _encode_length(len(body)) + body
+
+
+def encode_connect(client_id: str, keepalive: int, clean_session: bool = True) -> bytes:
+    flags = 0x02 if clean_session else 0x00
+    body = _encode_str("MQTT") + bytes((4, flags)) + struct.pack("!H", keepalive) + _encode_str(client_id)
+    return encode_packet(CONNECT, body)
+
+
+def encode_publish(topic: str, payload: bytes, qos: int = 0, retain: bool = False, mid: int = 0) -> bytes:
+    header = PUBLISH | (qos << 1) | (1 if retain else 0)
+    body = _encode_str(topic)
+    if qos:
+        body += struct.pack("!H", mid)
+    return encode_packet(header, body + payload)
+
+
+def encode_subscribe(mid: int, topics: Sequence[Tuple[str, int]]) -> bytes:
+    body = struct.pack("!H", mid) + b"".join(_encode_str(t) + bytes((q,)) for t, q in topics)
+    return encode_packet(SUBSCRIBE | 0x02, body)
+
+
+def encode_unsubscribe(mid: int, topics: Sequence[str]) -> bytes:
+    body = struct.pack("!H", mid) + b"".join(_encode_str(t) for t in topics)
+    return encode_packet(UNSUBSCRIBE | 0x02, body)
+
+
+def split_packets(buf: bytearray) -> List[Tuple[int, bytes]]:
+    # Extracts every complete packet from `buf` (consumed in place) so one
+    # socket read can yield a whole batch of messages.
+    packets: List[Tuple[int, bytes]] = []
+    pos = 0
+    end = len(buf)
+    while end - pos >= 2:
+        mult = 1
+        length = 0
+        i = pos + 1
+        while True:
+            if i >= end:
+                length = -1
+                break
+            byte = buf[i]
+            length += (byte & 0x7F) * mult
+            mult *= 128
+            i += 1
+            if not byte & 0x80:
+                break
+        if length < 0 or end - i < length:
+            break
+        packets.append((buf[pos], bytes(buf[i:i + length])))
+        pos = i + length
+    if pos:
+        del buf[:pos]
+    return packets
+
+
+class AsyncMessage:
+    # Same attributes paho's MQTTMessage exposes to on_message
+    __slots__ = ("topic", "payload", "qos", "retain", "mid", "timestamp")
+
+    def __init__(self, topic: str, payload: bytes, qos: int = 0, retain: bool = False, mid: int = 0):
+        self.topic = topic
+        self.payload = payload
+        self.qos = qos
+        self.retain = retain
+        self.mid = mid
+        self.timestamp = time.monotonic()
+
+
+def decode_publish(header: int, body: bytes) -> AsyncMessage:
+    qos = (header >> 1) & 0x03
+    (tlen,) = struct.unpack_from("!H", body, 0)
+    topic = body[2:2 + tlen].decode("utf-8", errors="replace")
+    pos = 2 + tlen
+    mid = 0
+    if qos:
+        (mid,) = struct.unpack_from("!H", body, pos)
+        pos += 2
+    return AsyncMessage(topic, body[pos:], qos, bool(header & 0x01), mid)
+
+
+# --- Bounded message queue ----------------------------------------------------
+class MessageQueue:
+    # Thread-safe bounded queue between the asyncio reader and its consumer
+    # (a dispatcher task or the Tk thread via drain()).
+
+    def __init__(self, maxsize: int = 10000, overflow: str = DROP_OLDEST):
+        if overflow not in (DROP_OLDEST, DROP_NEWEST, BLOCK):
+            raise ValueError(f"unknown overflow policy '{overflow}'")
+        self.maxsize = max(1, int(maxsize))
+        self.overflow = overflow
+        self._items: Deque[AsyncMessage] = deque()
+        self._lock = threading.Lock()
+        self.on_space: Callable[[], None] = lambda: None
+        self.on_items: Callable[[], None] = lambda: None
+
+        # counters
+        self.enqueued = 0
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def full(self) -> bool:
+        return len(self._items) >= self.maxsize
+
+    def put_batch(self, batch: List[AsyncMessage]) -> int:
+        # Returns how many messages of `batch` were accepted. With BLOCK the
+        # caller is expected to wait for space before reading more.
+        with self._lock:
+            items = self._items
+            room = self.maxsize - len(items)
+            if len(batch) > room:
+                if self.overflow == DROP_OLDEST:
+                    excess = len(batch) - room
+                    for _ in range(min(excess, len(items))):
+                        items.popleft()
+                    self.dropped += excess
+                    if len(batch) > self.maxsize:
+                        batch = batch[-self.maxsize:]
+                elif self.overflow == DROP_NEWEST:
+                    self.dropped += len(batch) - room
+                    batch = batch[:room]
+            items.extend(batch)
+            self.enqueued += len(batch)
+        if batch:
+            self.on_items()
+        return len(batch)
+
+    def get_batch(self, max_items: int = 0) -> List[AsyncMessage]:
+        with self._lock:
+            items = self._items
+            was_full = len(items) >= self.maxsize
+            n = len(items) if max_items <= 0 else min(max_items, len(items))
+            batch = [items.popleft() for _ in range(n)]
+        if batch and was_full:
+            self.on_space()
+        return batch
+
+
+# --- Client -------------------------------------------------------------------
+class ReconnectBackoff:
+    # Exponential reconnect delay with jitter: attempt n waits a random time
+    # in [(1 - jitter) * d, d] with d = min(initial * factor**n, maximum), so
+    # the first retry after a drop is quick and a fleet of dashboards that
+    # lost the same broker does not reconnect in lockstep. reset() on a
+    # successful connect.
+
+    def __init__(self,
+                 initial: float = 0.25,
+                 maximum: float = 30.0,
+                 factor: float = 2.0,
+                 jitter: float = 0.5):
+        self.initial = initial
+        self.maximum = maximum
+        self.factor = factor
+        self.jitter = min(max(jitter, 0.0), 1.0)
+        self.attempts = 0
+
+    def next(self) -> float:
+        d = min(self.initial * self.factor ** self.attempts, self.maximum)
+        self.attempts += 1
+        return d * (1.0 - self.jitter * random.random())
+
+    def reset(self):
+        self.attempts = 0
+
+
+class AsyncioClient:
+    # Minimal MQTT 3.1.1 client running on its own asyncio loop thread.
+    #
+    # It mirrors the subset of paho's Client that MqttService uses
+    # (connect_async/loop_start/loop_stop/disconnect/publish/subscribe plus
+    # the on_connect/on_message/on_disconnect callbacks), but reads the socket
+    # in large chunks, splits every complete packet out of each read and
+    # queues them as a batch in a bounded MessageQueue.
+    #
+    # deliver="callback": a dispatcher task drains batches and calls on_message
+    #                     on the loop thread (paho-like).
+    # deliver="pull":     nothing is dispatched; the owner calls drain() (e.g.
+    #                     from a Tk timer) and handles the batch itself.
+    #
+    # A session ends, and the client reconnects with backoff, when the socket
+    # fails, a packet cannot be parsed, no CONNACK arrives within
+    # connect_timeout seconds, or nothing (not even a PINGRESP) is read for
+    # 1.5 x keepalive once connected.
+
+    def __init__(self,
+                 client_id: str = "",
+                 queue_size: int = 10000,
+                 overflow: str = DROP_OLDEST,
+                 deliver: str = "callback",
+                 read_size: int = 65536,
+                 connect_timeout: float = 10.0):
+        self.client_id = client_id or f"dashboard-{int(time.time() * 1000) & 0xFFFFFF:06x}"
+        self.deliver = deliver
+        self.read_size = read_size
+        self.connect_timeout = connect_timeout
+        self.queue = MessageQueue(queue_size, overflow)
+
+        self.on_connect: Optional[Callable] = None
+        self.on_message: Optional[Callable] = None
+        self.on_disconnect: Optional[Callable] = None
+        self.on_subscribe: Optional[Callable] = None
+
+        self._host = "localhost"
+        self._port = 1883
+        self._keepalive = 60
+        self.backoff = ReconnectBackoff()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._main_task: Optional[asyncio.Task] = None
+        self._items_event: Optional[asyncio.Event] = None
+        self._space_event: Optional[asyncio.Event] = None
+        self._stopping = False
+        self._mid = 0
+
+        # counters
+        self.batches = 0
+        self.received = 0
+        self.timeouts = 0
+        self.malformed = 0
+
+    # --- paho-compatible API ----------------------------------------------
+    def connect_async(self, host: str, port: int = 1883, keepalive: int = 60):
+        self._host = host
+        self._port = port
+        self._keepalive = keepalive
+
+    def reconnect_delay_set(self, min_delay: float = 1, max_delay: float = 30):
+        self.backoff.initial = min_delay
+        self.backoff.maximum = max_delay
+
+    def loop_start(self):
+        if self._thread is not None:
+            return
+        self._stopping = False
+        started = threading.Event()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            self._items_event = asyncio.Event()
+            self._space_event = asyncio.Event()
+            self.queue.on_items = lambda: self._threadsafe(self._items_event.set)
+            self.queue.on_space = lambda: self._threadsafe(self._space_event.set)
+            self._main_task = self._loop.create_task(self._run())
+            started.set()
+            try:
+                self._loop.run_until_complete(self._main_task)
+            except asyncio.CancelledError:
+                pass
+            finally:
+                self._loop.close()
+
+        self._thread = threading.Thread(target=run, name="mqtt-asyncio", daemon=True)
+        self._thread.start()
+        started.wait()
+
+    def loop_stop(self):
+        self._stopping = True
+        if self._loop is not None and self._main_task is not None:
+            self._threadsafe(self._main_task.cancel)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self._thread = None
+
+    def disconnect(self):
+        self._send(encode_packet(DISCONNECT))
+        self._stopping = True
+
+    def publish(self, topic: str, payload=None, qos: int = 0, retain: bool = False):
+        if payload is None:
+            data = b""
+        elif isinstance(payload, (bytes, bytearray, memoryview)):
+            data = bytes(payload)
+        else:
+            data = str(payload).encode("utf-8")
+        mid = self._next_mid() if qos else 0
+        return (self._send(encode_publish(topic, data, qos, retain, mid)), mid)
+
+    def subscribe(self, topic: Union[str, Sequence[Tuple[str, int]]], qos: int = 0):
+        topics = [(topic, qos)] if isinstance(topic, str) else list(topic)
+        mid = self._next_mid()
+        return (self._send(encode_subscribe(mid, topics)), mid)
+
+    def unsubscribe(self, topic: Union[str, Sequence[str]]):
+        topics = [topic] if isinstance(topic, str) else list(topic)
+        mid = self._next_mid()
+        return (self._send(encode_unsubscribe(mid, topics)), mid)
+
+    # --- Batched consumption ----------------------------------------------
+    def drain(self, max_items: int = 0) -> List[AsyncMessage]:
+        # Pull a batch from any thread (deliver="pull").
+        return self.queue.get_batch(max_items)
+
+    async def batches_iter(self, max_items: int = 0) -> AsyncIterator[List[AsyncMessage]]:
+        # Async iterator of message batches; must run on this client's loop.
+        while not self._stopping:
+            batch = self.queue.get_batch(max_items)
+            if batch:
+                yield batch
+                continue
+            self._items_event.clear()
+            if len(self.queue):
+                continue
+            await self._items_event.wait()
+
+    async def messages(self) -> AsyncIterator[AsyncMessage]:
+        async for batch in self.batches_iter():
+            for msg in batch:
+                yield msg
+
+    # --- Internals --------------------------------------------------------
+    def _threadsafe(self, fn):
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        if threading.current_thread() is self._thread:
+            fn()
+        else:
+            loop.call_soon_threadsafe(fn)
+
+    def _next_mid(self) -> int:
+        self._mid = self._mid % 0xFFFF + 1
+        return self._mid
+
+    def _send(self, data: bytes) -> int:
+        writer = self._writer
+        if writer is None or self._loop is None:
+            return MQTT_ERR_NO_CONN
+        self._threadsafe(lambda: writer.write(data))
+        return MQTT_ERR_SUCCESS
+
+    def _callback(self, cb, *args):
+        if cb is None:
+            return
+        try:
+            cb(self, None, *args)
+        except Exception:
+            pass
+
+    async def _run(self):
+        dispatcher = None
+        if self.deliver == "callback":
+            dispatcher = asyncio.ensure_future(self._dispatch())
+        try:
+            while not self._stopping:
+                try:
+                    reader, writer = await asyncio.open_connection(self._host, self._port)
+                except OSError:
+                    await asyncio.sleep(self.backoff.next())
+                    continue
+                rc = await self._session(reader, writer)
+                if rc == 0:
+                    self.backoff.reset()
+                if not self._stopping:
+                    await asyncio.sleep(self.backoff.next())
+        finally:
+            if dispatcher is not None:
+                dispatcher.cancel()
+
+    async def _session(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> int:
+        buf = bytearray()
+        writer.write(encode_connect(self.client_id, self._keepalive))
+        rc = 1
+        connected = False
+        pinger = None
+        try:
+            while True:
+                if self.queue.overflow == BLOCK and self.queue.full():
+                    # backpressure: stop reading until the consumer catches up
+                    self._space_event.clear()
+                    if self.queue.full():
+                        await self._space_event.wait()
+                if connected:
+                    timeout = 1.5 * self._keepalive if self._keepalive > 0 else None
+                else:
+                    timeout = self.connect_timeout
+                data = await asyncio.wait_for(reader.read(self.read_size), timeout)
+                if not data:
+                    break
+                buf += data
+                batch: List[AsyncMessage] = []
+                for header, body in split_packets(buf):
+                    kind = header & 0xF0
+                    if kind == PUBLISH:
+                        msg = decode_publish(header, body)
+                        if msg.qos == 1:
+                            writer.write(encode_packet(PUBACK, struct.pack("!H", msg.mid)))
+                        elif msg.qos == 2:
+                            writer.write(encode_packet(PUBREC, struct.pack("!H", msg.mid)))
+                        batch.append(msg)
+                    elif kind == CONNACK:
+                        rc = body[1] if len(body) > 1 else 1
+                        if rc == 0:
+                            connected = True
+                            self._writer = writer
+                            pinger = asyncio.ensure_future(self._ping(writer))
+                        self._callback(self.on_connect, {}, rc)
+                        if rc != 0:
+                            return rc
+                    elif kind == PUBREL:
+                        writer.write(encode_packet(PUBCOMP, body[:2]))
+                    elif kind == SUBACK:
+                        (mid,) = struct.unpack_from("!H", body, 0)
+                        self._callback(self.on_subscribe, mid, tuple(body[2:]))
+                if batch:
+                    self.batches += 1
+                    self.received += len(batch)
+                    self.queue.put_batch(batch)
+        except asyncio.TimeoutError:
+            # no CONNACK, or a half-open connection that stopped answering
+            # pings (caught first: TimeoutError is an OSError since 3.11)
+            self.timeouts += 1
+        except (OSError, asyncio.IncompleteReadError):
+            pass
+        except (struct.error, IndexError, ValueError):
+            # a malformed packet: the stream cannot be resynchronised
+            self.malformed += 1
+        finally:
+            if pinger is not None:
+                pinger.cancel()
+            self._writer = None
+            try:
+                writer.close()
+            except Exception:
+                pass
+            if connected:
+                self._callback(self.on_disconnect, 0 if self._stopping else 1)
+        return 0 if connected else rc
+
+    async def _ping(self, writer: asyncio.StreamWriter):
+        interval = max(1, self._keepalive * 0.75)
+        while True:
+            await asyncio.sleep(interval)
+            writer.write(encode_packet(PINGREQ))
+
+    async def _dispatch(self):
+        async for batch in self.batches_iter():
+            on_message = self.on_message
+            if on_message is None:
+                continue
+            for msg in batch:
+                try:
+                    on_message(self, None, msg)
+                except Exception:
+                    pass
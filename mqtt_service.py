@@ -1,5 +1,51 @@
+import threading
+import time
 import paho.mqtt.client as mqtt
-from typing import Callable, Dict, Optional
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from filters import FilterStats, IngestFilter
+from log_record import ERROR, INFO, WARN, LogRecord
+from log_writer import AsyncLogWriter
+from metrics import ServiceMetrics
+from mqtt_async import DROP_OLDEST, AsyncioClient, ReconnectBackoff
+from outbox import DiskOutbox, OutboxRecord
+from payloads import decode_text, value_decoder
+from recorder import SessionRecorder
+from snapshot import SnapshotCache
+from topic_trie import TopicTrie
+
+Decoder = Callable[[str, bytes], Any]
+
+
+class _Route:
+    __slots__ = ("handler", "decoder")
+
+    def __init__(self, handler: Callable[[str, Any], None], decoder: Decoder):
+        self.handler = handler
+        self.decoder = decoder
+
+
+class _Message(NamedTuple):
+    topic: str
+    payload: bytes
+    timestamp: Optional[float] = None   # original receive time (wall clock) of an injected message
+
+
+class _PahoClient(mqtt.Client):
+    # paho's retry loop (loop_start) sleeps in _reconnect_wait, which only
+    # doubles a fixed delay; wait on the service's jittered backoff instead.
+    backoff: Optional[ReconnectBackoff] = None
+
+    def _reconnect_wait(self):
+        if self.backoff is None:
+            return super()._reconnect_wait()
+        deadline = time.monotonic() + self.backoff.next()
+        while self._state != mqtt.mqtt_cs_disconnecting and not self._thread_terminate:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            time.sleep(min(remaining, 0.1))
+
 
 class MqttService:
 
@@ -7,72 +53,335 @@ class MqttService:
                  host: str = "localhost",
                  port: int = 1883,
                  keepalive: int = 60,
-                 log_fn: Optional[Callable[[str], None]] = None):
+                 log_fn: Optional[Callable[[LogRecord], None]] = None,
+                 engine: str = "paho",
+                 pull: bool = False,
+                 queue_size: int = 10000,
+                 overflow: str = DROP_OLDEST,
+                 outbox: Optional[DiskOutbox] = None,
+                 replay_rate: float = 50.0,
+                 reconnect_min: float = 0.25,
+                 reconnect_max: float = 30.0,
+                 reconnect_jitter: float = 0.5):
+        # engine="paho":    paho's loop_start thread, one callback per message
+        # engine="asyncio": AsyncioClient, batched socket reads into a bounded
+        #                   queue (queue_size/overflow). With pull=True nothing
+        #                   is dispatched until the owner calls poll().
+        # outbox: publishes made while disconnected (or that fail) are kept
+        # there and replayed in order, at most replay_rate msg/s, on connect.
+        # reconnect_*: jittered exponential backoff between connection attempts
+        # (see ReconnectBackoff); every filter is restored in one SUBSCRIBE.
         self.host = host
         self.port = port
         self.keepalive = keepalive
-        self._log = log_fn or (lambda m: None)
-        self._client = mqtt.Client()
-        self._handlers: Dict[str, Callable[[str, str], None]] = {}
+        # log_fn receives LogRecord objects and may be called from paho's
+        # network thread, so it must be thread-safe (e.g. LogView.append)
+        self._log = log_fn or (lambda r: None)
+        if engine == "paho":
+            self._client = _PahoClient()
+        elif engine == "asyncio":
+            self._client = AsyncioClient(queue_size=queue_size, overflow=overflow,
+                                         deliver="pull" if pull else "callback")
+        else:
+            raise ValueError(f"unknown MQTT engine '{engine}'")
+        self.backoff = ReconnectBackoff(reconnect_min, reconnect_max, jitter=reconnect_jitter)
+        self._client.backoff = self.backoff
+        self.engine = engine
+        self._routes = TopicTrie()
+        self._routes_lock = threading.Lock()
+        self._subscriptions: Dict[str, int] = {}
+        # ingestion filters by topic filter; resolved once per concrete topic
+        self._filters = TopicTrie()
+        self._filter_cache: Dict[str, Optional[IngestFilter]] = {}
+        self.connected = False
+        self._down_since: Optional[float] = None     # monotonic time of the last drop
+        self._resub_mid: Optional[int] = None
+        self._resub_topics: List[Tuple[str, int]] = []
+        self._outbox = outbox
+        self._replay_rate = replay_rate
+        self._replay_lock = threading.Lock()
+        self._replaying = False
+        # when set, every received message is captured before dispatch
+        self.recorder: Optional[SessionRecorder] = None
+        # when set, raw telemetry is queued to the background file writer
+        self.writer: Optional[AsyncLogWriter] = None
+        # when set, the latest payload of every bound topic is kept for a warm start
+        self.snapshot: Optional[SnapshotCache] = None
+        # per-topic counters and the receive-to-render latency histogram
+        self.metrics = ServiceMetrics()
 
         # callbacks 
         self._client.on_connect = self._on_connect
         self._client.on_message = self._on_message
         self._client.on_disconnect = self._on_disconnect
+        self._client.on_subscribe = self._on_subscribe
 
     # --- API --------------------------------------------------------------
     def start(self):
         try:
             self._client.connect_async(self.host, self.port, self.keepalive)
             self._client.loop_start()
-            self._log(f"MQTT -> starting connection {self.host}:{self.port}")
+            self._emit(INFO, "MQTT -> starting connection {}:{}", self.host, self.port)
         except Exception as e:
-            self._log(f"MQTT start error: {e}")
+            self._emit(ERROR, "MQTT start error: {}", e)
 
     def stop(self):
         try:
-            self._client.loop_stop()
             self._client.disconnect()
+            self._client.loop_stop()
         except Exception:
             pass
 
+    def poll(self, max_batch: int = 0) -> int:
+        # Dispatch one batch of queued messages on the calling thread
+        # (asyncio engine with pull=True). Returns the batch size.
+        batch = self._client.drain(max_batch)
+        on_message = self._on_message
+        for msg in batch:
+            on_message(self._client, None, msg)
+        return len(batch)
+
+    def queue_depth(self) -> int:
+        # Messages received but not yet dispatched (asyncio engine only).
+        queue = getattr(self._client, "queue", None)
+        return len(queue) if queue is not None else 0
+
+    def inject(self, topic: str, payload: bytes, timestamp: Optional[float] = None):
+        # Dispatch a message as if it came from the broker (session replay).
+        # `timestamp` is its original receive time; the ingestion filters
+        # measure rates and heartbeats on it, so a replay at any speed is
+        # filtered like the recorded session.
+        self._on_message(self._client, None, _Message(topic, payload, timestamp))
+
     def publish(self, topic: str, payload, qos: int = 0, retain: bool = False):
+        if self._outbox is not None:
+            with self._replay_lock:
+                # keep ordering: while anything is queued, new publishes queue too
+                queue = not self.connected or self._replaying or self._outbox.has_pending()
+            if queue:
+                self._enqueue(topic, payload, qos, retain)
+                return
         try:
-            self._client.publish(topic, payload=payload, qos=qos, retain=retain)
+            rc = self._client.publish(topic, payload=payload, qos=qos, retain=retain)[0]
         except Exception as e:
-            self._log(f"MQTT publish error {topic}: {e}")
+            rc = None
+            self._emit(ERROR, "MQTT publish error {}: {}", topic, e, topic=topic)
+        if rc != 0 and self._outbox is not None:
+            self._enqueue(topic, payload, qos, retain)
 
-    def subscribe(self, topic: str, handler: Callable[[str, str], None], qos: int = 1):
-        self._handlers[topic] = handler
+    def subscribe(self,
+                  topic: str,
+                  handler: Callable[[str, Any], None],
+                  qos: int = 1,
+                  decoder: Optional[Decoder] = None,
+                  codec: Optional[str] = None):
+        # `topic` may be a filter with `+`/`#` wildcards; several handlers can
+        # share the same filter. `decoder(topic, payload_bytes)` turns the raw
+        # payload into what the handler receives (stripped text by default);
+        # it runs once per message even when several handlers share it.
+        # Alternatively `codec` names a payloads codec ("f32", "struct:<3f",
+        # "msgpack", ...) and the handler gets its decoded value.
+        if decoder is None and codec is not None:
+            decoder = value_decoder(codec)      # ValueError for unknown codecs
+        with self._routes_lock:
+            self._routes.add(topic, _Route(handler, decoder or decode_text))
+            self._subscriptions[topic] = qos
         try:
             self._client.subscribe(topic, qos=qos)
-            self._log(f"MQTT subscribed to {topic}")
+            self._emit(INFO, "MQTT subscribed to {}", topic, topic=topic)
+        except Exception as e:
+            self._emit(ERROR, "MQTT subscribe error {}: {}", topic, e, topic=topic)
+
+    def unsubscribe(self, topic: str, handler: Optional[Callable[[str, Any], None]] = None):
+        with self._routes_lock:
+            if handler is None:
+                empty = self._routes.remove(topic)
+            else:
+                empty = True
+                for route in self._routes.handlers_for(topic):
+                    if route.handler == handler:
+                        empty = self._routes.remove(topic, route)
+            if not empty:
+                return
+            self._subscriptions.pop(topic, None)
+        try:
+            self._client.unsubscribe(topic)
+            self._emit(INFO, "MQTT unsubscribed from {}", topic, topic=topic)
+        except Exception as e:
+            self._emit(ERROR, "MQTT unsubscribe error {}: {}", topic, e, topic=topic)
+
+    def set_filter(self, topic: str, flt: Optional[IngestFilter]):
+        # Drops repeated or insignificant messages on `topic` (a filter, `+`/`#`
+        # allowed) before they are decoded or dispatched; None removes the
+        # filter. With overlapping filters the first match applies. Only the
+        # display path is filtered: the recorder, the telemetry log and the
+        # metrics still see every message.
+        with self._routes_lock:
+            self._filters.remove(topic)
+            if flt is not None:
+                self._filters.add(topic, flt)
+            self._filter_cache = {}
+
+    def filter_stats(self) -> Dict[str, FilterStats]:
+        # topic filter -> pass/drop counters
+        with self._routes_lock:
+            return {f: self._filters.handlers_for(f)[0].stats() for f in self._filters.filters()}
+
+    # --- Outbox -----------------------------------------------------------
+    def _enqueue(self, topic: str, payload, qos: int, retain: bool):
+        if isinstance(payload, str):
+            data = payload.encode("utf-8")
+        elif isinstance(payload, (bytes, bytearray)):
+            data = bytes(payload)
+        else:
+            data = str(payload).encode("utf-8")
+        if not self._outbox.append(topic, data, qos, retain):
+            self._emit(ERROR, "Outbox full, dropped publish to {}", topic, topic=topic)
+            return
+        self._emit(WARN, "Queued publish to {} ({} pending)", topic, len(self._outbox), topic=topic)
+        if self.connected:
+            self._start_replay()
+
+    def _start_replay(self):
+        with self._replay_lock:
+            if self._replaying or not self._outbox.has_pending():
+                return
+            self._replaying = True
+        threading.Thread(target=self._replay, name="mqtt-outbox", daemon=True).start()
+
+    def _replay(self):
+        sent = 0
+        while True:
+            n = self._outbox.replay(self._send_queued, self._replay_rate, lambda: self.connected)
+            sent += n
+            with self._replay_lock:
+                # re-check under the lock so a publish racing the end isn't
+                # stranded; a pass that sent nothing waits for the next connect
+                if not n or not self.connected or not self._outbox.has_pending():
+                    self._replaying = False
+                    break
+        if sent:
+            self._emit(INFO, "Outbox replayed {} publishes ({} pending)", sent, len(self._outbox))
+
+    def _send_queued(self, record: OutboxRecord) -> bool:
+        try:
+            rc = self._client.publish(record.topic, payload=record.payload,
+                                      qos=record.qos, retain=record.retain)[0]
         except Exception as e:
-            self._log(f"MQTT subscribe error {topic}: {e}")
+            self._emit(ERROR, "MQTT publish error {}: {}", record.topic, e, topic=record.topic)
+            return False
+        return rc == 0
+
+    # --- Logging ----------------------------------------------------------
+    def _emit(self, level: str, message: str, *args, topic: Optional[str] = None):
+        try:
+            self._log(LogRecord(message, args, level, topic))
+        except Exception:
+            pass
 
     # --- Callbacks --------------------------------------------------------
     def _on_connect(self, client, userdata, flags, rc):
         if rc == 0:
-            self._log("MQTT connected (rc=0)")
-            for t in self._handlers.keys():
-                try:
-                    client.subscribe(t)
-                except Exception as e:
-                    self._log(f"Re-sub error {t}: {e}")
+            self.connected = True
+            self.backoff.reset()
+            self._emit(INFO, "MQTT connected (rc=0)")
+            self._resubscribe(client)
+            if self._outbox is not None:
+                self._start_replay()
         else:
-            self._log(f"MQTT connection failed rc={rc}")
+            self._emit(ERROR, "MQTT connection failed rc={}", rc)
 
     def _on_disconnect(self, client, userdata, rc):
+        was_connected, self.connected = self.connected, False
         if rc != 0:
-            self._log(f"MQTT unexpected disconnection rc={rc}")
+            if was_connected and self._down_since is None:
+                self._down_since = time.monotonic()
+                self.metrics.on_disconnect()
+            self._emit(WARN, "MQTT unexpected disconnection rc={}", rc)
         else:
-            self._log("MQTT disconnected")
+            self._emit(INFO, "MQTT disconnected")
+
+    def _resubscribe(self, client):
+        # one SUBSCRIBE for every filter, each with the QoS it was subscribed with
+        with self._routes_lock:
+            topics = list(self._subscriptions.items())
+        self._resub_topics = topics
+        if not topics:
+            self._resubscribed()
+            return
+        try:
+            rc, mid = client.subscribe(topics)
+        except Exception as e:
+            self._emit(ERROR, "Re-sub error: {}", e)
+            return
+        if rc != 0:
+            self._emit(ERROR, "Re-sub error rc={}", rc)
+            return
+        self._resub_mid = mid
+
+    def _on_subscribe(self, client, userdata, mid, granted_qos):
+        if mid != self._resub_mid:
+            return
+        self._resub_mid = None
+        for (topic, _), granted in zip(self._resub_topics, granted_qos):
+            if granted == 0x80:
+                self._emit(ERROR, "Re-sub refused by the broker: {}", topic, topic=topic)
+        self._resubscribed()
+
+    def _resubscribed(self):
+        if self._down_since is None:
+            return
+        elapsed = time.monotonic() - self._down_since
+        self._down_since = None
+        self.metrics.on_resubscribed(elapsed)
+        self._emit(INFO, "MQTT resubscribed {} topics {:.2f} s after the disconnect",
+                   len(self._resub_topics), elapsed)
 
     def _on_message(self, client, userdata, msg):
-        handler = self._handlers.get(msg.topic)
-        if handler:
+        # injected messages carry their original receive time (paho's
+        # MQTTMessage.timestamp is a monotonic clock, not a receive time)
+        timestamp = msg.timestamp if isinstance(msg, _Message) else None
+        recorder = self.recorder
+        if recorder is not None:
+            try:
+                recorder.record(msg.topic, msg.payload, timestamp)
+            except Exception as e:
+                self.recorder = None
+                self._emit(ERROR, "Recorder error, capture stopped: {}", e)
+        topic = msg.topic
+        payload = msg.payload
+        writer = self.writer
+        if writer is not None:
+            writer.telemetry(topic, payload, timestamp)
+        self.metrics.on_message(topic, len(payload))
+        if len(self._filters):
+            # set_filter() swaps the cache; a lookup racing it fills the old one
+            cache = self._filter_cache
+            try:
+                flt = cache[topic]
+            except KeyError:
+                with self._routes_lock:
+                    matches = self._filters.match(topic)
+                flt = cache[topic] = matches[0] if matches else None
+            if flt is not None and not flt.admit(topic, payload, timestamp):
+                return
+        with self._routes_lock:
+            routes = self._routes.match(topic)
+        if not routes:
+            return
+        snapshot = self.snapshot
+        if snapshot is not None:
+            snapshot.update(topic, payload)
+        # decode once per distinct decoder, then fan the value out
+        last_decoder = None
+        value = None
+        for route in routes:
             try:
-                payload = msg.payload.decode("utf-8", errors="replace").strip()
-                handler(msg.topic, payload)
+                if route.decoder is not last_decoder:
+                    last_decoder = route.decoder
+                    value = last_decoder(topic, payload)
+                route.handler(topic, value)
             except Exception as e:
-                self._log(f"Handler error {msg.topic}: {e}")
+                last_decoder = None
+                self.metrics.on_error(topic)
+                self._emit(ERROR, "Handler error {}: {}", topic, e, topic=topic)
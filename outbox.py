@@ -0,0 +1,322 @@
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from topic_trie import TopicTrie
+
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".mqtt_dashboard", "outbox.bin")
+
+KEEP_ALL = "all"
+KEEP_LATEST = "latest"
+
+_MAGIC = b"MQOB"
+_VERSION = 1
+# magic, version, reserved, replay offset, write offset, next sequence number
+_HEADER = struct.Struct("<4sHHQQQ")
+# record length (excluding this field), qos, retain, reserved, seq, timestamp, topic length
+_RECORD = struct.Struct("<IBBHQdH")
+_LEN = struct.Struct("<I")
+
+
+class OutboxRecord(NamedTuple):
+    offset: int
+    end: int
+    seq: int
+    timestamp: float
+    topic: str
+    payload: bytes
+    qos: int
+    retain: bool
+
+
+class DiskOutbox:
+    # Append-only, memory-mapped queue of publishes made while the broker is
+    # unreachable. Records are written first and the header's write offset is
+    # advanced afterwards, so a crash never exposes a partial record; the
+    # replay offset is advanced as records are delivered, so the queue
+    # survives an application restart.
+    #
+    # Per-topic collapse policies (topic filters, `+`/`#` allowed):
+    #   "latest": only the newest pending record for the topic is replayed
+    #   "all":    every record is replayed
+    # Replay keeps the original order of the records that survive.
+    #
+    # max_age_s: records older than this when they come up for replay are
+    # dropped instead of sent (stale commands from an earlier session must
+    # not reach the robot); None keeps them forever.
+
+    def __init__(self,
+                 path: str,
+                 policies: Optional[Dict[str, str]] = None,
+                 default_policy: str = KEEP_ALL,
+                 initial_size: int = 1 << 20,
+                 max_size: int = 64 << 20,
+                 max_age_s: Optional[float] = None):
+        self.path = path
+        self.default_policy = default_policy
+        self.max_size = max_size
+        self.max_age_s = max_age_s
+        self._policies = TopicTrie()
+        for topic_filter, policy in (policies or {}).items():
+            self.set_policy(topic_filter, policy)
+        self._policy_cache: Dict[str, str] = {}
+        self._lock = threading.RLock()
+        self._latest: Dict[str, int] = {}   # topic -> offset of its newest pending record
+        self._count = 0
+        self._superseded = 0                # "latest" records collapsed since the last compaction
+
+        # counters
+        self.appended = 0
+        self.replayed = 0
+        self.collapsed = 0
+        self.expired = 0
+        self.dropped = 0
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fresh = not os.path.exists(path) or os.path.getsize(path) < _HEADER.size
+        self._file = open(path, "r+b" if not fresh else "w+b")
+        if fresh:
+            self._file.truncate(max(initial_size, _HEADER.size))
+        self._mm = mmap.mmap(self._file.fileno(), 0)
+        if fresh or self._mm[:4] != _MAGIC:
+            self._replay_offset = self._write_offset = _HEADER.size
+            self._seq = 0
+            self._write_header()
+        else:
+            _, _, _, self._replay_offset, self._write_offset, self._seq = _HEADER.unpack_from(self._mm, 0)
+            self._recover()
+
+    # --- API --------------------------------------------------------------
+    def set_policy(self, topic_filter: str, policy: str):
+        if policy not in (KEEP_ALL, KEEP_LATEST):
+            raise ValueError(f"unknown outbox policy '{policy}'")
+        for old in self._policies.handlers_for(topic_filter):
+            self._policies.remove(topic_filter, old)
+        self._policies.add(topic_filter, policy)
+        self._policy_cache = {}
+
+    def policy(self, topic: str) -> str:
+        policy = self._policy_cache.get(topic)
+        if policy is None:
+            matches = self._policies.match(topic)
+            policy = KEEP_LATEST if KEEP_LATEST in matches else (matches[0] if matches else self.default_policy)
+            self._policy_cache[topic] = policy
+        return policy
+
+    def __len__(self) -> int:
+        # stored records; superseded "latest" ones count until skipped or compacted
+        return self._count
+
+    def has_pending(self) -> bool:
+        return self._count > 0
+
+    def append(self, topic: str, payload: bytes, qos: int = 0, retain: bool = False) -> bool:
+        t = topic.encode("utf-8")
+        with self._lock:
+            size = _RECORD.size + len(t) + len(payload)
+            if not self._reserve(size):
+                self.dropped += 1
+                return False
+            offset = self._write_offset
+            self._seq += 1
+            _RECORD.pack_into(self._mm, offset, size - _LEN.size, qos, 1 if retain else 0, 0,
+                              self._seq, time.time(), len(t))
+            pos = offset + _RECORD.size
+            self._mm[pos:pos + len(t)] = t
+            self._mm[pos + len(t):offset + size] = payload
+            self._write_offset = offset + size
+            self._write_header()
+            if self.policy(topic) == KEEP_LATEST and topic in self._latest:
+                self.collapsed += 1
+                self._superseded += 1
+            self._latest[topic] = offset
+            self._count += 1
+            self.appended += 1
+        return True
+
+    def peek(self) -> Optional[OutboxRecord]:
+        # Next record to deliver, skipping superseded "latest" records and
+        # expired ones.
+        with self._lock:
+            offset = self._replay_offset
+            oldest = self._oldest_allowed()
+            while offset < self._write_offset:
+                rec = self._read(offset)
+                superseded = self.policy(rec.topic) == KEEP_LATEST and self._latest.get(rec.topic) != rec.offset
+                if superseded or rec.timestamp < oldest:
+                    if not superseded:
+                        self.expired += 1
+                        if self._latest.get(rec.topic) == rec.offset:
+                            del self._latest[rec.topic]
+                    offset = rec.end
+                    self._count -= 1
+                    self._replay_offset = offset
+                    continue
+                self._replay_offset = offset
+                return rec
+            self._replay_offset = offset
+            self._reset_if_empty()
+            return None
+
+    def pending(self) -> List[OutboxRecord]:
+        out = []
+        with self._lock:
+            offset = self._replay_offset
+            oldest = self._oldest_allowed()
+            while offset < self._write_offset:
+                rec = self._read(offset)
+                if rec.timestamp >= oldest and (self.policy(rec.topic) != KEEP_LATEST
+                                                or self._latest.get(rec.topic) == rec.offset):
+                    out.append(rec)
+                offset = rec.end
+        return out
+
+    def commit(self, record: OutboxRecord):
+        # Marks `record` (returned by peek()) as delivered. Matched by
+        # sequence number: an append() in between may have compacted the
+        # file and moved the record, or dropped it because a newer "latest"
+        # record superseded it (then there is nothing left to commit).
+        with self._lock:
+            if self._replay_offset >= self._write_offset:
+                return
+            head = self._read(self._replay_offset)
+            if head.seq != record.seq:
+                return
+            self._replay_offset = head.end
+            self._count -= 1
+            self.replayed += 1
+            if self._latest.get(head.topic) == head.offset:
+                del self._latest[head.topic]
+            self._write_header()
+            self._reset_if_empty()
+
+    def replay(self,
+               publish: Callable[[OutboxRecord], bool],
+               max_rate: float = 50.0,
+               keep_going: Callable[[], bool] = lambda: True) -> int:
+        # Delivers pending records in order at no more than max_rate per
+        # second. `publish` returns False to stop (e.g. the link dropped).
+        interval = 1.0 / max_rate if max_rate > 0 else 0.0
+        sent = 0
+        while keep_going():
+            rec = self.peek()
+            if rec is None:
+                break
+            if not publish(rec):
+                break
+            self.commit(rec)
+            sent += 1
+            if interval:
+                time.sleep(interval)
+        return sent
+
+    def flush(self):
+        with self._lock:
+            self._mm.flush()
+
+    def close(self):
+        with self._lock:
+            try:
+                self._mm.flush()
+                self._mm.close()
+            finally:
+                self._file.close()
+
+    # --- Internals --------------------------------------------------------
+    def _oldest_allowed(self) -> float:
+        return time.time() - self.max_age_s if self.max_age_s is not None else float("-inf")
+
+    def _write_header(self):
+        _HEADER.pack_into(self._mm, 0, _MAGIC, _VERSION, 0, self._replay_offset, self._write_offset, self._seq)
+
+    def _read(self, offset: int) -> OutboxRecord:
+        length, qos, retain, _, seq, ts, tlen = _RECORD.unpack_from(self._mm, offset)
+        end = offset + _LEN.size + length
+        pos = offset + _RECORD.size
+        topic = bytes(self._mm[pos:pos + tlen]).decode("utf-8", errors="replace")
+        payload = bytes(self._mm[pos + tlen:end])
+        return OutboxRecord(offset, end, seq, ts, topic, payload, qos, bool(retain))
+
+    def _recover(self):
+        # Rebuild the in-memory index after a restart; stop at the first
+        # record that doesn't fit (torn tail).
+        size = len(self._mm)
+        self._write_offset = min(self._write_offset, size)
+        offset = self._replay_offset
+        while offset + _RECORD.size <= self._write_offset:
+            (length,) = _LEN.unpack_from(self._mm, offset)
+            end = offset + _LEN.size + length
+            if length < _RECORD.size - _LEN.size or end > self._write_offset:
+                break
+            rec = self._read(offset)
+            self._latest[rec.topic] = offset
+            self._count += 1
+            offset = end
+        self._write_offset = offset
+        self._write_header()
+
+    def _reset_if_empty(self):
+        # Everything delivered: rewind so the file doesn't grow forever.
+        if self._replay_offset >= self._write_offset and self._write_offset != _HEADER.size:
+            self._replay_offset = self._write_offset = _HEADER.size
+            self._latest.clear()
+            self._count = 0
+            self._superseded = 0
+            self._write_header()
+
+    def _reserve(self, size: int) -> bool:
+        if self._write_offset + size <= len(self._mm):
+            return True
+        self._compact()
+        needed = self._write_offset + size
+        if needed <= len(self._mm):
+            return True
+        new_size = len(self._mm)
+        while new_size < needed:
+            new_size *= 2
+        if new_size > self.max_size:
+            return False
+        self._remap(new_size)
+        return True
+
+    def _compact(self):
+        # Rewrite the live (pending, non-superseded, unexpired) records into
+        # a new file and swap it in with os.replace, so a crash leaves either
+        # the old outbox or the compacted one, never a half-copied file.
+        if self._replay_offset == _HEADER.size and not self._superseded:
+            return
+        live = self.pending()
+        end = _HEADER.size + sum(rec.end - rec.offset for rec in live)
+        size = len(self._mm)
+        latest: Dict[str, int] = {}
+        tmp = self.path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, _VERSION, 0, _HEADER.size, end, self._seq))
+            pos = _HEADER.size
+            for rec in live:
+                f.write(self._mm[rec.offset:rec.end])
+                latest[rec.topic] = pos
+                pos += rec.end - rec.offset
+            f.truncate(size)
+            f.flush()
+            os.fsync(f.fileno())
+        self._mm.close()
+        self._file.close()
+        os.replace(tmp, self.path)
+        self._file = open(self.path, "r+b")
+        self._mm = mmap.mmap(self._file.fileno(), 0)
+        self._replay_offset = _HEADER.size
+        self._write_offset = end
+        self._latest = latest
+        self._count = len(live)
+        self._superseded = 0
+
+    def _remap(self, size: int):
+        self._mm.flush()
+        self._mm.close()
+        self._file.truncate(size)
+        self._mm = mmap.mmap(self._file.fileno(), 0)
@@ -0,0 +1,207 @@
+import math
+import struct
+import time
+from functools import lru_cache
+from typing import Any, Callable, Dict, NamedTuple, Optional
+
+
+class Reading(NamedTuple):
+    # A payload decoded exactly once; shared by every consumer of the topic.
+    topic: str
+    raw: str          # stripped UTF-8 text of the payload ("" for binary codecs)
+    value: Any        # codec output after clamping, None if unparsable
+    received: float   # wall-clock receive time
+
+
+# --- Codecs -------------------------------------------------------------------
+# payload text -> value; None when the payload is empty or can't be parsed
+def _codec_text(raw: str):
+    return raw or None
+
+
+def _codec_lower(raw: str):
+    return raw.lower() or None
+
+
+def _codec_float(raw: str):
+    num = raw.rstrip("%").strip()
+    try:
+        return float(num) if num else None
+    except ValueError:
+        return None
+
+
+def _codec_int(raw: str):
+    num = _codec_float(raw)
+    return int(num) if num is not None and math.isfinite(num) else None
+
+
+def _codec_bool(raw: str):
+    return raw.lower() in ("true", "1", "on", "yes")
+
+
+CODECS: Dict[str, Callable[[str], Any]] = {
+    "text": _codec_text,
+    "lower": _codec_lower,
+    "float": _codec_float,
+    "int": _codec_int,
+    "percent": _codec_int,
+    "bool": _codec_bool,
+}
+
+
+# --- Binary codecs ------------------------------------------------------------
+# payload buffer -> value, decoded straight from the bytes (struct and the
+# msgpack/cbor decoders read the buffer in place) without going through
+# text; None when the payload can't be decoded.
+#   raw              a memoryview of the payload
+#   u8 .. f64        one little-endian number
+#   struct:<fmt>     a struct layout; one field -> scalar, several -> tuple
+#   msgpack, cbor    need the optional msgpack / cbor2 packages
+#   scan, scan_json  laser_scan.LaserScan (packed float32 ranges / JSON)
+STRUCT_ALIASES = {
+    "u8": "<B", "i8": "<b", "u16": "<H", "i16": "<h", "u32": "<I", "i32": "<i",
+    "u64": "<Q", "i64": "<q", "f32": "<f", "f64": "<d",
+}
+
+
+def _codec_raw(buf):
+    return memoryview(buf) if len(buf) else None
+
+
+def _struct_codec(fmt: str) -> Callable[[Any], Any]:
+    try:
+        layout = struct.Struct(fmt)
+    except struct.error as e:
+        raise ValueError(f"bad struct layout '{fmt}': {e}")
+    unpack_from, size = layout.unpack_from, layout.size
+    single = len(layout.unpack(bytes(size))) == 1
+
+    def decode(buf):
+        if len(buf) < size:
+            return None
+        return unpack_from(buf)[0] if single else unpack_from(buf)
+    return decode
+
+
+def _msgpack_codec() -> Callable[[Any], Any]:
+    try:
+        import msgpack
+    except ImportError:
+        raise ValueError("codec 'msgpack' needs the msgpack package")
+    unpackb = msgpack.unpackb
+
+    def decode(buf):
+        try:
+            return unpackb(buf) if len(buf) else None
+        except ValueError:
+            return None
+    return decode
+
+
+def _cbor_codec() -> Callable[[Any], Any]:
+    try:
+        import cbor2
+    except ImportError:
+        raise ValueError("codec 'cbor' needs the cbor2 package")
+    loads = cbor2.loads
+
+    def decode(buf):
+        try:
+            return loads(buf) if len(buf) else None
+        except ValueError:
+            return None
+    return decode
+
+
+def binary_codec(codec: str) -> Optional[Callable[[Any], Any]]:
+    # None if `codec` is not a binary codec; ValueError if it is but can't be used
+    if codec == "raw":
+        return _codec_raw
+    fmt = STRUCT_ALIASES.get(codec)
+    if fmt is None and codec.startswith("struct:"):
+        fmt = codec[len("struct:"):]
+    if fmt is not None:
+        return _struct_codec(fmt)
+    if codec == "msgpack":
+        return _msgpack_codec()
+    if codec == "cbor":
+        return _cbor_codec()
+    if codec in ("scan", "scan_json"):
+        from laser_scan import decode_scan, decode_scan_json
+        return decode_scan if codec == "scan" else decode_scan_json
+    return None
+
+
+def _compile_clamp(clamp) -> Optional[Callable[[Any], Any]]:
+    if not clamp:
+        return None
+    lo, hi = clamp
+
+    def apply(v):
+        if not isinstance(v, (int, float)) or isinstance(v, bool):
+            return v
+        if lo is not None and v < lo:
+            v = type(v)(lo)
+        if hi is not None and v > hi:
+            v = type(v)(hi)
+        return v
+    return apply
+
+
+# --- Decoders -----------------------------------------------------------------
+def decode_text(topic: str, payload: bytes) -> str:
+    # default MqttService decoder: handlers receive the stripped text
+    return payload.decode("utf-8", errors="replace").strip()
+
+
+@lru_cache(maxsize=None)
+def value_decoder(codec: str) -> Callable[[str, bytes], Any]:
+    # MqttService decoder that hands handlers the codec's value directly
+    # (no Reading); one shared function per codec so MqttService still
+    # decodes a payload once for all handlers of the same codec
+    if codec == "text":
+        return decode_text
+    binary = binary_codec(codec)
+    if binary is not None:
+        return lambda topic, payload: binary(payload)
+    parse = CODECS.get(codec)
+    if parse is None:
+        raise ValueError(f"unknown codec '{codec}'")
+    return lambda topic, payload: parse(payload.decode("utf-8", errors="replace").strip())
+
+
+class PayloadDecoder:
+    # bytes -> Reading for one topic, with the codec and clamp resolved once.
+    # Binary codecs decode from the payload buffer; their Readings carry no
+    # text (raw == "").
+
+    __slots__ = ("codec", "binary", "_parse", "_clamp")
+
+    def __init__(self, codec: str = "text", clamp=None):
+        binary = binary_codec(codec)
+        if binary is None and codec not in CODECS:
+            raise ValueError(f"unknown codec '{codec}'")
+        self.codec = codec
+        self.binary = binary is not None
+        self._parse = binary or CODECS[codec]
+        self._clamp = _compile_clamp(clamp)
+
+    def parse(self, topic: str, raw: str, received: Optional[float] = None) -> Reading:
+        if self.binary:
+            return self.decode(topic, raw.encode("utf-8"), received)
+        value = self._parse(raw)
+        if self._clamp is not None:
+            value = self._clamp(value)
+        return Reading(topic, raw, value, time.time() if received is None else received)
+
+    def decode(self, topic: str, payload: bytes, received: Optional[float] = None) -> Reading:
+        if not self.binary:
+            return self.parse(topic, payload.decode("utf-8", errors="replace").strip(), received)
+        value = self._parse(payload)
+        if self._clamp is not None:
+            value = self._clamp(value)
+        return Reading(topic, "", value, time.time() if received is None else received)
+
+    def __call__(self, topic: str, payload: bytes) -> Reading:
+        return self.decode(topic, payload)
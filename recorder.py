@@ -0,0 +1,153 @@
+import gzip
+import struct
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional
+
+# File layout (optionally gzip-compressed as a whole):
+#   header   "MQRC", version u16, flags u16, start time f64 (epoch seconds)
+#   frames   kind u8 followed by
+#     TOPIC    topic id u16, length u16, utf-8 topic      (first use of a topic)
+#     MESSAGE  topic id u16, dt u32 (us since the previous frame), length u32, payload
+#     CLOCK    absolute time f64                          (gaps over ~71 minutes)
+_MAGIC = b"MQRC"
+_VERSION = 1
+_HEADER = struct.Struct("<4sHHd")
+_KIND = struct.Struct("<B")
+_TOPIC = struct.Struct("<HH")
+_MESSAGE = struct.Struct("<HII")
+_CLOCK = struct.Struct("<d")
+
+TOPIC, MESSAGE, CLOCK = 1, 2, 3
+_MAX_DT_US = 0xFFFFFFFF
+
+
+class Frame(NamedTuple):
+    timestamp: float
+    topic: str
+    payload: bytes
+
+
+class ReplayStats(NamedTuple):
+    messages: int
+    elapsed: float      # wall-clock seconds spent replaying
+    rate: float         # messages per second
+
+
+class SessionRecorder:
+    # Captures what MqttService._on_message receives as compact binary
+    # frames: topics are interned (written once, then referenced by id) and
+    # times are microsecond deltas. record() may be called from the MQTT
+    # thread. A ".gz" path (or compress=True) gzips the stream.
+
+    def __init__(self, path: str, compress: Optional[bool] = None):
+        self.path = path
+        if compress is None:
+            compress = path.endswith(".gz")
+        self._out = gzip.open(path, "wb", compresslevel=6) if compress else open(path, "wb", buffering=1 << 16)
+        self._topics: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._base = time.time()
+        self._clock_us = 0
+        self._out.write(_HEADER.pack(_MAGIC, _VERSION, 0, self._base))
+
+        # counters
+        self.frames = 0
+
+    def record(self, topic: str, payload: bytes, timestamp: Optional[float] = None):
+        ts = time.time() if timestamp is None else timestamp
+        with self._lock:
+            write = self._out.write
+            tid = self._topics.get(topic)
+            if tid is None:
+                tid = self._topics[topic] = len(self._topics)
+                t = topic.encode("utf-8")
+                write(_KIND.pack(TOPIC) + _TOPIC.pack(tid, len(t)) + t)
+            dt = int((ts - self._base) * 1e6) - self._clock_us
+            if dt > _MAX_DT_US:
+                write(_KIND.pack(CLOCK) + _CLOCK.pack(ts))
+                self._base, self._clock_us, dt = ts, 0, 0
+            elif dt < 0:
+                dt = 0      # out-of-order timestamp: keep the stream monotonic
+            self._clock_us += dt
+            write(_KIND.pack(MESSAGE) + _MESSAGE.pack(tid, dt, len(payload)) + bytes(payload))
+            self.frames += 1
+
+    def flush(self):
+        with self._lock:
+            self._out.flush()
+
+    def close(self):
+        with self._lock:
+            self._out.close()
+
+
+class SessionReplayer:
+    # Reads a SessionRecorder file back (gzip is detected) and feeds it
+    # through `inject(topic, payload, timestamp)`, normally MqttService.inject,
+    # at the recorded pace scaled by `speed` (2.0 = twice as fast); speed <= 0
+    # replays as fast as the pipeline accepts. `timestamp` is the recorded
+    # receive time of the frame.
+
+    def __init__(self, path: str):
+        self.path = path
+        self._stop = threading.Event()
+
+    def frames(self) -> Iterator[Frame]:
+        with open(self.path, "rb") as f:
+            gz = f.read(2) == b"\x1f\x8b"
+        with (gzip.open(self.path, "rb") if gz else open(self.path, "rb", buffering=1 << 16)) as f:
+            head = f.read(_HEADER.size)
+            magic, version, _, base = _HEADER.unpack(head)
+            if magic != _MAGIC or version != _VERSION:
+                raise ValueError(f"{self.path}: not a session recording")
+            topics: List[str] = []
+            clock_us = 0
+            read = f.read
+            while True:
+                kind = read(1)
+                if not kind:
+                    return
+                kind = kind[0]
+                if kind == MESSAGE:
+                    tid, dt, n = _MESSAGE.unpack(read(_MESSAGE.size))
+                    clock_us += dt
+                    payload = read(n)
+                    if len(payload) < n:
+                        return      # truncated tail (recorder not closed)
+                    yield Frame(base + clock_us / 1e6, topics[tid], payload)
+                elif kind == TOPIC:
+                    tid, n = _TOPIC.unpack(read(_TOPIC.size))
+                    topics.append(read(n).decode("utf-8"))
+                elif kind == CLOCK:
+                    (base,) = _CLOCK.unpack(read(_CLOCK.size))
+                    clock_us = 0
+                else:
+                    raise ValueError(f"{self.path}: bad frame kind {kind}")
+
+    def replay(self,
+               inject: Callable[[str, bytes, float], None],
+               speed: float = 1.0) -> ReplayStats:
+        self._stop.clear()
+        count = 0
+        start = time.perf_counter()
+        first = None
+        try:
+            for frame in self.frames():
+                if self._stop.is_set():
+                    break
+                if speed > 0:
+                    if first is None:
+                        first = frame.timestamp
+                    wait = (frame.timestamp - first) / speed - (time.perf_counter() - start)
+                    if wait > 0 and self._stop.wait(wait):
+                        break
+                inject(frame.topic, frame.payload, frame.timestamp)
+                count += 1
+        except (struct.error, EOFError):
+            pass    # truncated tail (e.g. a capture that was never closed)
+        elapsed = time.perf_counter() - start
+        return ReplayStats(count, elapsed, count / elapsed if elapsed > 0 else 0.0)
+
+    def stop(self):
+        self._stop.set()
@@ -0,0 +1,57 @@
+from typing import Any, Callable, Dict, Hashable
+
+from bindings import Visual
+
+Renderer = Callable[[Any, Visual], None]
+
+# the part of a Visual each built-in renderer kind actually draws
+RENDER_STATE: Dict[str, Callable[[Visual], Hashable]] = {
+    "label": lambda v: (v.text, v.color, v.font, v.stale),
+    "progress": lambda v: v.value or 0,
+    "textbox": lambda v: (v.text, v.stale),
+    "gauge": lambda v: v.value,
+    "switch": lambda v: bool(v.value),
+    "scan": lambda v: v.value,          # a LaserScan compares by identity
+}
+
+
+class RenderCache:
+    # Diffing layer in front of the renderers: remembers the last state
+    # applied to each widget and only calls into Tk when the state that the
+    # renderer actually draws has changed. `state(visual)` extracts that
+    # state (e.g. text/colour/font for a label); periodic telemetry that
+    # repeats the same reading, or readings that map to the same visual,
+    # then cost one tuple comparison instead of a configure() round-trip.
+    # Tk thread only.
+
+    def __init__(self):
+        self._last: Dict[Any, Hashable] = {}
+
+        # counters
+        self.applied = 0
+        self.skipped = 0
+
+    def wrap(self, render: Renderer, state: Callable[[Visual], Hashable]) -> Renderer:
+        last = self._last
+
+        def cached(widget, visual: Visual):
+            key = state(visual)
+            if widget in last and last[widget] == key:
+                self.skipped += 1
+                return
+            render(widget, visual)
+            last[widget] = key
+            self.applied += 1
+        return cached
+
+    def invalidate(self, widget=None):
+        # Forget the cached state (all widgets by default), e.g. after a
+        # widget was changed outside the renderers.
+        if widget is None:
+            self._last.clear()
+        else:
+            self._last.pop(widget, None)
+
+    def reset_stats(self):
+        self.applied = 0
+        self.skipped = 0
@@ -0,0 +1,93 @@
+import math
+import time
+import tkinter as tk
+from typing import Optional
+
+from laser_scan import LaserScan, ScanProjector
+
+
+class LaserScanView(tk.Canvas):
+    # Top-down plot of the latest LaserScan around the robot. The outline is
+    # one canvas line item updated in place with coords() (ScanProjector
+    # does the polar conversion and decimation in NumPy), so a frame costs
+    # one Tk call whatever the number of points. Range rings are redrawn
+    # only on resize. `range_m` fixes the plotted radius; by default the
+    # scan's range_max is used when finite. Call show()/redraw() on the Tk
+    # thread.
+
+    RING_COLOR = "#2a2a2a"
+
+    def __init__(self,
+                 master,
+                 range_m: Optional[float] = None,
+                 color: str = "#4da3ff",
+                 size: int = 220,
+                 min_px: float = 1.0,
+                 **kwargs):
+        kwargs.setdefault("bg", "#111111")
+        kwargs.setdefault("highlightthickness", 0)
+        super().__init__(master, width=size, height=size, **kwargs)
+        self.range_m = range_m
+        self.scan: Optional[LaserScan] = None
+        self._projector = ScanProjector(min_px)
+        self._rings_for = None
+        self._line = self.create_line(0, 0, 0, 0, fill=color, width=1)
+        self._robot = self.create_polygon(0, 0, 0, 0, 0, 0, fill="#dddddd", outline="")
+        self._label = self.create_text(4, 2, anchor="nw", fill="#888888", font=("TkDefaultFont", 8))
+        self.bind("<Configure>", lambda e: self.redraw())
+
+        # counters
+        self.redraws = 0
+        self.last_redraw_ms = 0.0
+        self.last_points = 0
+
+    def show(self, scan: Optional[LaserScan]):
+        self.scan = scan
+        self.redraw()
+
+    def redraw(self, _=None):
+        t_start = time.perf_counter()
+        width = self.winfo_width()
+        height = self.winfo_height()
+        if width <= 1:
+            width = int(self.cget("width"))
+            height = int(self.cget("height"))
+        cx, cy = width / 2.0, height / 2.0
+        radius_m = self._radius(self.scan)
+        px_per_m = (min(width, height) / 2.0 - 2.0) / radius_m
+        if self._rings_for != (width, height, radius_m):
+            self._draw_rings(cx, cy, px_per_m, radius_m)
+            self._rings_for = (width, height, radius_m)
+
+        scan = self.scan
+        coords = self._projector.coords(scan, cx, cy, px_per_m) if scan is not None else []
+        if len(coords) >= 4:
+            self.coords(self._line, coords)
+        else:
+            self.coords(self._line, 0, 0, 0, 0)
+        self.last_points = len(coords) // 2
+        nearest = scan.nearest() if scan is not None else None
+        self.itemconfigure(self._label, text="" if nearest is None else f"{nearest * 100:.0f} cm")
+
+        self.redraws += 1
+        self.last_redraw_ms = (time.perf_counter() - t_start) * 1000.0
+
+    # --- Internals --------------------------------------------------------
+    def _radius(self, scan: Optional[LaserScan]) -> float:
+        if self.range_m:
+            return self.range_m
+        if scan is not None and math.isfinite(scan.range_max) and scan.range_max > 0:
+            return scan.range_max
+        return 10.0
+
+    def _draw_rings(self, cx: float, cy: float, px_per_m: float, radius_m: float):
+        # one ring per metre (per 5 m beyond 10 m), behind the outline
+        self.delete("ring")
+        step = 1.0 if radius_m <= 10.0 else 5.0
+        r = step
+        while r <= radius_m + 1e-9:
+            p = r * px_per_m
+            self.create_oval(cx - p, cy - p, cx + p, cy + p, outline=self.RING_COLOR, tags="ring")
+            r += step
+        self.tag_lower("ring")
+        self.coords(self._robot, cx, cy - 6, cx - 4, cy + 4, cx + 4, cy + 4)
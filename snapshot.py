@@ -0,0 +1,166 @@
+import os
+import struct
+import threading
+import time
+from typing import Dict, NamedTuple, Optional
+
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".mqtt_dashboard", "snapshot.bin")
+
+_MAGIC = b"MQSS"
+_VERSION = 1
+# magic, version, reserved, entry count, saved at
+_HEADER = struct.Struct("<4sHHId")
+# received, topic length, payload length
+_ENTRY = struct.Struct("<dHI")
+
+
+class SnapshotEntry(NamedTuple):
+    topic: str
+    payload: bytes
+    received: float
+
+
+class SnapshotCache:
+    # Last-known state for a warm start: the latest payload per topic,
+    # written to `path` every `interval_s` by a background thread when
+    # something changed, and once more on close(). The payload is kept
+    # rather than its decoded value so that the topic's own decoder
+    # reproduces exactly the same Reading on load, binary codecs included.
+    #
+    # Writes are atomic: the snapshot goes to a temporary file in the same
+    # directory, is fsynced, then renamed over the old one, so a crash
+    # leaves either the previous or the new snapshot, never a torn one.
+    #
+    # update() is called on the MQTT thread for every bound message and only
+    # stores a reference under a lock.
+
+    def __init__(self,
+                 path: str = DEFAULT_PATH,
+                 interval_s: float = 2.0,
+                 max_topics: int = 4096):
+        self.path = path
+        self.interval_s = interval_s
+        self.max_topics = max_topics
+        self._latest: Dict[str, SnapshotEntry] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.saved_at: Optional[float] = None       # wall-clock time of the loaded/last written snapshot
+        self.last_error: Optional[str] = None
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        # counters
+        self.updates = 0
+        self.saves = 0
+        self.errors = 0
+        self.bytes = 0
+        self.last_save_ms = 0.0
+
+    # --- API --------------------------------------------------------------
+    def load(self) -> Dict[str, SnapshotEntry]:
+        # Reads the snapshot file into the cache and returns it (empty if
+        # there is none). ValueError if the file is not a valid snapshot.
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return {}
+        entries = _parse(data)
+        with self._lock:
+            for topic, entry in entries.items():
+                self._latest.setdefault(topic, entry)
+        self.saved_at = _HEADER.unpack_from(data)[4]
+        return entries
+
+    def update(self, topic: str, payload: bytes, received: Optional[float] = None):
+        entry = SnapshotEntry(topic, bytes(payload), time.time() if received is None else received)
+        with self._lock:
+            if topic not in self._latest and len(self._latest) >= self.max_topics:
+                return
+            self._latest[topic] = entry
+            self._dirty = True
+        self.updates += 1
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="snapshot", daemon=True)
+            self._thread.start()
+
+    def close(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.save()
+
+    def save(self) -> bool:
+        # Writes the snapshot now if anything changed since the last save.
+        with self._lock:
+            if not self._dirty:
+                return False
+            entries = list(self._latest.values())
+            self._dirty = False
+        t0 = time.perf_counter()
+        now = time.time()
+        data = _serialize(entries, now)
+        tmp = self.path + ".tmp"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+        except OSError as e:
+            self.errors += 1
+            self.last_error = str(e)
+            with self._lock:
+                self._dirty = True      # retry on the next interval
+            return False
+        self.saved_at = now
+        self.saves += 1
+        self.bytes = len(data)
+        self.last_save_ms = (time.perf_counter() - t0) * 1000.0
+        return True
+
+    def __len__(self) -> int:
+        return len(self._latest)
+
+    # --- Internals --------------------------------------------------------
+    def _run(self):
+        while not self._stop.wait(self.interval_s):
+            self.save()
+
+
+def _serialize(entries, saved_at: float) -> bytes:
+    parts = [_HEADER.pack(_MAGIC, _VERSION, 0, len(entries), saved_at)]
+    for e in entries:
+        topic = e.topic.encode("utf-8")
+        parts.append(_ENTRY.pack(e.received, len(topic), len(e.payload)))
+        parts.append(topic)
+        parts.append(e.payload)
+    return b"".join(parts)
+
+
+def _parse(data: bytes) -> Dict[str, SnapshotEntry]:
+    if len(data) < _HEADER.size:
+        raise ValueError("snapshot file is truncated")
+    magic, version, _, count, _ = _HEADER.unpack_from(data)
+    if magic != _MAGIC or version != _VERSION:
+        raise ValueError("not a snapshot file (or an unsupported version)")
+    entries: Dict[str, SnapshotEntry] = {}
+    pos = _HEADER.size
+    view = memoryview(data)
+    for _ in range(count):
+        if pos + _ENTRY.size > len(data):
+            raise ValueError("snapshot file is truncated")
+        received, topic_len, payload_len = _ENTRY.unpack_from(data, pos)
+        pos += _ENTRY.size
+        end = pos + topic_len + payload_len
+        if end > len(data):
+            raise ValueError("snapshot file is truncated")
+        topic = bytes(view[pos:pos + topic_len]).decode("utf-8")
+        entries[topic] = SnapshotEntry(topic, bytes(view[pos + topic_len:end]), received)
+        pos = end
+    return entries
@@ -0,0 +1,75 @@
+import time
+import tkinter as tk
+from typing import Optional
+
+import numpy as np
+
+from history import RingSeries
+
+
+class Sparkline(tk.Canvas):
+    # Strip chart of the last `window_s` seconds of a RingSeries. The whole
+    # trace is one canvas line item updated in place with coords(); the
+    # series is downsampled to the canvas width first, so redraw() costs the
+    # same for 100 or 1M stored samples. Call redraw() on the Tk thread.
+
+    def __init__(self,
+                 master,
+                 series: Optional[RingSeries] = None,
+                 window_s: float = 60.0,
+                 method: str = "minmax",
+                 color: str = "#4da3ff",
+                 value_range: Optional[tuple] = None,
+                 fmt: str = "{:.0f}",
+                 height: int = 48,
+                 **kwargs):
+        kwargs.setdefault("bg", "#111111")
+        kwargs.setdefault("highlightthickness", 0)
+        super().__init__(master, height=height, **kwargs)
+        self.series = series
+        self.window_s = window_s
+        self.method = method
+        self.value_range = value_range     # fixed (lo, hi), or autoscale
+        self.fmt = fmt
+        self._line = self.create_line(0, 0, 0, 0, fill=color, width=1)
+        self._label = self.create_text(4, 2, anchor="nw", fill="#888888", font=("TkDefaultFont", 8))
+        self.bind("<Configure>", lambda e: self.redraw())
+
+        # counters
+        self.redraws = 0
+        self.last_redraw_ms = 0.0
+
+    def set_series(self, series: Optional[RingSeries]):
+        self.series = series
+        self.redraw()
+
+    def redraw(self, _=None):
+        t_start = time.perf_counter()
+        width = self.winfo_width()
+        height = self.winfo_height()
+        if width <= 1:
+            width = int(self.cget("width"))
+            height = int(self.cget("height"))
+        last = self.series.last() if self.series is not None else None
+        if last is None:
+            self.coords(self._line, 0, 0, 0, 0)
+            self.itemconfigure(self._label, text="")
+            return
+
+        t1 = last[0]
+        t0 = t1 - self.window_s
+        t, v = self.series.downsample(t0, t1, width, self.method)
+        if len(t) < 2:
+            self.coords(self._line, 0, 0, 0, 0)
+        else:
+            lo, hi = self.value_range or (float(v.min()), float(v.max()))
+            if hi <= lo:
+                lo, hi = lo - 1.0, hi + 1.0
+            pad = 2.0
+            x = (t - t0) * ((width - 1) / self.window_s)
+            y = (height - 1 - pad) - (np.clip(v, lo, hi) - lo) * ((height - 1 - 2 * pad) / (hi - lo))
+            self.coords(self._line, np.column_stack((x, y)).ravel().tolist())
+        self.itemconfigure(self._label, text=self.fmt.format(last[1]))
+
+        self.redraws += 1
+        self.last_redraw_ms = (time.perf_counter() - t_start) * 1000.0
@@ -0,0 +1,448 @@
+import asyncio
+import base64
+import hashlib
+import json
+import math
+import struct
+import threading
+from typing import Any, Dict, Iterable, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from bindings import Visual
+from view_model import CHANGE
+
+_WS_GUID = b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+_WS_TEXT = 0x1
+_WS_CLOSE = 0x8
+_WS_PING = 0x9
+_WS_PONG = 0xA
+_WS_MAX_FRAME = 1 << 16     # viewers have nothing to say; anything larger is dropped
+_SEND_BUFFER = 1 << 16      # unsent bytes per connection before a send waits for the viewer
+
+_REASONS = {
+    101: "Switching Protocols",
+    200: "OK",
+    304: "Not Modified",
+    400: "Bad Request",
+    403: "Forbidden",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    503: "Service Unavailable",
+}
+
+
+def _jsonable(value: Any) -> Any:
+    if value is None or isinstance(value, (bool, int, str)):
+        return value
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, (tuple, list)):
+        return [_jsonable(v) for v in value]
+    if isinstance(value, dict):
+        return {str(k): _jsonable(v) for k, v in value.items()}
+    as_json = getattr(value, "as_json", None)
+    if as_json is not None:
+        return _jsonable(as_json())
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes(value).hex()
+    return str(value)
+
+
+def _response(status: int, body: bytes = b"", headers: Tuple[Tuple[str, str], ...] = ()) -> bytes:
+    lines = [f"HTTP/1.1 {status} {_REASONS[status]}"]
+    if status != 101:
+        lines.append(f"Content-Length: {len(body)}")
+    lines += [f"{k}: {v}" for k, v in headers]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body
+
+
+def _ws_frame(payload: bytes, opcode: int = _WS_TEXT) -> bytes:
+    n = len(payload)
+    if n < 126:
+        return struct.pack("!BB", 0x80 | opcode, n) + payload
+    if n < 1 << 16:
+        return struct.pack("!BBH", 0x80 | opcode, 126, n) + payload
+    return struct.pack("!BBQ", 0x80 | opcode, 127, n) + payload
+
+
+class StateServer:
+    # Read-only view of a DashboardModel over HTTP and WebSocket, so extra
+    # viewers read the dashboard instead of each opening a broker connection.
+    # It listens to the model's CHANGE events (the dispatch path that feeds
+    # the Tk window) and runs on its own asyncio loop thread, bound to
+    # localhost by default.
+    #
+    # Every change bumps a version number; each binding remembers the
+    # version it last changed in, so a delta is just the bindings newer than
+    # the client's version.
+    #   GET /state                 full state; ETag is the version
+    #   GET /state?since=V         changes after version V (full if V is unknown)
+    #       &wait=S                long poll: hold the request up to S seconds
+    #                              until something changes, else 304
+    #   If-None-Match: "V"         304 if still at version V (with wait= too)
+    #   GET /stream                WebSocket: the full state, then one delta
+    #                              message per tick with changes; slow viewers
+    #                              skip versions instead of queueing them
+    #   GET /health                version and client counts
+    # Bodies: {"version": V, "full": bool, "state": {binding: entry}}, entry =
+    # {"topic", "value", "text", "color", "stale", "received"}.
+    #
+    # Streams and long polls wake on a shared tick, at most once per
+    # min_interval_s while things change, rather than on every change: the
+    # delta since the previous tick is serialized once and sent as-is to
+    # every viewer that was up to date, however many there are.
+    #
+    # Requests whose Host header names anything but this server (localhost,
+    # 127.0.0.1, [::1], `host` or `allowed_hosts`, at our port) get a 403,
+    # which defeats DNS rebinding; so do WebSocket upgrades with an Origin
+    # other than the server's own or one in `allowed_origins`, so that web
+    # pages on other sites can't read the stream. Clients that send neither
+    # header (not browsers) are served.
+
+    def __init__(self,
+                 model,
+                 host: str = "127.0.0.1",
+                 port: int = 8765,
+                 max_clients: int = 1024,
+                 min_interval_s: float = 0.05,
+                 max_wait_s: float = 30.0,
+                 send_timeout_s: float = 5.0,
+                 allowed_hosts: Iterable[str] = (),
+                 allowed_origins: Iterable[str] = ()):
+        self.host = host
+        self.port = port
+        self.max_clients = max_clients
+        self.min_interval_s = min_interval_s
+        self.max_wait_s = max_wait_s
+        self.send_timeout_s = send_timeout_s
+        self.allowed_hosts = frozenset(h.lower() for h in ("localhost", "127.0.0.1", "[::1]", host, *allowed_hosts))
+        self.allowed_origins = frozenset(o.lower().rstrip("/") for o in allowed_origins)
+        self.version = 0
+        self._entries: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+        self._bodies: Dict[Optional[int], bytes] = {}      # since -> body, at self._bodies_version
+        self._bodies_version = -1
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._changed: Optional[asyncio.Event] = None
+        self._wake_pending = False
+        self._tick: Optional[asyncio.Event] = None
+        self._tick_prev = 0         # version of the tick before the last one
+        self._tick_version = 0
+        self._tick_body = b""       # delta from _tick_prev to _tick_version
+
+        # counters
+        self.requests = 0
+        self.not_modified = 0
+        self.ws_messages = 0
+        self.bytes_sent = 0
+        self.clients = 0        # open connections
+        self.streams = 0        # open WebSocket streams
+        self.rejected = 0
+        self.forbidden = 0      # foreign Host or Origin
+
+        for name, visual in model.visuals().items():
+            self._set(name, visual, None)
+        model.listen(CHANGE, self.on_change)
+
+    # --- API --------------------------------------------------------------
+    def start(self):
+        # Binds and starts serving; OSError if the port can't be bound.
+        if self._thread is not None:
+            return
+        started = threading.Event()
+        failed = []
+
+        def run():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            self._changed = asyncio.Event()
+            self._tick = asyncio.Event()
+            try:
+                server = loop.run_until_complete(asyncio.start_server(self._serve, self.host, self.port))
+            except OSError as e:
+                failed.append(e)
+                loop.close()
+                started.set()
+                return
+            self.port = server.sockets[0].getsockname()[1]
+            self._loop = loop
+            loop.create_task(self._ticker())
+            started.set()
+            try:
+                loop.run_forever()
+            finally:
+                self._loop = None
+                server.close()
+                tasks = asyncio.all_tasks(loop)
+                for task in tasks:
+                    task.cancel()
+                loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+                loop.close()
+
+        self._thread = threading.Thread(target=run, name="state-server", daemon=True)
+        self._thread.start()
+        started.wait()
+        if failed:
+            self._thread = None
+            raise failed[0]
+
+    def stop(self):
+        loop = self._loop
+        if loop is not None:
+            loop.call_soon_threadsafe(loop.stop)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def on_change(self, name: str, visual: Visual, received: Optional[float]):
+        # model CHANGE listener (MQTT thread): record, then wake the loop once
+        with self._lock:
+            self._set(name, visual, received)
+        self._wake()
+
+    # --- Internals --------------------------------------------------------
+    def _set(self, name: str, visual: Visual, received: Optional[float]):
+        self.version += 1
+        previous = self._entries.get(name)
+        if received is None and previous is not None:
+            received = previous[1]["received"]      # a repaint keeps the receive time
+        self._entries[name] = (self.version, {
+            "topic": visual.topic,
+            "value": _jsonable(visual.value),
+            "text": visual.text,
+            "color": visual.color,
+            "stale": visual.stale,
+            "received": received,
+        })
+
+    def _host_allowed(self, host: Optional[str]) -> bool:
+        # "name[:port]" naming this server; absent Host (HTTP/1.0 tools) is fine
+        if host is None:
+            return True
+        host = host.lower()
+        if host.startswith("["):
+            name, _, rest = host.partition("]")
+            name += "]"
+            port = rest[1:] if rest.startswith(":") else ""
+        else:
+            name, _, port = host.partition(":")
+        if port and not port.isdigit():
+            return False
+        return name in self.allowed_hosts and (int(port) if port else 80) == self.port
+
+    def _origin_allowed(self, origin: str) -> bool:
+        origin = origin.lower().rstrip("/")
+        if origin in self.allowed_origins:
+            return True
+        url = urlsplit(origin)
+        return url.scheme in ("http", "https") and self._host_allowed(url.netloc)
+
+    def _wake(self):
+        loop = self._loop
+        if loop is None or self._wake_pending:
+            return
+        self._wake_pending = True
+        try:
+            loop.call_soon_threadsafe(self._notify)
+        except RuntimeError:        # loop closed
+            pass
+
+    def _notify(self):
+        # loop thread: release everything waiting for a change
+        self._wake_pending = False
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    def _body(self, since: Optional[int]) -> Tuple[int, bytes]:
+        # (version, body) with the changes after `since`, or everything
+        with self._lock:
+            version = self.version
+            if since is not None and not 0 < since <= version:
+                since = None
+            if self._bodies_version != version:
+                self._bodies.clear()
+                self._bodies_version = version
+            body = self._bodies.get(since)
+            if body is None:
+                if since is None:
+                    state = {name: entry for name, (_, entry) in self._entries.items()}
+                else:
+                    state = {name: entry for name, (v, entry) in self._entries.items() if v > since}
+                body = json.dumps({"version": version, "full": since is None, "state": state},
+                                  separators=(",", ":")).encode("utf-8")
+                self._bodies[since] = body
+        return version, body
+
+    def _next_body(self, sent: int) -> Tuple[int, bytes]:
+        # the body that brings a viewer at version `sent` up to date; the
+        # viewers that were current at the previous tick share the tick's
+        if sent == self._tick_prev:
+            return self._tick_version, self._tick_body
+        return self._body(sent)
+
+    async def _ticker(self):
+        while True:
+            if self.version == self._tick_version:
+                await self._changed.wait()
+            prev = self._tick_version
+            self._tick_version, self._tick_body = self._body(prev or None)
+            self._tick_prev = prev
+            tick, self._tick = self._tick, asyncio.Event()
+            tick.set()
+            await asyncio.sleep(self.min_interval_s)
+
+    async def _wait_tick(self, version: int, timeout: float):
+        # until a tick brings something newer than `version`, or the timeout
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while self._tick_version <= version:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return
+            try:
+                await asyncio.wait_for(self._tick.wait(), remaining)
+            except asyncio.TimeoutError:
+                return
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        if self.clients >= self.max_clients:
+            self.rejected += 1
+            writer.write(_response(503, b"", (("Connection", "close"),)))
+            writer.close()
+            return
+        self.clients += 1
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                    return
+                lines = head.decode("latin-1").split("\r\n")
+                parts = lines[0].split(" ")
+                if len(parts) != 3:
+                    await self._send(writer, _response(400, b"", (("Connection", "close"),)))
+                    return
+                method, target, _ = parts
+                headers = {}
+                for line in lines[1:]:
+                    key, sep, value = line.partition(":")
+                    if sep:
+                        headers[key.strip().lower()] = value.strip()
+                self.requests += 1
+                url = urlsplit(target)
+                query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+                if not self._host_allowed(headers.get("host")):
+                    self.forbidden += 1
+                    await self._send(writer, _response(403, b"", (("Connection", "close"),)))
+                    return
+                if method != "GET":
+                    await self._send(writer, _response(405, b"", (("Allow", "GET"),)))
+                elif url.path == "/stream" and headers.get("upgrade", "").lower() == "websocket":
+                    await self._stream(reader, writer, headers)
+                    return
+                elif url.path == "/state":
+                    await self._state(writer, query, headers)
+                elif url.path == "/health":
+                    body = json.dumps({"version": self.version, "clients": self.clients,
+                                       "streams": self.streams}).encode("utf-8")
+                    await self._send(writer, _response(200, body, (("Content-Type", "application/json"),)))
+                else:
+                    await self._send(writer, _response(404))
+                if headers.get("connection", "").lower() == "close":
+                    return
+        except (ConnectionError, asyncio.TimeoutError):
+            pass
+        except asyncio.CancelledError:      # stop()
+            pass
+        finally:
+            self.clients -= 1
+            writer.close()
+
+    async def _send(self, writer: asyncio.StreamWriter, data: bytes):
+        writer.write(data)
+        self.bytes_sent += len(data)
+        if writer.transport.get_write_buffer_size() > _SEND_BUFFER:
+            await asyncio.wait_for(writer.drain(), self.send_timeout_s)
+
+    async def _state(self, writer: asyncio.StreamWriter, query: Dict[str, str], headers: Dict[str, str]):
+        try:
+            since = int(query["since"]) if "since" in query else None
+            wait = min(max(float(query.get("wait", 0.0)), 0.0), self.max_wait_s)
+        except ValueError:
+            await self._send(writer, _response(400))
+            return
+        base = since
+        if base is None:
+            etag = headers.get("if-none-match", "").strip('W/"')
+            base = int(etag) if etag.isdigit() else None
+        if base is not None and wait > 0:
+            await self._wait_tick(base, wait)
+        version = self.version
+        tag = (("ETag", f'"{version}"'), ("Cache-Control", "no-cache"))
+        if base is not None and base == version:
+            self.not_modified += 1
+            await self._send(writer, _response(304, b"", tag))
+            return
+        version, body = self._next_body(since) if since is not None else self._body(None)
+        tag = (("ETag", f'"{version}"'), ("Cache-Control", "no-cache"))
+        await self._send(writer, _response(200, body, tag + (("Content-Type", "application/json"),)))
+
+    async def _stream(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, headers: Dict[str, str]):
+        origin = headers.get("origin")
+        if origin is not None and not self._origin_allowed(origin):
+            self.forbidden += 1
+            await self._send(writer, _response(403))
+            return
+        key = headers.get("sec-websocket-key")
+        if not key:
+            await self._send(writer, _response(400))
+            return
+        accept = base64.b64encode(hashlib.sha1(key.encode("latin-1") + _WS_GUID).digest()).decode("ascii")
+        await self._send(writer, _response(101, b"", (("Upgrade", "websocket"), ("Connection", "Upgrade"),
+                                                      ("Sec-WebSocket-Accept", accept))))
+        self.streams += 1
+        incoming = asyncio.ensure_future(self._ws_read(reader, writer))
+        try:
+            sent, body = self._body(None)
+            await self._send(writer, _ws_frame(body))
+            self.ws_messages += 1
+            while not incoming.done():
+                if self._tick_version > sent:
+                    sent, body = self._next_body(sent)
+                    await self._send(writer, _ws_frame(body))
+                    self.ws_messages += 1
+                    continue
+                tick = asyncio.ensure_future(self._tick.wait())
+                await asyncio.wait((incoming, tick), return_when=asyncio.FIRST_COMPLETED)
+                tick.cancel()
+        finally:
+            self.streams -= 1
+            incoming.cancel()
+
+    async def _ws_read(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        # answers pings and the closing handshake; data frames are ignored
+        try:
+            while True:
+                b0, b1 = await reader.readexactly(2)
+                opcode, n = b0 & 0x0F, b1 & 0x7F
+                if n == 126:
+                    n = struct.unpack("!H", await reader.readexactly(2))[0]
+                elif n == 127:
+                    n = struct.unpack("!Q", await reader.readexactly(8))[0]
+                if n > _WS_MAX_FRAME:
+                    return
+                mask = await reader.readexactly(4) if b1 & 0x80 else b"\0\0\0\0"
+                data = await reader.readexactly(n)
+                if opcode == _WS_CLOSE:
+                    writer.write(_ws_frame(b"", _WS_CLOSE))
+                    return
+                if opcode == _WS_PING:
+                    payload = bytes(c ^ mask[i % 4] for i, c in enumerate(data))
+                    writer.write(_ws_frame(payload, _WS_PONG))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            return
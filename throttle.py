@@ -0,0 +1,108 @@
+import time
+from collections import deque
+from typing import Any, Callable, Deque, NamedTuple
+
+
+class StreamStats(NamedTuple):
+    sent: int           # values published
+    dropped: int        # intermediate values superseded before being sent
+    rate: float         # effective publish rate over the last second (msg/s)
+
+
+class ThrottledPublisher:
+    # Rate-limited streaming publisher for continuous controls (sliders,
+    # joysticks). push() is called for every new value while dragging; at most
+    # `max_rate` values per second are published, the newest pending value
+    # wins and is sent on the trailing edge, and release() publishes the
+    # final value immediately unless it was the last one sent (a click without
+    # a drag is sent once, by push()). Runs on the Tk thread (timers via after()).
+
+    def __init__(self,
+                 widget,
+                 publish: Callable[[Any], None],
+                 max_rate: float = 10.0):
+        self._widget = widget
+        self._publish = publish
+        self.min_interval = 1.0 / max_rate if max_rate > 0 else 0.0
+        self._last_sent = 0.0
+        self._sent_value: Any = None
+        self._has_sent = False
+        self._pending: Any = None
+        self._has_pending = False
+        self._after_id = None
+        self._sent_times: Deque[float] = deque()
+
+        # counters
+        self.sent = 0
+        self.dropped = 0
+
+    # --- API --------------------------------------------------------------
+    def push(self, value: Any):
+        if self._has_pending:
+            self.dropped += 1
+        self._pending = value
+        self._has_pending = True
+
+        wait = self._last_sent + self.min_interval - time.monotonic()
+        if wait <= 0:
+            self._send_pending()
+        elif self._after_id is None:
+            self._after_id = self._widget.after(max(1, int(wait * 1000)), self._on_timer)
+
+    def release(self, value: Any = None) -> StreamStats:
+        # Publishes the final value (or the pending one) right away, unless
+        # it is the value sent last.
+        self._cancel_timer()
+        if value is not None:
+            if self._has_pending:
+                self.dropped += 1
+            self._pending = value
+            self._has_pending = True
+        if self._has_pending:
+            if self._has_sent and self._pending == self._sent_value:
+                self._pending = None
+                self._has_pending = False
+            else:
+                self._send_pending()
+        return self.stats()
+
+    def stats(self) -> StreamStats:
+        return StreamStats(self.sent, self.dropped, self.effective_rate())
+
+    def effective_rate(self, window: float = 1.0) -> float:
+        now = time.monotonic()
+        times = self._sent_times
+        while times and now - times[0] > window:
+            times.popleft()
+        return len(times) / window
+
+    def reset_stats(self):
+        self.sent = 0
+        self.dropped = 0
+        self._sent_times.clear()
+
+    # --- Internals --------------------------------------------------------
+    def _on_timer(self):
+        self._after_id = None
+        if self._has_pending:
+            self._send_pending()
+
+    def _cancel_timer(self):
+        if self._after_id is not None:
+            try:
+                self._widget.after_cancel(self._after_id)
+            except Exception:
+                pass
+            self._after_id = None
+
+    def _send_pending(self):
+        value = self._pending
+        self._pending = None
+        self._has_pending = False
+        self._sent_value = value
+        self._has_sent = True
+        now = time.monotonic()
+        self._last_sent = now
+        self._sent_times.append(now)
+        self.sent += 1
+        self._publish(value)
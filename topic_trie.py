@@ -0,0 +1,121 @@
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# opaque to the trie; MqttService stores its routes here
+Handler = Any
+
+
+class _Node:
+    __slots__ = ("children", "handlers")
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        self.handlers: List[Handler] = []
+
+
+def validate_filter(topic_filter: str):
+    if not topic_filter:
+        raise ValueError("empty topic filter")
+    levels = topic_filter.split("/")
+    for i, level in enumerate(levels):
+        if "#" in level and (level != "#" or i != len(levels) - 1):
+            raise ValueError(f"'#' must be the last level of a filter: {topic_filter}")
+        if "+" in level and level != "+":
+            raise ValueError(f"'+' must occupy a whole level: {topic_filter}")
+
+
+class TopicTrie:
+    # Subscription index over topic levels with MQTT `+`/`#` wildcards.
+    # match() walks at most one exact, one `+` and one `#` branch per level,
+    # so its cost depends on the topic depth, not on the number of filters.
+
+    def __init__(self):
+        self._root = _Node()
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    # --- API --------------------------------------------------------------
+    def add(self, topic_filter: str, handler: Handler):
+        validate_filter(topic_filter)
+        node = self._root
+        for level in topic_filter.split("/"):
+            child = node.children.get(level)
+            if child is None:
+                child = node.children[level] = _Node()
+            node = child
+        if handler not in node.handlers:
+            if not node.handlers:
+                self._count += 1
+            node.handlers.append(handler)
+
+    def remove(self, topic_filter: str, handler: Optional[Handler] = None) -> bool:
+        # Removes one handler (or all of them) from a filter. Returns True when
+        # the filter no longer has any handler.
+        path: List[Tuple[_Node, str]] = []
+        node = self._root
+        for level in topic_filter.split("/"):
+            child = node.children.get(level)
+            if child is None:
+                return True
+            path.append((node, level))
+            node = child
+
+        had_handlers = bool(node.handlers)
+        if handler is None:
+            node.handlers = []
+        elif handler in node.handlers:
+            node.handlers.remove(handler)
+        if had_handlers and not node.handlers:
+            self._count -= 1
+
+        # prune empty branches
+        for parent, level in reversed(path):
+            child = parent.children[level]
+            if child.handlers or child.children:
+                break
+            del parent.children[level]
+        return not node.handlers
+
+    def handlers_for(self, topic_filter: str) -> List[Handler]:
+        node = self._root
+        for level in topic_filter.split("/"):
+            node = node.children.get(level)
+            if node is None:
+                return []
+        return list(node.handlers)
+
+    def filters(self) -> Iterator[str]:
+        stack: List[Tuple[_Node, List[str]]] = [(self._root, [])]
+        while stack:
+            node, levels = stack.pop()
+            if node.handlers and levels:
+                yield "/".join(levels)
+            for level, child in node.children.items():
+                stack.append((child, levels + [level]))
+
+    def match(self, topic: str) -> List[Handler]:
+        levels = topic.split("/")
+        depth = len(levels)
+        out: List[Handler] = []
+        # wildcards at the first level never match topics starting with '$'
+        wild = not topic.startswith("$")
+        stack: List[Tuple[_Node, int]] = [(self._root, 0)]
+        while stack:
+            node, i = stack.pop()
+            children = node.children
+            if wild or i > 0:
+                multi = children.get("#")
+                if multi is not None:
+                    out.extend(multi.handlers)
+            if i == depth:
+                out.extend(node.handlers)
+                continue
+            exact = children.get(levels[i])
+            if exact is not None:
+                stack.append((exact, i + 1))
+            if wild or i > 0:
+                single = children.get("+")
+                if single is not None:
+                    stack.append((single, i + 1))
+        return out
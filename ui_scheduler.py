@@ -0,0 +1,91 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, NamedTuple, Optional, Tuple
+
+
+class TickStats(NamedTuple):
+    posted: int         # updates posted since the previous tick
+    rendered: int       # updates actually applied this tick
+    coalesced: int      # superseded updates that were dropped
+    duration_ms: float  # time spent applying the updates
+
+
+class UiUpdateScheduler:
+    # Latest-value-wins update table drained by a single periodic Tk tick.
+    # post() may be called from any thread; updates run on the Tk thread.
+
+    def __init__(self,
+                 widget,
+                 fps: float = 30.0,
+                 on_tick: Optional[Callable[[TickStats], None]] = None,
+                 on_error: Optional[Callable[[Hashable, Exception], None]] = None):
+        self._widget = widget
+        self.interval_ms = max(1, int(round(1000.0 / fps)))
+        self._on_tick = on_tick
+        self._on_error = on_error or (lambda k, e: None)
+        self._lock = threading.Lock()
+        self._pending: Dict[Hashable, Tuple[Callable[[Any], None], Any]] = {}
+        self._posted = 0
+        self._after_id = None
+        self._running = False
+
+        # counters
+        self.last_tick = TickStats(0, 0, 0, 0.0)
+        self.total_posted = 0
+        self.total_rendered = 0
+        self.total_coalesced = 0
+
+    # --- API --------------------------------------------------------------
+    def start(self):
+        self._running = True
+        if self._after_id is None:
+            self._after_id = self._widget.after(self.interval_ms, self._tick)
+
+    def stop(self):
+        self._running = False
+        if self._after_id is not None:
+            try:
+                self._widget.after_cancel(self._after_id)
+            except Exception:
+                pass
+            self._after_id = None
+
+    def post(self, key: Hashable, fn: Callable[[Any], None], value: Any):
+        with self._lock:
+            self._pending[key] = (fn, value)
+            self._posted += 1
+
+    def depth(self) -> int:
+        # Updates waiting for the next tick.
+        return len(self._pending)
+
+    def flush(self) -> TickStats:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            posted, self._posted = self._posted, 0
+
+        t0 = time.perf_counter()
+        for key, (fn, value) in pending.items():
+            try:
+                fn(value)
+            except Exception as e:
+                self._on_error(key, e)
+        duration_ms = (time.perf_counter() - t0) * 1000.0
+
+        stats = TickStats(posted, len(pending), posted - len(pending), duration_ms)
+        self.last_tick = stats
+        self.total_posted += stats.posted
+        self.total_rendered += stats.rendered
+        self.total_coalesced += stats.coalesced
+        return stats
+
+    # --- Tick -------------------------------------------------------------
+    def _tick(self):
+        self._after_id = None
+        try:
+            stats = self.flush()
+            if self._on_tick and stats.posted:
+                self._on_tick(stats)
+        finally:
+            if self._running:
+                self._after_id = self._widget.after(self.interval_ms, self._tick)
@@ -0,0 +1,229 @@
+import threading
+import time
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+from bindings import BindingRegistry, Visual
+from fleet import FleetStateStore, TopicTemplate
+from history import HistoryStore
+from payloads import Reading
+from snapshot import SnapshotEntry
+
+# events (listener arguments)
+CHANGE = "change"       # (binding name, Visual, received)  received is None for repaints
+HISTORY = "history"     # (topic key,)  a numeric sample was added to the history
+ROBOT = "robot"         # (robot_id, is_new)  fleet mode: a robot reported a value
+
+
+class DashboardModel:
+    # Widget-free dashboard state: decodes readings through the bindings in
+    # the registry, keeps the current Visual per binding, the numeric history
+    # and (in fleet mode) the per-robot store, and emits events when they
+    # change. The Tk window subscribes to the events and only renders; the
+    # same model runs headless for soak tests and benchmarks.
+    #
+    # Readings arrive on the MQTT thread and listeners are called on it, so
+    # listeners must be thread-safe (e.g. UiUpdateScheduler.post).
+
+    def __init__(self,
+                 registry: BindingRegistry,
+                 fleet_prefix: Optional[str] = None,
+                 history_capacity: int = 200 * 3600):
+        self.registry = registry
+        self.routes = registry.compile()
+        self.history = HistoryStore(history_capacity)
+        self._charted = frozenset(registry.history)
+
+        # fleet mode: one shared connection, topics namespaced per robot id
+        self.fleet_topics = TopicTemplate(fleet_prefix) if fleet_prefix else None
+        self.fleet_store = FleetStateStore(registry.topics) if fleet_prefix else None
+        self.robot_id: Optional[str] = None
+        self.pub_topics: Dict[str, str] = {} if fleet_prefix else dict(registry.publish)
+
+        self._visuals: Dict[str, Visual] = {}
+        # fleet mode: (robot_id, key) -> reading restored from a snapshot
+        self._restored: Dict[Tuple[str, str], Reading] = {}
+        self._lock = threading.Lock()
+        self._listeners: Dict[str, List[Callable[..., None]]] = {CHANGE: [], HISTORY: [], ROBOT: []}
+
+        # counters
+        self.readings = 0
+        self.changes = 0
+
+    # --- API --------------------------------------------------------------
+    def listen(self, event: str, fn: Callable[..., None]):
+        self._listeners[event].append(fn)
+
+    def attach(self, mqtt):
+        # Subscribes every bound topic (one wildcard filter per topic in fleet mode)
+        # and installs the topics' ingestion filters.
+        for key, route in self.routes.items():
+            if self.fleet_topics is None:
+                mqtt.subscribe(key, lambda t, r, k=key: self.on_reading(k, r), decoder=route.decoder)
+            else:
+                mqtt.subscribe(self.fleet_topics.filter(key),
+                               lambda t, r, k=key: self.on_fleet_reading(k, r),
+                               decoder=route.decoder)
+        for key, flt in self.registry.ingest_filters().items():
+            mqtt.set_filter(key if self.fleet_topics is None else self.fleet_topics.filter(key), flt)
+
+    def on_reading(self, key: str, reading: Reading):
+        # hot path: the payload was decoded once into `reading`; evaluate the
+        # precompiled bindings and report only the visuals that changed
+        self.readings += 1
+        changed = []
+        with self._lock:
+            visuals = self._visuals
+            for b in self.routes[key].bindings:
+                visual = b.evaluate(reading)
+                if visuals.get(b.name) != visual:
+                    visuals[b.name] = visual
+                    changed.append((b.name, visual))
+        if changed:
+            self.changes += len(changed)
+            for fn in self._listeners[CHANGE]:
+                for name, visual in changed:
+                    fn(name, visual, reading.received)
+        if key in self._charted and self.history.record(key, reading.received, reading.value):
+            self._fire(HISTORY, key)
+
+    def on_fleet_reading(self, key: str, reading: Reading):
+        robot_id = self.fleet_topics.robot_id(reading.topic)
+        if robot_id is None:
+            return
+        is_new = self.fleet_store.update(robot_id, key, reading)
+        self._fire(ROBOT, robot_id, is_new)
+        if robot_id == self.robot_id:
+            self.on_reading(key, reading)
+
+    def restore(self, entries: Mapping[str, SnapshotEntry]) -> int:
+        # Warm start from the last-known state (SnapshotCache.load()): each
+        # payload goes through its topic's decoder and the visuals are
+        # emitted as stale repaints (received=None); live readings replace
+        # them. Bindings that already have a live visual are left alone. In
+        # fleet mode the readings fill the fleet store instead. Returns the
+        # number of topics restored.
+        restored = 0
+        for key, route in self.routes.items():
+            if self.fleet_topics is not None:
+                for topic, entry in entries.items():
+                    robot_id = self.fleet_topics.robot_id(topic)
+                    if robot_id is None or topic != self.fleet_topics.topic(robot_id, key):
+                        continue
+                    if self.fleet_store.get(robot_id, key) is not None:
+                        continue
+                    reading = route.decoder.decode(topic, entry.payload, entry.received)
+                    self._restored[(robot_id, key)] = reading
+                    self._fire(ROBOT, robot_id, self.fleet_store.update(robot_id, key, reading))
+                    restored += 1
+                continue
+            entry = entries.get(key)
+            if entry is None:
+                continue
+            reading = route.decoder.decode(key, entry.payload, entry.received)
+            changed = []
+            with self._lock:
+                for b in route.bindings:
+                    if b.name not in self._visuals:
+                        visual = self._visuals[b.name] = b.evaluate(reading)._replace(stale=True)
+                        changed.append((b.name, visual))
+            for name, visual in changed:
+                self._fire(CHANGE, name, visual, None)
+            restored += 1
+        return restored
+
+    def select(self, robot_id: str):
+        # Fleet mode: switch the dashboard to `robot_id` and re-emit every
+        # visual from its stored state (received=None). History restarts.
+        changed = []
+        with self._lock:
+            self.robot_id = robot_id
+            self.pub_topics = {f: self.fleet_topics.topic(robot_id, t) for f, t in self.registry.publish.items()}
+            self.history.clear()
+            for key, route in self.routes.items():
+                reading = self.fleet_store.get(robot_id, key)
+                if reading is None:
+                    reading = route.decoder.parse(self.fleet_topics.topic(robot_id, key), "")
+                stale = self._restored.get((robot_id, key)) is reading
+                for b in route.bindings:
+                    visual = b.evaluate(reading)
+                    if stale:
+                        visual = visual._replace(stale=True)
+                    self._visuals[b.name] = visual
+                    changed.append((b.name, visual))
+        for name, visual in changed:
+            self._fire(CHANGE, name, visual, None)
+        for key in self._charted:
+            self._fire(HISTORY, key)
+
+    def topic_for(self, field: str) -> Optional[str]:
+        return self.pub_topics.get(field)
+
+    def visual(self, name: str) -> Optional[Visual]:
+        return self._visuals.get(name)
+
+    def visuals(self) -> Dict[str, Visual]:
+        with self._lock:
+            return dict(self._visuals)
+
+    # --- Internals --------------------------------------------------------
+    def _fire(self, event: str, *args: Any):
+        for fn in self._listeners[event]:
+            fn(*args)
+
+
+def main():
+    # Headless soak run: connect (or replay a capture) and print throughput.
+    import argparse
+    from mqtt_service import MqttService
+    from recorder import SessionReplayer
+
+    parser = argparse.ArgumentParser(description="Headless dashboard model")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=1883)
+    parser.add_argument("--fleet", metavar="PREFIX", nargs="?", const="/robots/{robot_id}", default=None)
+    parser.add_argument("--bindings", metavar="PATH", help="bindings config (default: bindings.json)")
+    parser.add_argument("--replay", metavar="PATH", help="replay a captured session instead of connecting")
+    parser.add_argument("--speed", type=float, default=0.0, help="replay speed factor; 0 = as fast as possible")
+    parser.add_argument("--interval", type=float, default=5.0, help="seconds between stats lines")
+    parser.add_argument("--serve", metavar="PORT", type=int, nargs="?", const=8765, default=None,
+                        help="serve the state read-only on http://127.0.0.1:PORT")
+    args = parser.parse_args()
+
+    model = DashboardModel(BindingRegistry.load(args.bindings), fleet_prefix=args.fleet)
+    if model.fleet_topics is not None:
+        model.listen(ROBOT, lambda robot_id, is_new: model.robot_id is None and model.select(robot_id))
+    mqtt = MqttService(args.host, args.port, log_fn=lambda r: print(r.format()))
+    model.attach(mqtt)
+    server = None
+    if args.serve is not None:
+        from state_server import StateServer
+        server = StateServer(model, port=args.serve)
+        server.start()
+        print(f"serving the state on {server.url}")
+
+    def report(prev, elapsed):
+        print(f"{model.readings:>12,} readings  {model.changes:>10,} changes  "
+              f"{(model.readings - prev) / elapsed:>10,.0f} readings/s")
+
+    if args.replay:
+        stats = SessionReplayer(args.replay).replay(mqtt.inject, args.speed)
+        report(0, stats.elapsed)
+        return
+    mqtt.start()
+    try:
+        prev, last = 0, time.monotonic()
+        while True:
+            time.sleep(args.interval)
+            now = time.monotonic()
+            report(prev, now - last)
+            prev, last = model.readings, now
+    except KeyboardInterrupt:
+        pass
+    finally:
+        mqtt.stop()
+        if server is not None:
+            server.stop()
+
+
+if __name__ == "__main__":
+    main()